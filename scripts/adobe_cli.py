@@ -1,33 +1,13 @@
 import os
 import sys
-import subprocess
 from pathlib import Path
-import time
-import re
+
+from extraction.chunking import chunk_text
+from extraction.external import find_adobe, run_external
 
 def log(msg):
     print(f"[LOG] {msg}", flush=True)
 
-def chunk_text(text, max_size=100000):
-    chunks = []
-    current_chunk = ""
-    
-    # Split into paragraphs
-    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
-    
-    for paragraph in paragraphs:
-        if len(current_chunk) + len(paragraph) + 2 > max_size:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = paragraph
-        else:
-            current_chunk = f"{current_chunk}\n\n{paragraph}" if current_chunk else paragraph
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
-
 def main():
     try:
         # Setup paths using absolute paths
@@ -56,49 +36,12 @@ def main():
         log("Created output directories")
         
         # Find Adobe Reader/Acrobat
-        adobe_paths = [
-            r"C:\Program Files (x86)\Adobe\Acrobat Reader DC\Reader\AcroRd32.exe",
-            r"C:\Program Files\Adobe\Acrobat DC\Acrobat\Acrobat.exe"
-        ]
-        adobe_path = None
-        for path in adobe_paths:
-            if os.path.exists(path):
-                adobe_path = path
-                break
-        
-        if not adobe_path:
-            raise FileNotFoundError("Adobe Reader/Acrobat not found")
+        adobe_path = find_adobe()
         log(f"Found Adobe at: {adobe_path}")
         
-        # Extract text using Adobe's CLI
+        # Extract text using Adobe's CLI; returns as soon as the text file is closed
         log("Extracting text from PDF...")
-        cmd = [adobe_path, "/A", f"SaveAs:filename={text_path};format=txt", str(input_path)]
-        
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            if result.returncode != 0:
-                log("Adobe command output:")
-                log(f"STDOUT: {result.stdout}")
-                log(f"STDERR: {result.stderr}")
-                raise Exception(f"Adobe extraction failed with code {result.returncode}")
-        except subprocess.TimeoutExpired:
-            log("Adobe command timed out after 60 seconds")
-            raise
-        
-        # Wait for file to be created
-        max_wait = 30
-        while max_wait > 0 and not text_path.exists():
-            time.sleep(1)
-            max_wait -= 1
-            log(f"Waiting for text file... ({max_wait} seconds left)")
-        
-        if not text_path.exists():
-            raise FileNotFoundError("Text file was not created")
-        
-        # Read extracted text
-        log("Reading extracted text...")
-        with open(text_path, 'r', encoding='utf-8') as f:
-            full_text = f.read()
+        full_text = run_external('adobe', input_path, text_path, timeout=60)
         
         if not full_text.strip():
             raise Exception("Extracted text is empty")
@@ -1,8 +1,9 @@
 import os
 import sys
-import subprocess
 from pathlib import Path
 
+from extraction.external import find_adobe, run_external
+
 def log(msg):
     print(f"[LOG] {msg}", flush=True)
 
@@ -31,38 +32,12 @@ def main():
         log("Created output directories")
         
         # Adobe Reader path
-        adobe_path = r"C:\Program Files (x86)\Adobe\Acrobat Reader DC\Reader\AcroRd32.exe"
-        if not os.path.exists(adobe_path):
-            adobe_path = r"C:\Program Files\Adobe\Acrobat DC\Acrobat\Acrobat.exe"
-        if not os.path.exists(adobe_path):
-            raise FileNotFoundError("Adobe Reader/Acrobat not found")
+        adobe_path = find_adobe()
         log(f"Found Adobe at: {adobe_path}")
         
-        # Extract text using Adobe
+        # Extract text using Adobe; returns as soon as the text file is closed
         log("Extracting text with Adobe...")
-        cmd = [adobe_path, "/A", f"SaveAs:filename={text_path};format=txt", str(input_path)]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            log("Adobe command output:")
-            log(f"STDOUT: {result.stdout}")
-            log(f"STDERR: {result.stderr}")
-            raise Exception(f"Adobe extraction failed with code {result.returncode}")
-        
-        # Wait for file to be created
-        import time
-        max_wait = 30
-        while max_wait > 0 and not text_path.exists():
-            time.sleep(1)
-            max_wait -= 1
-        
-        if not text_path.exists():
-            raise FileNotFoundError("Text file was not created")
-        
-        # Read extracted text
-        log("Reading extracted text...")
-        with open(text_path, 'r', encoding='utf-8') as f:
-            text = f.read()
+        text = run_external('adobe', input_path, text_path, timeout=60)
         
         # Create chunks
         log("Creating chunks...")
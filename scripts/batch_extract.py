@@ -0,0 +1,130 @@
+import os
+import sys
+import argparse
+import json
+from pathlib import Path
+
+from extraction.backends import BACKENDS
+from extraction.batch import expand_inputs, run_batch
+from extraction.chunking import DEFAULT_MAX_SIZE
+from extraction.parallel import PAGE_COUNTS
+from extraction.pipeline import DEFAULT_QUEUE_SIZE, run_pipeline
+from extraction.progress import print_event
+
+def log(msg):
+    print(f"[LOG] {msg}", flush=True)
+
+def parse_args():
+    script_dir = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Extract text from many PDFs in parallel")
+    parser.add_argument('inputs', nargs='+', help="PDF files, directories or glob patterns")
+    parser.add_argument('--backend', default='fitz', choices=sorted(BACKENDS), help="Extractor backend")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Documents processed in parallel (default: CPU count)")
+    parser.add_argument('--output-dir', default=str(script_dir.parent / 'test-data' / 'processed' / 'batch'),
+                        help="Root directory; each document gets its own subdirectory")
+    parser.add_argument('--max-size', type=int, default=DEFAULT_MAX_SIZE, help="Chunk size in characters")
+    parser.add_argument('--max-tokens', type=int,
+                        help="Pack chunks to this many estimated tokens instead of --max-size characters")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-extract pages that changed since the last run")
+    parser.add_argument('--resume', action='store_true',
+                        help="Checkpoint each fitz/pdfminer document by page range and, when re-run, continue "
+                             "interrupted documents from their last committed page")
+    parser.add_argument('--chunk-store', action='store_true',
+                        help="Write each document's chunks as one chunks/chunks.txt blob plus manifest")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Overlap extraction with chunking and writing (asyncio stages with bounded queues)")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Items each --pipeline queue holds before extraction waits")
+    parser.add_argument('--shard-pages', type=int,
+                        help="With --pipeline, extract fitz/pdfminer documents in shards of this many pages")
+    parser.add_argument('--index', action='store_true',
+                        help="With --pipeline, add each document to the full-text search index")
+    parser.add_argument('--server',
+                        help="tika: URL of a running Tika server; --workers documents are sent at once over "
+                             "one keep-alive session")
+    parser.add_argument('--report', help="Write the batch results as JSON to this path")
+    args = parser.parse_args()
+    if args.pipeline and (args.incremental or args.chunk_store):
+        parser.error("--pipeline cannot be combined with --incremental or --chunk-store")
+    if args.resume and (args.pipeline or args.incremental or args.chunk_store):
+        parser.error("--resume cannot be combined with --pipeline, --incremental or --chunk-store")
+    if args.resume and args.backend not in PAGE_COUNTS:
+        parser.error(f"--resume needs a backend that extracts page ranges: {', '.join(PAGE_COUNTS)}")
+    if args.server and args.backend != 'tika':
+        parser.error("--server needs --backend tika")
+    if args.index and not args.pipeline:
+        parser.error("--index needs --pipeline")
+    if args.chunk_store and args.incremental:
+        parser.error("--chunk-store cannot be combined with --incremental")
+    if args.max_tokens and args.incremental:
+        parser.error("--max-tokens cannot be combined with --incremental")
+    return args
+
+def main():
+    args = parse_args()
+    try:
+        files = expand_inputs(args.inputs)
+    except FileNotFoundError as e:
+        log(f"ERROR: {e}")
+        sys.exit(1)
+    if not files:
+        log("ERROR: No PDF files found")
+        sys.exit(1)
+
+    log(f"Extracting {len(files)} documents with {args.backend} using {args.workers} workers...")
+    log(f"Output directory: {args.output_dir}")
+
+    def on_result(result):
+        if result['ok']:
+            resumed = ''
+            if result.get('resumed'):
+                resumed = (" (already extracted)" if not result['extracted']
+                           else f" (resumed after page {result['resumed']})")
+            log(f"OK {result['file']}: {result['pages']} pages, {result['chunks']} chunks in "
+                f"{result['elapsed']:.2f}s{resumed}")
+        else:
+            log(f"FAILED {result['file']}: {result['error']}")
+
+    def on_status(status):
+        print_event({'event': 'pipeline', **status})
+
+    options = {'chunk_store': True} if args.chunk_store else {}
+    if args.max_tokens:
+        options['max_tokens'] = args.max_tokens
+    if args.server:
+        options['server'] = args.server
+    if args.pipeline:
+        summary = run_pipeline(files, args.output_dir, args.backend, args.workers, args.max_size,
+                               queue_size=args.queue_size, shard_pages=args.shard_pages, index=args.index,
+                               on_result=on_result, on_status=on_status, **options)
+    else:
+        summary = run_batch(files, args.output_dir, args.backend, args.workers, args.max_size,
+                            args.incremental, on_result=on_result, resume=args.resume, **options)
+
+    log("Batch complete!")
+    log(f"- Documents: {summary['succeeded']}/{summary['documents']} succeeded")
+    log(f"- Pages: {summary['pages']} in {summary['elapsed']:.2f}s "
+        f"({summary['pages_per_sec']:.1f} pages/sec, {summary['mb_per_sec']:.2f} MB/sec)")
+    if args.pipeline:
+        for name, stage in summary['stages'].items():
+            log(f"- {name}: {stage['busy']:.2f}s busy, {stage['utilisation']:.0%} utilised")
+        for name, queue in summary['queues'].items():
+            log(f"- {name} queue: mean depth {queue['mean_depth']:.2f}, max {queue['max_depth']}/{queue['size']}")
+        log(f"- Bottleneck: {summary['bottleneck']}")
+    failures = [r for r in summary['results'] if not r['ok']]
+    if failures:
+        log(f"- {len(failures)} failures:")
+        for result in failures:
+            log(f"  {result['file']}: {result['error']}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        log(f"- Report: {args.report}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import re
+import time
+
+from extraction.chunking import chunk_pages, chunk_text
+
+PARAGRAPH = (
+    "Message {n} of 9999\nSent: 12/01/2024 at 01:02 AM\nFrom: Robert Moyer\n"
+    "To: Christine Moyer (First Viewed: 12/01/2024 at 07:30 AM)\nSubject: Re: Pickup\n"
+    "Thanks, I will be there at 5pm to pick up the kids from school. "
+)
+
+
+def log(msg):
+    print(f"[LOG] {msg}", flush=True)
+
+
+def legacy_chunk_text(text, max_size=100000):
+    # The quadratic implementation the extract scripts used to copy around
+    chunks = []
+    current_chunk = ""
+    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+    for paragraph in paragraphs:
+        if len(current_chunk) + len(paragraph) + 2 > max_size:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = paragraph
+        else:
+            current_chunk = f"{current_chunk}\n\n{paragraph}" if current_chunk else paragraph
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def synthetic_pages(size_mb, page_size=4000):
+    target = int(size_mb * 1024 * 1024)
+    produced = 0
+    n = 0
+    while produced < target:
+        parts = []
+        page_len = 0
+        while page_len < page_size:
+            n += 1
+            paragraph = PARAGRAPH.format(n=n)
+            parts.append(paragraph)
+            page_len += len(paragraph) + 2
+        page = '\n\n'.join(parts)
+        produced += len(page) + 2
+        yield page
+
+
+def measure(label, size_mb, func):
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    log(f"{label}: {count} chunks in {elapsed:.2f}s ({size_mb / elapsed:.1f} MB/s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunker throughput micro-benchmark")
+    parser.add_argument('--size-mb', type=float, default=300, help="Size of the synthetic text")
+    parser.add_argument('--legacy-mb', type=float, default=20,
+                        help="Size used for the old quadratic chunker (0 to skip)")
+    parser.add_argument('--max-size', type=int, default=100000, help="Chunk size in characters")
+    args = parser.parse_args()
+
+    log(f"Streaming {args.size_mb:.0f} MB of pages through chunk_pages...")
+    measure('chunk_pages (streaming)', args.size_mb,
+            lambda: sum(1 for _ in chunk_pages(synthetic_pages(args.size_mb), args.max_size)))
+
+    log(f"Building {args.size_mb:.0f} MB string for chunk_text...")
+    text = '\n\n'.join(synthetic_pages(args.size_mb))
+    measure('chunk_text', args.size_mb, lambda: len(chunk_text(text, args.max_size)))
+    del text
+
+    if args.legacy_mb:
+        small = '\n\n'.join(synthetic_pages(args.legacy_mb))
+        new = measure(f'chunk_text ({args.legacy_mb:.0f} MB)', args.legacy_mb,
+                      lambda: len(chunk_text(small, args.max_size)))
+        old = measure(f'legacy chunk_text ({args.legacy_mb:.0f} MB)', args.legacy_mb,
+                      lambda: len(legacy_chunk_text(small, args.max_size)))
+        assert chunk_text(small, args.max_size) == legacy_chunk_text(small, args.max_size)
+        log(f"Speedup over legacy: {old / new:.1f}x (outputs identical)")
+
+
+if __name__ == '__main__':
+    main()
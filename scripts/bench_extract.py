@@ -0,0 +1,101 @@
+import sys
+import argparse
+from pathlib import Path
+
+from extraction.backends import BACKENDS
+from extraction.bench import (DEFAULT_BACKENDS, DEFAULT_SIZES, DEFAULT_THRESHOLD, DEFAULT_TIMEOUT, compare,
+                              load_results, run_suite, save_results)
+from extraction.corpus import ensure_corpus
+
+
+def log(msg):
+    print(f"[LOG] {msg}", flush=True)
+
+
+def int_list(value):
+    return [int(part) for part in value.split(',') if part]
+
+
+def name_list(value):
+    names = [part for part in value.split(',') if part]
+    unknown = sorted(set(names) - set(BACKENDS))
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown backends: {', '.join(unknown)}")
+    return names
+
+
+def parse_args():
+    script_dir = Path(__file__).resolve().parent
+    default_corpus = script_dir.parent / 'test-data' / 'synthetic'
+    parser = argparse.ArgumentParser(description="Benchmark the extraction backends on synthetic OFW reports")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="Write the synthetic corpus")
+    run = commands.add_parser('run', help="Benchmark backends and chunkers, writing a JSON results file")
+    for command in (generate, run):
+        command.add_argument('--corpus-dir', default=str(default_corpus), help="Where the synthetic PDFs live")
+        command.add_argument('--sizes', type=int_list, default=list(DEFAULT_SIZES),
+                             help="Comma-separated page counts (default: 10,100,1000; up to 10000)")
+        command.add_argument('--seed', type=int, default=0, help="Corpus seed")
+    run.add_argument('--backends', type=name_list, default=list(DEFAULT_BACKENDS),
+                     help="Comma-separated backends (default: fitz,pdfminer,pikepdf,pypdf2,tika)")
+    run.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Seconds allowed per case")
+    run.add_argument('--output', default='bench-results.json', help="Results file")
+
+    check = commands.add_parser('compare', help="Fail when a backend got slower than the baseline")
+    check.add_argument('baseline', help="Earlier results file")
+    check.add_argument('current', help="New results file")
+    check.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help="Allowed slowdown in percent (default: 10)")
+    check.add_argument('--metric', default='wall', choices=['wall', 'extract_elapsed'],
+                       help="Timing to compare (default: wall)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        if args.command == 'compare':
+            rows = compare(load_results(args.baseline), load_results(args.current), args.threshold, args.metric)
+            for row in rows:
+                if row['status'] == 'failed':
+                    log(f"{row['backend']} {row['pages']}p: {row['baseline']:.2f}s -> failed ({row['error']}) "
+                        f"REGRESSION")
+                elif row['status'] == 'missing':
+                    log(f"{row['backend']} {row['pages']}p: {row['baseline']:.2f}s -> not run REGRESSION")
+                else:
+                    status = 'REGRESSION' if row['regression'] else 'ok'
+                    log(f"{row['backend']} {row['pages']}p: {row['baseline']:.2f}s -> {row['current']:.2f}s "
+                        f"({row['change']:+.1f}%) {status}")
+            compared = sum(1 for row in rows if row['change'] is not None)
+            regressions = [row for row in rows if row['regression']]
+            if regressions:
+                log(f"{len(regressions)} cases regressed: slower than {args.threshold:g}%, failed or missing")
+                sys.exit(1)
+            if not compared:
+                log("No case succeeded in both the baseline and the current run")
+                sys.exit(1)
+            log(f"No case is more than {args.threshold:g}% slower ({compared} compared)")
+            return
+
+        corpus = ensure_corpus(args.corpus_dir, args.sizes, args.seed, log=log)
+        if args.command == 'generate':
+            for pages, path in sorted(corpus.items()):
+                log(f"- {pages} pages: {path}")
+            return
+
+        log(f"Benchmarking {', '.join(args.backends)} on {len(corpus)} reports...")
+        results = run_suite(corpus, args.backends, args.timeout, log=log)
+        save_results(results, args.output)
+        log(f"Results saved to: {args.output}")
+
+    except Exception as e:
+        log(f"ERROR: {str(e)}")
+        import traceback
+        log("Traceback:")
+        log(traceback.format_exc())
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -44,6 +44,18 @@ def main():
                 log(f"File starts with PDF header: {is_pdf}")
         except Exception as e:
             log(f"Error reading file: {e}")
+        
+        # Pre-scan pages to see which extractor each one needs
+        try:
+            from extraction.routing import scan
+            plan = scan(pdf_path)
+            log(f"Pages: {plan['page_count']} ({plan['kinds']}), scanned in {plan['scan_elapsed']:.2f}s")
+            for name, pages in plan['routes'].items():
+                log(f"- {name}: {len(pages)} pages")
+            if plan['needs_ocr']:
+                log(f"Pages without a text layer: {len(plan['needs_ocr'])}")
+        except Exception as e:
+            log(f"Error scanning PDF: {e}")
 
 if __name__ == '__main__':
     main()
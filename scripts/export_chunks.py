@@ -0,0 +1,43 @@
+import sys
+import argparse
+from pathlib import Path
+
+from extraction.chunk_store import ChunkStore
+
+def log(msg):
+    print(f"[LOG] {msg}", flush=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Export a single-file chunk store to llm-input/chunk-NNN.txt files")
+    parser.add_argument('output_dir', help="Extraction output directory holding chunks/manifest.json")
+    parser.add_argument('--llm-input-dir', help="Where to write the chunk files (default: OUTPUT_DIR/llm-input)")
+    parser.add_argument('--verify', action='store_true', help="Check every chunk against its manifest hash first")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    try:
+        output_dir = Path(args.output_dir)
+        llm_input_dir = Path(args.llm_input_dir) if args.llm_input_dir else output_dir / 'llm-input'
+
+        with ChunkStore(output_dir / 'chunks') as store:
+            log(f"Chunk store: {len(store)} chunks, {store.manifest['bytes']:,} bytes")
+            if args.verify:
+                corrupt = store.verify()
+                if corrupt:
+                    raise ValueError(f"Chunks do not match their manifest hash: {corrupt}")
+                log("All chunks match their manifest hashes")
+            count = store.export_files(llm_input_dir)
+
+        log(f"Exported {count} chunks to: {llm_input_dir}")
+
+    except Exception as e:
+        log(f"ERROR: {str(e)}")
+        import traceback
+        log("Traceback:")
+        log(traceback.format_exc())
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
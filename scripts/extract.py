@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Only the registry is imported up front; it loads a backend's library when
+# that backend runs, so --help and --list-backends import none of them
+from extraction.backends import BACKENDS, PDFMINER_PROFILES, get_backend, list_backends
+
+def log(msg):
+    print(f"[LOG] {msg}", flush=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract text from a PDF with any backend")
+    parser.add_argument('input', nargs='?', help="PDF to extract (default: test-data/OFW_Messages_Report_Dec.pdf)")
+    parser.add_argument('--backend', default='fitz', choices=list(BACKENDS), help="Extractor backend (default: fitz)")
+    parser.add_argument('--list-backends', action='store_true',
+                        help="List the backends and whether each is installed, then exit")
+    parser.add_argument('--json', action='store_true', help="Print --list-backends as JSON")
+    parser.add_argument('--output-dir', help="Output directory (default: test-data/processed)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write pages to the output files as they are extracted (bounded memory)")
+    parser.add_argument('--chunk-store', action='store_true',
+                        help="Stream chunks into one chunks/chunks.txt blob plus manifest instead of chunk files")
+    parser.add_argument('--checkpoint', action='store_true',
+                        help="fitz/pdfminer: commit pages in ranges under OUTPUT_DIR/raw/checkpoint as they are "
+                             "extracted, so an interrupted run can be resumed")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted --checkpoint run from its last committed page")
+    parser.add_argument('--checkpoint-pages', type=int, help="Pages per checkpointed range (default: 50)")
+    parser.add_argument('--supervise', action='store_true',
+                        help="fitz/pdfminer: extract page groups in supervised workers that are killed when they "
+                             "hang, crash or run out of memory (manifest in raw/extraction-manifest.json)")
+    parser.add_argument('--page-timeout', type=float, help="With --supervise, seconds per page group (default: 60)")
+    parser.add_argument('--page-memory', type=int, help="With --supervise, MB of memory per worker (default: 2048)")
+    parser.add_argument('--page-group', type=int, help="With --supervise, pages per group (default: 20)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always re-extract instead of reusing a cached result")
+    parser.add_argument('--max-size', type=int, help="Maximum characters per chunk (default: 100,000)")
+    parser.add_argument('--max-tokens', type=int,
+                        help="Pack chunks to this many estimated tokens instead of characters")
+    parser.add_argument('--messages', action='store_true',
+                        help="Also split the report into OUTPUT_DIR/messages.jsonl")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Replace near-duplicate messages in the chunks with references "
+                             "(report in raw/dedup-report.json)")
+    parser.add_argument('--index', action='store_true',
+                        help="Add the report's messages (or pages) to the full-text search index")
+    parser.add_argument('--metrics-file',
+                        help="Write Prometheus metrics here when done (node-exporter textfile collector)")
+    parser.add_argument('--workers', type=int,
+                        help="fitz/pdfminer: worker processes for page-parallel extraction")
+    parser.add_argument('--profile', choices=sorted(PDFMINER_PROFILES),
+                        help="pdfminer: layout analysis profile (default, fast or none)")
+    parser.add_argument('--server', help="tika: URL of a running Tika server")
+    parser.add_argument('--timeout', type=float, help="pdftotext/adobe: seconds allowed for the external command")
+    args = parser.parse_args()
+    if (args.stream or args.chunk_store) and (args.messages or args.dedup or args.index):
+        parser.error("--messages, --dedup and --index cannot be combined with --stream or --chunk-store")
+    if args.supervise and (args.stream or args.chunk_store or args.checkpoint or args.resume):
+        parser.error("--supervise cannot be combined with --stream, --chunk-store, --checkpoint or --resume")
+    if (args.checkpoint or args.resume) and (args.stream or args.chunk_store or args.messages or args.dedup
+                                             or args.index):
+        parser.error("--checkpoint and --resume cannot be combined with --stream, --chunk-store, --messages, "
+                     "--dedup or --index")
+    return args
+
+def backend_options(args):
+    """The options the selected backend accepts, from the flags that were given."""
+    options = {}
+    if args.workers and args.backend in ('fitz', 'pdfminer'):
+        options['workers'] = args.workers
+    if args.profile and args.backend == 'pdfminer':
+        options['laparams'] = PDFMINER_PROFILES[args.profile]
+    if args.server and args.backend == 'tika':
+        options['server'] = args.server
+    if args.timeout and args.backend in ('pdftotext', 'adobe'):
+        options['timeout'] = args.timeout
+    return options
+
+def make_chunks(pages, separator, max_size, max_tokens=None):
+    """Return the chunks of ``pages`` and, with ``max_tokens``, their token counts."""
+    from extraction.chunking import chunk_pages, chunk_pages_by_tokens
+    if max_tokens:
+        token_chunks = list(chunk_pages_by_tokens(pages, max_tokens, separator))
+        return [chunk for chunk, _ in token_chunks], [tokens for _, tokens in token_chunks]
+    return list(chunk_pages(pages, max_size, separator)), None
+
+def print_backends(as_json):
+    backends = list_backends()
+    if as_json:
+        print(json.dumps(backends, indent=2))
+        return
+    for backend in backends:
+        status = 'available' if backend['available'] else 'not installed'
+        log(f"{backend['name']:<10} {backend['label']:<26} {status}")
+
+def main():
+    args = parse_args()
+    if args.list_backends:
+        print_backends(args.json)
+        return
+
+    from extraction import metrics
+    from extraction.cache import ExtractionCache, cached_extract, file_sha256
+    from extraction.checkpoint import DEFAULT_RANGE_PAGES, checkpoint_extract
+    from extraction.chunking import DEFAULT_MAX_SIZE
+    from extraction.dedup import DedupIndex, dedup_pages, write_report
+    from extraction.messages import segment_pages, write_messages
+    from extraction.search import SearchIndex
+    from extraction.streaming import ChunkWriter, stream_extract
+    from extraction.supervised import supervised_pages, summary, write_manifest
+
+    try:
+        script_dir = Path(__file__).resolve().parent
+        input_path = Path(args.input) if args.input else script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
+        output_dir = Path(args.output_dir) if args.output_dir else script_dir.parent / 'test-data' / 'processed'
+        llm_input_dir = output_dir / 'llm-input'
+        raw_dir = output_dir / 'raw'
+        text_path = raw_dir / 'extracted-text.txt'
+        backend = get_backend(args.backend)
+        options = backend_options(args)
+        max_size = args.max_size or DEFAULT_MAX_SIZE
+
+        log(f"Input PDF: {input_path}")
+        log(f"Output directory: {output_dir}")
+        log(f"Backend: {args.backend} ({backend.label})")
+
+        # Verify input file exists
+        if not input_path.exists():
+            raise FileNotFoundError(f"PDF file not found: {input_path}")
+        if not backend.available():
+            raise RuntimeError(f"{backend.label} is not installed; see --list-backends")
+        os.makedirs(llm_input_dir, exist_ok=True)
+        os.makedirs(raw_dir, exist_ok=True)
+
+        if args.checkpoint or args.resume:
+            log("Extracting with page-range checkpoints...")
+            stats = checkpoint_extract(args.backend, input_path, output_dir, max_size, log=log, resume=args.resume,
+                                       range_pages=args.checkpoint_pages or DEFAULT_RANGE_PAGES,
+                                       max_tokens=args.max_tokens, **options)
+            log("Processing complete!")
+            if stats['resumed']:
+                log(f"- Resumed after page {stats['resumed']}, extracted {stats['extracted']} more")
+            log(f"- Created {stats['chunks']} chunks in: {stats['llm_input_dir']}")
+            return
+
+        if args.stream or args.chunk_store:
+            log("Streaming pages to output files...")
+            stats = stream_extract(args.backend, input_path, output_dir, max_size, log=log,
+                                   chunk_store=args.chunk_store, max_tokens=args.max_tokens, **options)
+            log("Processing complete!")
+            log(f"- {stats['pages']} pages, {stats['chunks']} chunks in "
+                f"{stats.get('store_dir') or stats['llm_input_dir']}")
+            return
+
+        if args.supervise:
+            # Failed pages come back empty, so supervised results are never cached
+            log("Extracting pages in supervised workers...")
+            supervision = {key: value for key, value in (('timeout', args.page_timeout),
+                                                           ('memory_mb', args.page_memory),
+                                                           ('group_pages', args.page_group)) if value}
+            with metrics.stage(args.backend, 'extract'):
+                pages, report = supervised_pages(args.backend, input_path, **supervision, **options)
+            with metrics.stage(args.backend, 'chunk'):
+                chunks, chunk_tokens = make_chunks(pages, backend.separator, max_size, args.max_tokens)
+            result = {'text': backend.join(pages)}
+            write_manifest(report, raw_dir / 'extraction-manifest.json')
+            stats = summary(report)
+            log(f"Extracted {stats['ok']} of {len(pages)} pages; {stats['recovered']} recovered with "
+                f"{stats['fallback']}, {stats['failed']} failed {stats['failed_pages'][:20]}, "
+                f"{len(stats['slow'])} slow groups")
+        else:
+            log("Extracting text...")
+            cache = None if args.no_cache else ExtractionCache()
+            result = cached_extract(args.backend, input_path, cache, max_size, args.max_tokens, **options)
+            pages = result['pages']
+            chunks = result['chunks']
+            chunk_tokens = result.get('chunk_tokens')
+            log(f"{'Cache hit: reused' if result['cached'] else 'Extracted'} {len(pages)} pages")
+
+        with metrics.stage(args.backend, 'write'):
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write(result['text'])
+            log(f"Raw text saved to: {text_path}")
+
+            if args.messages:
+                messages_path = output_dir / 'messages.jsonl'
+                count = write_messages(segment_pages(pages, backend.separator), messages_path)
+                log(f"Saved {count} messages to: {messages_path}")
+
+        if args.dedup:
+            # Deduped chunks depend on the index, so they are never cached
+            log("Replacing near-duplicate messages with references...")
+            index = DedupIndex()
+            try:
+                with metrics.stage(args.backend, 'dedup'):
+                    deduped, report = dedup_pages(pages, backend.separator, doc=file_sha256(input_path),
+                                                  name=input_path.name, index=index)
+            finally:
+                index.close()
+            with metrics.stage(args.backend, 'chunk'):
+                chunks, chunk_tokens = make_chunks(deduped, backend.separator, max_size, args.max_tokens)
+            write_report(report, raw_dir / 'dedup-report.json')
+            log(f"Replaced {report['duplicates']} duplicates: {report['chars_saved']:,} chars and "
+                f"~{report['tokens_saved']:,} tokens saved")
+
+        with metrics.stage(args.backend, 'write'):
+            log(f"Saving {len(chunks)} chunks...")
+            writer = ChunkWriter(llm_input_dir)
+            for i, chunk in enumerate(chunks):
+                writer.write(chunk, tokens=chunk_tokens[i] if chunk_tokens else None)
+            if args.max_tokens:
+                writer.write_metadata(raw_dir / 'chunks.json', args.max_tokens)
+
+        if args.index:
+            index = SearchIndex()
+            try:
+                count = index.add(input_path, pages, file_sha256(input_path), args.backend, backend.separator,
+                                  text_path)
+            finally:
+                index.close()
+            log(f"Search index is up to date: {index.path}" if count is None
+                else f"Indexed {count} passages in: {index.path}")
+
+        log("Processing complete!")
+        log(f"- Raw text: {text_path}")
+        log(f"- Created {len(chunks)} chunks in: {llm_input_dir}")
+
+    except Exception as e:
+        log(f"ERROR: {str(e)}")
+        import traceback
+        log("Traceback:")
+        log(traceback.format_exc())
+        sys.exit(1)
+    finally:
+        if args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
+
+if __name__ == '__main__':
+    main()
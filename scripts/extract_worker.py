@@ -0,0 +1,21 @@
+import argparse
+
+from extraction import metrics
+from extraction.worker import serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-lived PDF extraction worker (framed JSON over stdin/stdout)")
+    parser.add_argument('--preload', default='',
+                        help="Comma-separated backends to import at startup, e.g. fitz,pdfminer")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    serve(preload_names=[name for name in args.preload.split(',') if name])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""Page-level text extraction for each supported PDF backend.
+
+Backend libraries are imported the first time they are used and kept for the
+life of the process, so a long-lived worker only pays the import cost once.
+Nothing here imports a backend at module level, and ``Backend.available``
+checks for one without importing it, so listing backends stays cheap.
+"""
+import importlib
+import importlib.util
+import os
+from collections import OrderedDict
+from io import StringIO
+
+from . import mapped
+
+# Layout settings used by pdfminer_extract.py
+PDFMINER_LAPARAMS = {
+    'line_margin': 0.5,
+    'word_margin': 0.1,
+    'boxes_flow': 0.5,
+    'detect_vertical': True,
+}
+
+# Layout profiles for pdfminer. "fast" skips vertical text detection and
+# "none" skips layout analysis altogether (laparams=None in pdfminer terms).
+PDFMINER_PROFILES = {
+    'default': PDFMINER_LAPARAMS,
+    'fast': dict(PDFMINER_LAPARAMS, detect_vertical=False),
+    'none': False,
+}
+
+_modules = {}
+_open_documents = OrderedDict()
+MAX_OPEN_DOCUMENTS = 8
+
+
+def load_module(name):
+    module = _modules.get(name)
+    if module is None:
+        module = _modules[name] = importlib.import_module(name)
+    return module
+
+
+def loaded_modules():
+    return sorted(_modules)
+
+
+def _document_key(input_path):
+    stat = os.stat(input_path)
+    return (os.path.abspath(input_path), stat.st_size, stat.st_mtime_ns)
+
+
+def fitz_open_mapped(input_path):
+    """Open a document with PyMuPDF straight from a memory map of the file."""
+    fitz = load_module('fitz')
+    return fitz.open(stream=mapped.map_view(input_path), filetype='pdf')
+
+
+def open_fitz(input_path, keep_open=False):
+    """Open a document with PyMuPDF, optionally reusing a cached handle."""
+    if not keep_open:
+        return fitz_open_mapped(input_path)
+
+    key = _document_key(input_path)
+    pdf = _open_documents.get(key)
+    if pdf is not None:
+        _open_documents.move_to_end(key)
+        return pdf
+
+    pdf = fitz_open_mapped(input_path)
+    _open_documents[key] = pdf
+    while len(_open_documents) > MAX_OPEN_DOCUMENTS:
+        _, stale = _open_documents.popitem(last=False)
+        stale.close()
+    return pdf
+
+
+def close_documents():
+    while _open_documents:
+        _, pdf = _open_documents.popitem()
+        pdf.close()
+
+
+def fitz_pages(input_path, keep_open=False, workers=1, page_numbers=None):
+    if workers != 1 and page_numbers is None:
+        from .parallel import fitz_pages_parallel
+        yield from fitz_pages_parallel(input_path, workers)
+        return
+
+    pdf = open_fitz(input_path, keep_open=keep_open)
+    try:
+        numbers = range(len(pdf)) if page_numbers is None else sorted(page_numbers)
+        for i in numbers:
+            yield pdf[i].get_text()
+    finally:
+        if not keep_open:
+            pdf.close()
+
+
+def pdfminer_pages(input_path, laparams=None, page_numbers=None, workers=1):
+    """Yield pdfminer text page by page.
+
+    The concatenated pages are identical to what ``extract_text_to_fp``
+    writes for the whole file with the same ``LAParams``. ``laparams=None``
+    uses ``PDFMINER_LAPARAMS`` and ``laparams=False`` disables layout
+    analysis.
+    """
+    if workers != 1 and page_numbers is None:
+        from .parallel import pdfminer_pages_parallel
+        yield from pdfminer_pages_parallel(input_path, laparams, workers)
+        return
+
+    converter = load_module('pdfminer.converter')
+    layout = load_module('pdfminer.layout')
+    pdfinterp = load_module('pdfminer.pdfinterp')
+    pdfpage = load_module('pdfminer.pdfpage')
+
+    params = PDFMINER_LAPARAMS if laparams is None else laparams
+    output = StringIO()
+    rsrcmgr = pdfinterp.PDFResourceManager(caching=True)
+    device = converter.TextConverter(rsrcmgr, output, laparams=layout.LAParams(**params) if params else None)
+    try:
+        interpreter = pdfinterp.PDFPageInterpreter(rsrcmgr, device)
+        with mapped.open_reader(input_path) as fin:
+            for page in pdfpage.PDFPage.get_pages(fin, page_numbers, caching=True):
+                interpreter.process_page(page)
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+    finally:
+        device.close()
+
+
+def pike_pages(input_path, page_numbers=None):
+    # Content streams decoded to text, not the raw operators
+    from .pike_text import pike_text_pages
+    return pike_text_pages(input_path, page_numbers)
+
+
+def pypdf2_pages(input_path, page_numbers=None):
+    pypdf2 = load_module('PyPDF2')
+    reader = pypdf2.PdfReader(str(input_path))
+    numbers = range(len(reader.pages)) if page_numbers is None else sorted(page_numbers)
+    for i in numbers:
+        yield reader.pages[i].extract_text()
+
+
+def tika_pages(input_path, server=None):
+    if server:
+        # Long-running Tika server over a pooled keep-alive session
+        from .tika_client import get_client
+        yield get_client(server).extract(input_path)
+        return
+
+    parser = load_module('tika.parser')
+    parsed = parser.from_file(str(input_path))
+    if not parsed.get('content'):
+        raise Exception("Failed to extract text from PDF")
+    yield parsed['content']
+
+
+def pdftotext_pages(input_path, page_numbers=None, timeout=None):
+    """Pages from the poppler/xpdf ``pdftotext`` command, which ends each page with a form feed."""
+    from .external import DEFAULT_TIMEOUT, run_external
+    text = run_external('pdftotext', input_path, timeout=timeout or DEFAULT_TIMEOUT)
+    pages = text.split('\f')
+    if pages and not pages[-1]:
+        pages.pop()
+    if page_numbers is None:
+        yield from pages
+        return
+    for i in page_numbers:
+        yield pages[i]
+
+
+def adobe_pages(input_path, timeout=None):
+    """The whole document as one piece, from Adobe Reader's save-as-text."""
+    from .external import DEFAULT_TIMEOUT, run_external
+    yield run_external('adobe', input_path, timeout=timeout or DEFAULT_TIMEOUT)
+
+
+class Backend:
+    def __init__(self, name, module, pages, separator, revision=None, label=None):
+        self.name = name
+        self.module = module
+        self.pages = pages
+        self.separator = separator
+        # Bumped when our own text handling changes, so cached output is not reused
+        self.revision = revision
+        self.label = label or module or name
+
+    def available(self):
+        """Whether the backend can run here, found without importing it."""
+        if self.module is None:
+            from .external import command_available
+            return command_available(self.name)
+        return importlib.util.find_spec(self.module.split('.')[0]) is not None
+
+    def version(self):
+        if self.module is None:
+            # External command rather than a Python module
+            from .external import command_version
+            return command_version(self.name)
+        module = load_module(self.module.split('.')[0])
+        version = getattr(module, '__version__', None) or getattr(module, 'VersionBind', 'unknown')
+        return f'{version}+{self.revision}' if self.revision else version
+
+    def join(self, pages):
+        return self.separator.join(pages)
+
+
+BACKENDS = {
+    'fitz': Backend('fitz', 'fitz', fitz_pages, '\n\n', label='PyMuPDF'),
+    'pdfminer': Backend('pdfminer', 'pdfminer', pdfminer_pages, '', label='pdfminer.six'),
+    'pikepdf': Backend('pikepdf', 'pikepdf', pike_pages, '\n\n', revision='text2'),
+    'pypdf2': Backend('pypdf2', 'PyPDF2', pypdf2_pages, '\n\n'),
+    'tika': Backend('tika', 'tika', tika_pages, '', label='Apache Tika'),
+    'pdftotext': Backend('pdftotext', None, pdftotext_pages, '\n\n', label='pdftotext (poppler/xpdf)'),
+    'adobe': Backend('adobe', None, adobe_pages, '', label='Adobe Reader/Acrobat'),
+}
+
+
+def get_backend(name):
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown extractor: {name}") from None
+
+
+def list_backends():
+    """Describe every backend without importing any of them."""
+    return [{'name': name, 'label': backend.label, 'module': backend.module, 'available': backend.available()}
+            for name, backend in BACKENDS.items()]
+
+
+def extract(name, input_path, **options):
+    """Extract a document and return its pages and the joined raw text."""
+    backend = get_backend(name)
+    pages = list(backend.pages(input_path, **options))
+    return {
+        'backend': name,
+        'pages': pages,
+        'text': backend.join(pages),
+    }
+
+
+def extract_page_numbers(name, input_path, page_numbers, **options):
+    """Extract only ``page_numbers`` (0-based) and return ``{number: text}``."""
+    if name == 'tika':
+        raise ValueError("Tika does not support per-page extraction")
+    numbers = sorted(set(page_numbers))
+    if not numbers:
+        return {}
+    pages = get_backend(name).pages(input_path, page_numbers=numbers, **options)
+    return dict(zip(numbers, pages))
@@ -0,0 +1,215 @@
+"""Extract many PDFs with a bounded number of worker processes.
+
+Inputs can be files, directories (searched recursively for PDFs) or glob
+patterns. Each document gets its own output directory, a failure is recorded
+and the batch carries on. That includes a document that kills its worker
+process (a segfault or OOM kill): the pool is rebuilt and the unfinished
+documents are resubmitted. With ``resume`` each document is extracted with
+page-range checkpoints (``checkpoint.py``), so re-running an interrupted
+batch continues every unfinished document from its last committed page.
+Tika with a ``server`` option runs no worker processes: ``workers``
+documents at a time go to the server over one pooled session
+(``TikaClient.extract_many``) and each is written out as it arrives.
+"""
+import glob
+import os
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from .checkpoint import checkpoint_extract
+from .chunking import DEFAULT_MAX_SIZE
+from .incremental import incremental_extract
+from .streaming import stream_extract
+from .tika_client import get_client
+
+
+def expand_inputs(inputs):
+    """Resolve files, directories and globs to a sorted, de-duplicated list of PDFs."""
+    found = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            matches = [p for p in path.rglob('*') if p.suffix.lower() == '.pdf' and p.is_file()]
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = [Path(p) for p in glob.glob(item, recursive=True) if Path(p).is_file()]
+            if not matches:
+                raise FileNotFoundError(f"No PDF files match: {item}")
+        found.extend(sorted(matches))
+
+    seen = set()
+    unique = []
+    for path in found:
+        resolved = path.resolve()
+        if resolved not in seen:
+            seen.add(resolved)
+            unique.append(resolved)
+    return unique
+
+
+def output_dirs(files, output_root):
+    """Give each document its own directory, named after the file."""
+    dirs = {}
+    used = set()
+    for path in files:
+        name = re.sub(r'[^\w.-]+', '_', path.stem) or 'document'
+        candidate = name
+        n = 2
+        while candidate in used:
+            candidate = f'{name}-{n}'
+            n += 1
+        used.add(candidate)
+        dirs[path] = Path(output_root) / candidate
+    return dirs
+
+
+def process_document(backend, input_path, output_dir, max_size, incremental, options, resume=False):
+    start = time.perf_counter()
+    result = {'file': str(input_path), 'output_dir': str(output_dir), 'bytes': 0, 'pages': 0}
+    try:
+        result['bytes'] = os.path.getsize(input_path)
+        if resume:
+            stats = checkpoint_extract(backend, input_path, output_dir, max_size=max_size, resume=True, **options)
+            result.update(resumed=stats['resumed'], extracted=stats['extracted'])
+        else:
+            extract = incremental_extract if incremental else stream_extract
+            stats = extract(backend, input_path, output_dir, max_size=max_size, **options)
+        result.update(ok=True, pages=stats['pages'], chunks=stats['chunks'])
+    except Exception as e:
+        result.update(ok=False, error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def _run_pool(backend, files, dirs, workers, args, record):
+    """Process ``files`` in a pool and return those lost to a worker process that died.
+
+    At most ``workers`` documents are in flight, so a dead worker, which
+    breaks the whole pool, only loses those; the pool is rebuilt for the rest.
+    """
+    remaining = deque(files)
+    lost = []
+    while remaining:
+        with ProcessPoolExecutor(max_workers=min(workers, len(remaining))) as pool:
+            running = {}
+            broken = False
+            while (remaining or running) and not broken:
+                while remaining and len(running) < workers:
+                    path = remaining.popleft()
+                    try:
+                        running[pool.submit(process_document, backend, path, dirs[path], *args)] = path
+                    except BrokenProcessPool:
+                        remaining.appendleft(path)
+                        broken = True
+                        break
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = running.pop(future)
+                    try:
+                        record(future.result())
+                    except BrokenProcessPool:
+                        lost.append(path)
+                        broken = True
+            # Documents still in flight finished or went down with the pool
+            for future, path in running.items():
+                try:
+                    record(future.result())
+                except BrokenProcessPool:
+                    lost.append(path)
+    return lost
+
+
+def _lost_result(input_path, output_dir):
+    try:
+        size = os.path.getsize(input_path)
+    except OSError:
+        size = 0
+    return {'file': str(input_path), 'output_dir': str(output_dir), 'bytes': size, 'pages': 0, 'ok': False,
+            'error': "BrokenProcessPool: the worker process died while extracting this document",
+            'elapsed': 0.0}
+
+
+def _run_tika_server(files, dirs, max_size, options, workers, record):
+    client = get_client(options['server'], pool_size=workers)
+    write_options = {key: value for key, value in options.items() if key != 'server'}
+    lock = threading.Lock()
+
+    def handle(path, text, seconds):
+        start = time.perf_counter()
+        stats = stream_extract('tika', path, dirs[path], max_size=max_size, pages=[text], **write_options)
+        result = {'file': str(path), 'output_dir': str(dirs[path]), 'bytes': os.path.getsize(path), 'ok': True,
+                  'pages': stats['pages'], 'chunks': stats['chunks'],
+                  'elapsed': seconds + time.perf_counter() - start}
+        with lock:
+            record(result)
+
+    for path, _, error in client.extract_many(files, workers, handle):
+        if error is not None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0
+            record({'file': str(path), 'output_dir': str(dirs[path]), 'bytes': size, 'pages': 0, 'ok': False,
+                    'error': f"{type(error).__name__}: {error}",
+                    'traceback': ''.join(traceback.format_exception(error)), 'elapsed': 0.0})
+
+
+def run_batch(files, output_root, backend='fitz', workers=None, max_size=DEFAULT_MAX_SIZE,
+              incremental=False, on_result=None, resume=False, **options):
+    """Process ``files`` and return per-file results plus throughput totals."""
+    workers = workers or os.cpu_count() or 1
+    dirs = output_dirs(files, output_root)
+    results = []
+    start = time.perf_counter()
+
+    def record(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    if backend == 'tika' and options.get('server') and not (incremental or resume):
+        _run_tika_server(files, dirs, max_size, options, workers, record)
+    elif workers <= 1:
+        for path in files:
+            record(process_document(backend, path, dirs[path], max_size, incremental, options, resume))
+    else:
+        args = (max_size, incremental, options, resume)
+        lost = _run_pool(backend, files, dirs, workers, args, record)
+        if len(lost) > 1:
+            # Every document in flight is lost with the pool, so run each
+            # one on its own to find the one that killed it
+            lost = [path for path in lost for path in _run_pool(backend, [path], dirs, 1, args, record)]
+        for path in lost:
+            record(_lost_result(path, dirs[path]))
+
+    elapsed = time.perf_counter() - start
+    order = {str(path): i for i, path in enumerate(files)}
+    results.sort(key=lambda r: order[r['file']])
+    return summarize(files, results, elapsed)
+
+
+def summarize(files, results, elapsed):
+    """Return the per-file ``results`` with success counts and throughput totals."""
+    succeeded = [r for r in results if r['ok']]
+    pages = sum(r['pages'] for r in succeeded)
+    size_mb = sum(r['bytes'] for r in succeeded) / (1024 * 1024)
+    return {
+        'results': results,
+        'documents': len(files),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'pages': pages,
+        'megabytes': size_mb,
+        'elapsed': elapsed,
+        'pages_per_sec': pages / elapsed if elapsed else 0.0,
+        'mb_per_sec': size_mb / elapsed if elapsed else 0.0,
+    }
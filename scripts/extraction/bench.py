@@ -0,0 +1,168 @@
+"""Extractor and chunker benchmarks over the synthetic corpus.
+
+Each case extracts one report with one backend in a fresh ``spawn`` process,
+so peak RSS and import cost belong to that backend alone, then chunks the
+pages by characters and by tokens. Results are plain dicts::
+
+    {"backend": "fitz", "pages": 1000, "ok": true, "wall": 3.1,
+     "extract_elapsed": 2.9, "pages_per_sec": 344.8, "peak_rss_kb": 98304,
+     "output_chars": 2841230, "output_bytes": 2841230, "chunks": 29,
+     "chunk_elapsed": {"chars": 0.02, "tokens": 0.31}}
+
+``compare`` matches cases by backend and page count and reports the ones
+that got slower than a threshold, and baseline successes that failed or are
+missing now.
+"""
+import json
+import multiprocessing
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from . import backends
+from .chunking import chunk_pages, chunk_pages_by_tokens
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_BACKENDS = ('fitz', 'pdfminer', 'pikepdf', 'pypdf2', 'tika')
+DEFAULT_TIMEOUT = 1800
+DEFAULT_THRESHOLD = 10.0
+
+
+def _measure(name, input_path, conn):
+    result = {'ok': False}
+    try:
+        start = time.perf_counter()
+        backend = backends.get_backend(name)
+        pages = list(backend.pages(input_path))
+        extracted = time.perf_counter()
+        text = backend.join(pages)
+
+        chunk_elapsed = {}
+        for mode, chunker in (('chars', lambda: list(chunk_pages(pages, separator=backend.separator))),
+                              ('tokens', lambda: list(chunk_pages_by_tokens(pages, separator=backend.separator)))):
+            chunk_start = time.perf_counter()
+            chunks = chunker()
+            chunk_elapsed[mode] = time.perf_counter() - chunk_start
+            if mode == 'chars':
+                result['chunks'] = len(chunks)
+
+        result.update(
+            ok=True,
+            extract_elapsed=extracted - start,
+            output_chars=len(text),
+            output_bytes=len(text.encode('utf-8')),
+            chunk_elapsed=chunk_elapsed,
+        )
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    # ru_maxrss is in kilobytes on Linux; None where it cannot be measured
+    result['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    conn.send(result)
+    conn.close()
+
+
+def run_case(name, input_path, pages, timeout=DEFAULT_TIMEOUT):
+    """Benchmark backend ``name`` on ``input_path`` (a ``pages``-page report)."""
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(name, str(input_path), sender), daemon=True)
+    start = time.perf_counter()
+    process.start()
+    sender.close()
+    result = {'backend': name, 'pages': pages, 'file': str(input_path)}
+    if receiver.poll(timeout):
+        try:
+            result.update(receiver.recv())
+        except EOFError:
+            # The backend died (a segfault or OOM kill) before sending a result
+            process.join()
+            result.update(ok=False, error=f"backend process exited with code {process.exitcode}")
+    else:
+        result.update(ok=False, error=f"Timed out after {timeout}s")
+    result['wall'] = time.perf_counter() - start
+    process.join(5)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    receiver.close()
+    if result['ok']:
+        result['pages_per_sec'] = pages / result['extract_elapsed'] if result['extract_elapsed'] else None
+    return result
+
+
+def run_suite(corpus, names=DEFAULT_BACKENDS, timeout=DEFAULT_TIMEOUT, log=None):
+    """Run every backend in ``names`` over ``corpus`` (``{pages: path}``)."""
+    cases = []
+    for pages, path in sorted(corpus.items()):
+        for name in names:
+            result = run_case(name, path, pages, timeout)
+            if log:
+                if result['ok']:
+                    rss = 'unknown' if result['peak_rss_kb'] is None else f"{result['peak_rss_kb'] / 1024:.0f} MB"
+                    log(f"{name} {pages}p: {result['wall']:.2f}s wall, {result['pages_per_sec']:.1f} pages/sec, "
+                        f"{rss} peak RSS")
+                else:
+                    log(f"{name} {pages}p: skipped ({result['error']})")
+            cases.append(result)
+    return {
+        'version': RESULTS_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'cases': cases,
+    }
+
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+    if results.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Unsupported benchmark results version: {results.get('version')}")
+    return results
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, metric='wall'):
+    """Compare two result sets case by case.
+
+    Returns one row per case that succeeded in the baseline or runs in both,
+    with a ``status`` of ``ok`` or ``slower`` (``change``, a percentage
+    where positive is slower, exceeds ``threshold``) for cases that
+    succeeded in both, ``failed`` for a baseline success that failed or
+    timed out now, and ``missing`` for a baseline success absent from the
+    current run. ``regression`` is set for all but ``ok``.
+    """
+    before = {(case['backend'], case['pages']): case for case in baseline['cases'] if case.get('ok')}
+    rows = []
+    seen = set()
+    for case in current['cases']:
+        key = (case['backend'], case['pages'])
+        seen.add(key)
+        old = before.get(key)
+        if old is None or not old[metric]:
+            continue
+        row = {'backend': case['backend'], 'pages': case['pages'], 'baseline': old[metric]}
+        if case.get('ok'):
+            change = (case[metric] - old[metric]) / old[metric] * 100
+            row.update(current=case[metric], change=change, status='slower' if change > threshold else 'ok')
+        else:
+            row.update(current=None, change=None, status='failed', error=case.get('error'))
+        row['regression'] = row['status'] != 'ok'
+        rows.append(row)
+    for key, old in before.items():
+        if key not in seen:
+            rows.append({'backend': old['backend'], 'pages': old['pages'], 'baseline': old[metric],
+                         'current': None, 'change': None, 'status': 'missing', 'regression': True})
+    return rows
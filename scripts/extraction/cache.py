@@ -0,0 +1,188 @@
+"""Content-addressed on-disk cache of extraction results.
+
+Entries are keyed by the SHA-256 of the PDF, the backend name and version,
+and every extractor setting that affects the output (including the chunk
+size). A hit returns the stored pages and chunks without opening the PDF.
+The cache is capped in size and evicts least recently used entries first.
+Hit and miss counters are kept in the index so they survive restarts and are
+shared between worker processes.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from . import backends, mapped, metrics
+from .chunking import DEFAULT_MAX_SIZE, chunk_pages, chunk_pages_by_tokens
+from .tokens import get_estimator
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[2] / '.cache' / 'extraction'
+DEFAULT_MAX_BYTES = int(os.environ.get('EXTRACT_CACHE_MAX_MB', 1024)) * 1024 * 1024
+
+# Options that change how a backend runs but not what it produces
+RUNTIME_OPTIONS = {'keep_open', 'workers', 'timeout'}
+
+_file_hashes = {}
+
+
+def file_sha256(input_path):
+    """Hash a file, remembering the result for an unchanged path/size/mtime."""
+    stat = os.stat(input_path)
+    memo_key = (os.path.abspath(input_path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_hashes.get(memo_key)
+    if digest is None:
+        with mapped.map_view(input_path) as view:
+            digest = _file_hashes[memo_key] = hashlib.sha256(view).hexdigest()
+    return digest
+
+
+def output_settings(name, options):
+    settings = {k: v for k, v in options.items() if k not in RUNTIME_OPTIONS}
+    if name == 'pdfminer' and settings.get('laparams') is None:
+        settings['laparams'] = backends.PDFMINER_LAPARAMS
+    return settings
+
+
+class ExtractionCache:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root or os.environ.get('EXTRACT_CACHE_DIR') or DEFAULT_ROOT)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+        self._db = sqlite3.connect(str(self.root / 'index.sqlite3'), timeout=30, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._db.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    def key(self, name, input_path, options=None, max_size=DEFAULT_MAX_SIZE, max_tokens=None):
+        backend = backends.get_backend(name)
+        material = {
+            'pdf_sha256': file_sha256(input_path),
+            'backend': name,
+            'version': str(backend.version()),
+            'settings': output_settings(name, options or {}),
+            'max_size': max_size,
+        }
+        if max_tokens:
+            material.update(max_tokens=max_tokens, token_estimator=get_estimator().name)
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.root / key[:2] / f'{key}.json'
+
+    def _count(self, name):
+        self._db.execute(
+            'INSERT INTO counters (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1', (name,)
+        )
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            self._count('misses')
+            metrics.CACHE_REQUESTS.inc(result='miss')
+            return None
+        self.hits += 1
+        self._count('hits')
+        metrics.CACHE_REQUESTS.inc(result='hit')
+        self._db.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+        return entry
+
+    def put(self, key, entry):
+        path = self._path(key)
+        os.makedirs(path.parent, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._db.execute(
+            'INSERT OR REPLACE INTO entries (key, size, last_access) VALUES (?, ?, ?)',
+            (key, path.stat().st_size, time.time())
+        )
+        self.evict()
+
+    def evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute('SELECT key, size FROM entries ORDER BY last_access').fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            total -= size
+
+    def stats(self):
+        counters = dict(self._db.execute('SELECT name, value FROM counters').fetchall())
+        entries, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'session_hits': self.hits,
+            'session_misses': self.misses,
+        }
+
+    def clear(self):
+        for key, in self._db.execute('SELECT key FROM entries').fetchall():
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        self._db.execute('DELETE FROM entries')
+        self._db.execute('DELETE FROM counters')
+
+    def close(self):
+        self._db.close()
+
+
+def cached_extract(name, input_path, cache=None, max_size=DEFAULT_MAX_SIZE, max_tokens=None, **options):
+    """Return pages, text and chunks for a document, using ``cache`` when given.
+
+    With ``max_tokens`` the chunks are packed to that token budget and the
+    entry also has ``chunk_tokens``, the estimated tokens of each chunk.
+    """
+    backend = backends.get_backend(name)
+    key = None
+    if cache is not None:
+        key = cache.key(name, input_path, options, max_size, max_tokens)
+        entry = cache.get(key)
+        if entry is not None:
+            entry['text'] = backend.join(entry['pages'])
+            entry['cached'] = True
+            return entry
+
+    with metrics.stage(name, 'extract'):
+        pages = list(metrics.instrument_pages(name, backend.pages(input_path, **options)))
+    entry = {'backend': name, 'pages': pages}
+    with metrics.stage(name, 'chunk'):
+        if max_tokens:
+            chunks = list(chunk_pages_by_tokens(pages, max_tokens, backend.separator))
+            entry['chunks'] = [chunk for chunk, _ in chunks]
+            entry['chunk_tokens'] = [tokens for _, tokens in chunks]
+        else:
+            entry['chunks'] = list(chunk_pages(pages, max_size, backend.separator))
+    if cache is not None:
+        cache.put(key, entry)
+    entry['text'] = backend.join(pages)
+    entry['cached'] = False
+    return entry
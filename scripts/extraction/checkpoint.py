@@ -0,0 +1,175 @@
+"""Resumable extraction with page-range checkpoints.
+
+Pages are extracted in ranges of ``range_pages``. Each finished range is
+committed to ``raw/checkpoint/pages-SSSSSS-EEEEEE.json`` by writing a
+temporary file, syncing it and renaming it into place, so a crash or kill
+leaves only whole ranges behind. ``checkpoint.json`` records the PDF hash,
+backend, backend version and output settings; a resumed run only reuses
+ranges when all of them match, and then continues from the first page after
+the last committed range.
+
+Once every range is committed the raw text and chunks are written in one
+streaming pass, exactly as ``stream_extract`` would, and the ranges are
+removed. ``checkpoint.json`` is then rewritten with ``done: true``, the chunk
+settings, the output stats and the raw text's SHA-256, so resuming a
+finished document skips it as long as its file, settings and raw text are
+unchanged. Ranges can be extracted in parallel with ``workers``;
+they are still committed in page order.
+"""
+import json
+import os
+import re
+import shutil
+import time
+from functools import partial
+from pathlib import Path
+
+from . import backends, mapped
+from .cache import file_sha256, output_settings
+from .chunking import DEFAULT_MAX_SIZE
+from .parallel import PAGE_COUNTS, run_shards
+from .streaming import ChunkWriter, stream_to_files
+
+CHECKPOINT_VERSION = 1
+DEFAULT_RANGE_PAGES = 50
+RANGE_FILE = re.compile(r'pages-(\d{6})-(\d{6})\.json$')
+
+
+def checkpoint_dir(output_dir):
+    return Path(output_dir) / 'raw' / 'checkpoint'
+
+
+def _sync_dir(path):
+    # Makes a rename durable on POSIX; directories cannot be opened on Windows
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _write_durably(path, data):
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _sync_dir(path.parent)
+
+
+def committed_ranges(directory):
+    """Return the committed ``(start, stop)`` ranges that run contiguously from page 0."""
+    found = {}
+    for path in Path(directory).glob('pages-*.json'):
+        match = RANGE_FILE.match(path.name)
+        if match:
+            found[int(match.group(1))] = int(match.group(2))
+    ranges = []
+    start = 0
+    while start in found:
+        ranges.append((start, found[start]))
+        start = found[start]
+    return ranges
+
+
+def _range_path(directory, start, stop):
+    return Path(directory) / f'pages-{start:06d}-{stop:06d}.json'
+
+
+def _extract_range(name, input_path, start, stop, options=None):
+    backend = backends.get_backend(name)
+    return list(backend.pages(input_path, page_numbers=range(start, stop), **(options or {})))
+
+
+def _committed_pages(directory, ranges):
+    for start, stop in ranges:
+        with open(_range_path(directory, start, stop), 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def checkpoint_extract(name, input_path, output_dir, max_size=DEFAULT_MAX_SIZE, log=None, resume=False,
+                       range_pages=DEFAULT_RANGE_PAGES, max_tokens=None, on_commit=None, **options):
+    """Extract ``input_path`` into ``output_dir``, committing each page range as it finishes.
+
+    With ``resume`` the ranges committed by an earlier, interrupted run of the
+    same file and settings are kept; otherwise any old checkpoint is discarded.
+    ``on_commit(stop, page_count)`` is called after each range is committed.
+    """
+    if name not in PAGE_COUNTS:
+        raise ValueError(f"Checkpointing needs a backend that extracts page ranges: {', '.join(PAGE_COUNTS)}")
+    backend = backends.get_backend(name)
+    output_dir = Path(output_dir)
+    llm_input_dir = output_dir / 'llm-input'
+    raw_dir = output_dir / 'raw'
+    text_path = raw_dir / 'extracted-text.txt'
+    directory = checkpoint_dir(output_dir)
+    workers = options.pop('workers', 1) or 1
+
+    start_time = time.perf_counter()
+    with mapped.shared(input_path):
+        count = PAGE_COUNTS[name](str(input_path))
+        # Round-tripped so it compares equal to what a resumed run reads back
+        state = json.loads(json.dumps({
+            'checkpoint_version': CHECKPOINT_VERSION,
+            'sha256': file_sha256(input_path),
+            'backend': name,
+            'backend_version': str(backend.version()),
+            'settings': output_settings(name, options),
+            'pages': count,
+        }))
+        done = dict(state, done=True, output={'max_size': max_size, 'max_tokens': max_tokens})
+        ranges = []
+        if resume:
+            try:
+                with open(directory / 'checkpoint.json', 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+            except (FileNotFoundError, ValueError):
+                previous = None
+            if previous and previous.get('done') and \
+                    {key: value for key, value in previous.items() if key not in ('stats', 'text_sha256')} == done \
+                    and text_path.exists() and file_sha256(text_path) == previous.get('text_sha256'):
+                if log:
+                    log(f"Already extracted all {count} pages, skipping")
+                stats = dict(previous['stats'], resumed=count, extracted=0,
+                             elapsed=time.perf_counter() - start_time, text_path=str(text_path),
+                             llm_input_dir=str(llm_input_dir))
+                return stats
+            if previous == state:
+                ranges = committed_ranges(directory)
+            elif previous is not None and log:
+                log("Checkpoint is for a different file or settings, starting over")
+        if not ranges:
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+            _write_durably(directory / 'checkpoint.json', state)
+        resumed = ranges[-1][1] if ranges else 0
+        if log and resumed:
+            log(f"Resuming after page {resumed} of {count}")
+
+        todo = [(start, min(start + range_pages, count)) for start in range(resumed, count, range_pages)]
+        job = partial(_extract_range, name, options=options)
+        for (start, stop), pages in zip(todo, run_shards(job, str(input_path), todo, workers)):
+            _write_durably(_range_path(directory, start, stop), pages)
+            ranges.append((start, stop))
+            if log:
+                log(f"Committed pages {start + 1}-{stop} of {count}")
+            if on_commit:
+                on_commit(stop, count)
+
+    os.makedirs(llm_input_dir, exist_ok=True)
+    writer = ChunkWriter(llm_input_dir)
+    stats = stream_to_files(_committed_pages(directory, ranges), text_path, writer, backend.separator, max_size,
+                            max_tokens=max_tokens)
+    if max_tokens:
+        writer.write_metadata(raw_dir / 'chunks.json', max_tokens)
+    # Only the marker is kept, so resuming the finished document skips it
+    _write_durably(directory / 'checkpoint.json', dict(done, stats=stats, text_sha256=file_sha256(text_path)))
+    for path in directory.iterdir():
+        if path.name != 'checkpoint.json':
+            path.unlink()
+
+    stats.update(resumed=resumed, extracted=count - resumed, elapsed=time.perf_counter() - start_time,
+                 text_path=str(text_path), llm_input_dir=str(llm_input_dir))
+    return stats
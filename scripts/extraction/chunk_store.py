@@ -0,0 +1,183 @@
+"""Single-file chunk store.
+
+Instead of one ``llm-input/chunk-NNN.txt`` file per chunk, chunks are
+appended in one sequential pass to ``chunks/chunks.txt`` (UTF-8, a blank line
+between chunks) and described by ``chunks/manifest.json``::
+
+    {"version": 1, "chunks": [
+        {"id": 1, "offset": 0, "length": 99812, "pages": [0, 41],
+         "chars": 99640, "sha256": "..."}, ...]}
+
+``offset`` and ``length`` are in bytes, ``pages`` is the 0-based span of
+pages the chunk's text came from. Stores chunked to a token budget also
+record each chunk's ``tokens``. ``ChunkStore`` memory-maps the blob and
+hands out chunks as zero-copy slices; ``export_files`` writes the old
+directory layout for consumers that still read ``chunk-NNN.txt``.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from . import mapped
+from .chunking import SEPARATOR
+
+STORE_VERSION = 1
+BLOB_NAME = 'chunks.txt'
+MANIFEST_NAME = 'manifest.json'
+
+
+class ChunkStoreWriter:
+    """Append chunks to the blob and write the manifest on ``close``.
+
+    Has the same ``write``/``count``/``chars`` interface as
+    ``streaming.ChunkWriter``. The store only replaces the previous one once
+    it is complete, and the old manifest is removed before the blob is
+    swapped, so a reader sees the old store, no store or the new one but
+    never one file from each.
+    """
+
+    def __init__(self, store_dir, metadata=None):
+        self.store_dir = Path(store_dir)
+        os.makedirs(self.store_dir, exist_ok=True)
+        self.blob_path = self.store_dir / BLOB_NAME
+        self._tmp_path = self.blob_path.with_name(BLOB_NAME + '.tmp')
+        self._blob = open(self._tmp_path, 'wb')
+        self._separator = SEPARATOR.encode('utf-8')
+        self.metadata = dict(metadata or {})
+        self.entries = []
+        self.offset = 0
+        self.count = 0
+        self.chars = 0
+        self.tokens = 0
+
+    def write(self, chunk, pages=None, tokens=None):
+        data = chunk.encode('utf-8')
+        if self.entries:
+            self._blob.write(self._separator)
+            self.offset += len(self._separator)
+        self._blob.write(data)
+        self.count += 1
+        self.chars += len(chunk)
+        entry = {
+            'id': self.count,
+            'offset': self.offset,
+            'length': len(data),
+            'pages': list(pages) if pages and pages[0] is not None else None,
+            'chars': len(chunk),
+            'sha256': hashlib.sha256(data).hexdigest(),
+        }
+        if tokens is not None:
+            entry['tokens'] = tokens
+            self.tokens += tokens
+        self.entries.append(entry)
+        self.offset += len(data)
+
+    def close(self):
+        if self._blob.closed:
+            return
+        self._blob.close()
+        manifest = dict(self.metadata, version=STORE_VERSION, blob=BLOB_NAME,
+                        bytes=self.offset, chars=self.chars, chunks=self.entries)
+        if self.tokens:
+            manifest['tokens'] = self.tokens
+        manifest_path = self.store_dir / MANIFEST_NAME
+        tmp_manifest = manifest_path.with_name(MANIFEST_NAME + '.tmp')
+        with open(tmp_manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        if manifest_path.exists():
+            os.remove(manifest_path)
+        os.replace(self._tmp_path, self.blob_path)
+        os.replace(tmp_manifest, manifest_path)
+
+    def abort(self):
+        self._blob.close()
+        if self._tmp_path.exists():
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_store(chunks, store_dir, metadata=None):
+    """Write an iterable of chunks (or ``(chunk, first, last)`` spans) as a store."""
+    with ChunkStoreWriter(store_dir, metadata) as writer:
+        for chunk in chunks:
+            if isinstance(chunk, tuple):
+                writer.write(chunk[0], chunk[1:])
+            else:
+                writer.write(chunk)
+    return writer
+
+
+class ChunkStore:
+    """Read a chunk store through a memory map of its blob."""
+
+    def __init__(self, store_dir):
+        self.store_dir = Path(store_dir)
+        with open(self.store_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported chunk store version: {self.manifest.get('version')}")
+        self.entries = self.manifest['chunks']
+        self._view = mapped.map_view(self.store_dir / self.manifest['blob'])
+        size = len(self._view)
+        if size != self.manifest['bytes']:
+            # A reader that opened the old manifest just before the blob was replaced
+            self._view.release()
+            raise ValueError(f"Chunk store blob has {size} bytes but its manifest expects "
+                             f"{self.manifest['bytes']}; the store was rewritten while it was opened")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        for i in range(len(self.entries)):
+            yield self.text(i)
+
+    def entry(self, index):
+        return self.entries[index]
+
+    def data(self, index):
+        """Return chunk ``index`` (0-based) as a zero-copy memoryview of UTF-8 bytes."""
+        entry = self.entries[index]
+        return self._view[entry['offset']:entry['offset'] + entry['length']]
+
+    def text(self, index):
+        return str(self.data(index), 'utf-8')
+
+    def for_page(self, page):
+        """Return the indexes of chunks whose text includes ``page``."""
+        return [i for i, entry in enumerate(self.entries)
+                if entry['pages'] and entry['pages'][0] <= page <= entry['pages'][1]]
+
+    def verify(self):
+        """Return the ids of chunks whose bytes no longer match their hash."""
+        return [entry['id'] for i, entry in enumerate(self.entries)
+                if hashlib.sha256(self.data(i)).hexdigest() != entry['sha256']]
+
+    def export_files(self, llm_input_dir):
+        """Write ``chunk-NNN.txt`` files, replacing any left from an earlier run."""
+        llm_input_dir = Path(llm_input_dir)
+        os.makedirs(llm_input_dir, exist_ok=True)
+        for stale in llm_input_dir.glob('chunk-*.txt'):
+            os.remove(stale)
+        for i, entry in enumerate(self.entries):
+            with open(llm_input_dir / f"chunk-{entry['id']:03d}.txt", 'w', encoding='utf-8') as f:
+                f.write(self.text(i))
+        return len(self.entries)
+
+    def close(self):
+        self._view.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,194 @@
+"""Paragraph chunking shared by the extract scripts.
+
+Chunks are built from a list of paragraphs and joined once, so the cost is
+linear in the size of the text. ``iter_paragraphs`` splits a stream of text
+pieces (for example pages) without joining them into one string first.
+
+The output matches the original per-script ``chunk_text``: paragraphs are
+separated by blank lines, stripped, and packed into chunks of at most
+``max_size`` characters joined with a blank line. A single paragraph longer
+than ``max_size`` becomes its own chunk.
+
+``iter_token_chunk_spans`` packs the same paragraphs to a token budget
+instead (see ``tokens.py``) and reports each chunk's token count.
+"""
+import re
+
+from .tokens import DEFAULT_MAX_TOKENS, get_estimator
+
+DEFAULT_MAX_SIZE = 100000
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+SEPARATOR = '\n\n'
+SEPARATOR_TOKENS = 1
+TOKEN_BATCH = 256
+
+
+def _is_break(whitespace):
+    # A whitespace run splits paragraphs when it holds at least two newlines
+    return whitespace.count('\n') >= 2
+
+
+def iter_paragraph_spans(pieces):
+    """Yield ``(paragraph, first, last)`` for each stripped, non-empty paragraph.
+
+    ``first`` and ``last`` are the indexes of the pieces the paragraph's text
+    starts and ends in. Splitting the concatenation of ``pieces`` with
+    ``\\n\\s*\\n`` gives the same paragraphs, including breaks that
+    straddle two pieces.
+    """
+    pending = []  # text of the current paragraph
+    gap = []  # whitespace seen since the last non-whitespace character
+    first = last = None
+
+    for index, piece in enumerate(pieces):
+        body = piece.strip()
+        if not body:
+            gap.append(piece)
+            continue
+
+        lead = piece[:len(piece) - len(piece.lstrip())]
+        trail = piece[len(lead) + len(body):]
+
+        if pending:
+            boundary = ''.join(gap) + lead
+            if _is_break(boundary):
+                yield ''.join(pending), first, last
+                pending = []
+                first = None
+            else:
+                pending.append(boundary)
+
+        parts = PARAGRAPH_BREAK.split(body)
+        for part in parts[:-1]:
+            pending.append(part)
+            paragraph = ''.join(pending).strip()
+            if paragraph:
+                yield paragraph, index if first is None else first, index
+            pending = []
+            first = None
+        last_part = parts[-1].strip()
+        if last_part:
+            if pending:
+                pending.append(parts[-1].rstrip())
+            else:
+                pending.append(last_part)
+                first = index
+            last = index
+        gap = [trail]
+
+    if pending:
+        paragraph = ''.join(pending).strip()
+        if paragraph:
+            yield paragraph, first, last
+
+
+def iter_paragraphs(pieces):
+    """Yield stripped, non-empty paragraphs from an iterable of text pieces."""
+    for paragraph, _, _ in iter_paragraph_spans(pieces):
+        yield paragraph
+
+
+def iter_chunk_spans(paragraph_spans, max_size=DEFAULT_MAX_SIZE):
+    """Pack ``(paragraph, first, last)`` items into ``(chunk, first, last)``.
+
+    Chunks hold at most ``max_size`` characters; empty paragraphs are
+    skipped.
+    """
+    parts = []
+    size = 0
+    first = last = None
+    for paragraph, start, stop in paragraph_spans:
+        if not paragraph:
+            continue
+        if parts and size + len(paragraph) + len(SEPARATOR) > max_size:
+            yield SEPARATOR.join(parts), first, last
+            parts = []
+            size = 0
+        if parts:
+            size += len(SEPARATOR)
+        else:
+            first = start
+        parts.append(paragraph)
+        size += len(paragraph)
+        last = stop
+
+    if parts:
+        yield SEPARATOR.join(parts), first, last
+
+
+def iter_chunks(paragraphs, max_size=DEFAULT_MAX_SIZE):
+    """Pack paragraphs into chunks of at most ``max_size`` characters.
+
+    Empty paragraphs are skipped.
+    """
+    for chunk, _, _ in iter_chunk_spans(((paragraph, None, None) for paragraph in paragraphs), max_size):
+        yield chunk
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_token_chunk_spans(paragraph_spans, max_tokens=DEFAULT_MAX_TOKENS, estimator=None):
+    """Pack ``(paragraph, first, last)`` items into ``(chunk, first, last, tokens)``.
+
+    Chunks hold at most ``max_tokens`` estimated tokens, counting each
+    separator as ``SEPARATOR_TOKENS``. Paragraphs are counted ``TOKEN_BATCH``
+    at a time; a paragraph over the budget becomes its own chunk.
+    """
+    estimator = estimator or get_estimator()
+    parts = []
+    tokens = 0
+    first = last = None
+    for batch in _batches((span for span in paragraph_spans if span[0]), TOKEN_BATCH):
+        counts = estimator.count_batch([paragraph for paragraph, _, _ in batch])
+        for (paragraph, start, stop), count in zip(batch, counts):
+            if parts and tokens + SEPARATOR_TOKENS + count > max_tokens:
+                yield SEPARATOR.join(parts), first, last, tokens
+                parts = []
+                tokens = 0
+            if parts:
+                tokens += SEPARATOR_TOKENS
+            else:
+                first = start
+            parts.append(paragraph)
+            tokens += count
+            last = stop
+
+    if parts:
+        yield SEPARATOR.join(parts), first, last, tokens
+
+
+def chunk_text(text, max_size=DEFAULT_MAX_SIZE):
+    return list(iter_chunks(iter_paragraphs([text]), max_size))
+
+
+def chunk_pages(pages, max_size=DEFAULT_MAX_SIZE, separator=SEPARATOR):
+    """Chunk pages as if they had been joined with ``separator`` first."""
+    def pieces():
+        for i, page in enumerate(pages):
+            if i:
+                yield separator
+            yield page
+
+    return iter_chunks(iter_paragraphs(pieces()), max_size)
+
+
+def chunk_pages_by_tokens(pages, max_tokens=DEFAULT_MAX_TOKENS, separator=SEPARATOR, estimator=None):
+    """Yield ``(chunk, tokens)`` for pages joined with ``separator``, packed to ``max_tokens``."""
+    def pieces():
+        for i, page in enumerate(pages):
+            if i:
+                yield separator
+            yield page
+
+    spans = iter_token_chunk_spans(iter_paragraph_spans(pieces()), max_tokens, estimator)
+    for chunk, _, _, tokens in spans:
+        yield chunk, tokens
@@ -0,0 +1,152 @@
+"""Synthetic OFW message reports for benchmarks.
+
+``generate_report`` writes a PDF laid out like an OurFamilyWizard message
+report: the report header, ``Message N of M`` markers, ``Sent``/``From``/
+``To``/``Subject`` headers, threads of replies quoting earlier messages with
+``On ... wrote:`` blocks, and ``Page N of M`` footers. Dates move forward
+through the report. Output depends only on ``pages`` and ``seed``, so the same
+corpus can be rebuilt anywhere instead of checking in large fixtures.
+"""
+import os
+import random
+import textwrap
+from datetime import datetime, timedelta
+from pathlib import Path
+
+LINES_PER_PAGE = 52
+LINE_WIDTH = 95
+FONT_SIZE = 9
+LINE_HEIGHT = 13
+PARENTS = ('Robert Moyer', 'Christine Moyer')
+CHILDREN = ('Adrian Moyer', 'Max Moyer')
+SUBJECTS = (
+    'Pickup', 'Drop Off', 'Condo Sale', 'Expenses', 'School conference', 'Holiday schedule',
+    'Soccer practice', 'Doctor appointment', 'Monthly transfer', 'Weekend plans', 'Adrian', 'Max',
+)
+SENTENCES = (
+    "I can pick the kids up from school at 3:15 PM on Friday.",
+    "Please confirm the exchange time for this weekend.",
+    "Max has a dentist appointment on {date} at 10:30 AM.",
+    "I paid the invoice and attached the receipt for reimbursement.",
+    "Adrian left his soccer cleats at my house, I will drop them off.",
+    "Can we swap weekends so I can take them to my parents' house?",
+    "The school sent a note about the field trip on {date}.",
+    "I did not see the transfer in my account yet.",
+    "Thanks, that works for me.",
+    "Let's discuss this in mediation rather than over messages.",
+    "The counselor recommended we keep the same routine during the holidays.",
+    "I will be about 20 minutes late because of traffic on 405.",
+    "Please send me the updated calendar when you get a chance.",
+    "Ok. Noting you want to spend the time in mediation to discuss the interpretation.",
+)
+FORMAT = '%m/%d/%Y at %I:%M %p'
+
+
+def _body(rng, when):
+    sentences = []
+    for _ in range(rng.randint(1, 8)):
+        date = (when + timedelta(days=rng.randint(1, 20))).strftime('%m/%d/%Y')
+        sentences.append(rng.choice(SENTENCES).format(date=date))
+    lines = []
+    for paragraph in range(rng.randint(1, 3)):
+        text = ' '.join(sentences[paragraph::3]) or sentences[0]
+        lines.extend(textwrap.wrap(text, LINE_WIDTH))
+    return lines
+
+
+def _message_lines(rng, number, when, thread):
+    sender, recipient = rng.sample(PARENTS, 2)
+    viewed = when + timedelta(minutes=rng.randint(1, 600))
+    subject = thread[-1][3] if thread and rng.random() < 0.7 else rng.choice(SUBJECTS)
+    reply = bool(thread) and subject == thread[-1][3]
+    lines = [
+        ('marker', number),
+        f'Sent: {when.strftime(FORMAT)}',
+        f'From: {sender}',
+        f'To: {recipient} (First Viewed: {viewed.strftime(FORMAT)})',
+        f'Subject: {"Re: " if reply else ""}{subject}',
+    ]
+    body = _body(rng, when)
+    lines.extend(body)
+    if reply:
+        # Quote the earlier messages of the thread, newest first
+        for quoted_when, quoted_sender, quoted_recipient, quoted_subject, quoted_body in reversed(thread[-4:]):
+            lines.append(f'On {quoted_when.strftime(FORMAT)}, {quoted_sender} wrote:')
+            lines.append(f'To: {quoted_recipient} (First Viewed: {quoted_when.strftime(FORMAT)})')
+            lines.append(f'Subject: {quoted_subject}')
+            lines.extend(quoted_body)
+        thread.append((when, sender, recipient, subject, body))
+    else:
+        thread[:] = [(when, sender, recipient, subject, body)]
+    return lines
+
+
+def report_lines(pages, seed=0):
+    """Return the lines that fill exactly ``pages`` pages.
+
+    Message markers and the message count are ``('marker', n)`` and
+    ``('count', None)`` tuples, since the total is only known once the
+    report is cut to length.
+    """
+    rng = random.Random(seed)
+    when = datetime(2024, 12, 1, 1, 2)
+    lines = [
+        'OurFamilyWizard',
+        'Message Report',
+        'Generated: placeholder',
+        ('count', None),
+        'Timezone: America/Los_Angeles',
+        f'Parents: {", ".join(PARENTS)}',
+        f'Child(ren): {", ".join(CHILDREN)}',
+        'Third Party:',
+    ]
+    target = pages * LINES_PER_PAGE
+    thread = []
+    number = 0
+    while len(lines) < target:
+        number += 1
+        when += timedelta(minutes=rng.randint(5, 900))
+        lines.extend(_message_lines(rng, number, when, thread))
+    lines[2] = f'Generated: {(when + timedelta(days=1)).strftime(FORMAT)} by {PARENTS[0]}'
+    return lines[:target]
+
+
+def generate_report(path, pages, seed=0):
+    """Write a ``pages``-page synthetic report to ``path`` and return its message count."""
+    import fitz
+
+    lines = report_lines(pages, seed)
+    markers = sum(1 for line in lines if isinstance(line, tuple) and line[0] == 'marker')
+    tmp_path = f'{path}.tmp'
+    pdf = fitz.open()
+    for page_number in range(pages):
+        text = []
+        for line in lines[page_number * LINES_PER_PAGE:(page_number + 1) * LINES_PER_PAGE]:
+            if isinstance(line, tuple):
+                line = f'Message {line[1]} of {markers}' if line[0] == 'marker' else f'Number of messages: {markers}'
+            text.append(line)
+        page = pdf.new_page()
+        page.insert_text((54, 54), '\n'.join(text), fontsize=FONT_SIZE, lineheight=LINE_HEIGHT / FONT_SIZE)
+        page.insert_text((270, 770), f'Page {page_number + 1} of {pages}', fontsize=FONT_SIZE)
+    pdf.save(tmp_path, garbage=1, deflate=True)
+    pdf.close()
+    os.replace(tmp_path, path)
+    return markers
+
+
+def corpus_path(corpus_dir, pages, seed=0):
+    return Path(corpus_dir) / f'ofw-synthetic-{pages}p-seed{seed}.pdf'
+
+
+def ensure_corpus(corpus_dir, sizes, seed=0, log=None):
+    """Generate the reports for ``sizes`` (page counts) that are not on disk yet."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    paths = {}
+    for pages in sizes:
+        path = corpus_path(corpus_dir, pages, seed)
+        if not path.exists():
+            if log:
+                log(f"Generating {pages}-page synthetic report: {path}")
+            generate_report(path, pages, seed)
+        paths[pages] = path
+    return paths
@@ -0,0 +1,336 @@
+"""Replace near-duplicate messages with references before chunking.
+
+OFW replies quote the message they answer, and every report repeats the
+quotes of the reports before it, so much of the text sent to the LLM has
+been seen already. ``dedup_pages`` splits a report into units (each
+message's own text and each quoted reply, or paragraphs for other
+documents), shingles every unit into word 5-grams and computes a MinHash
+signature for it. LSH banding finds candidate units with a similar
+signature, both earlier in the same document and in ``DedupIndex``, an
+on-disk index of previously processed documents. A unit whose estimated
+Jaccard similarity with a candidate is at least ``threshold`` is replaced
+by a reference such as::
+
+    [Duplicate of Message 12 above, 1,204 chars omitted]
+
+The "On ... wrote:" line and the To/Subject lines of a quoted reply are
+kept, so the LLM still sees who wrote what and when.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import struct
+import time
+import zlib
+from collections import defaultdict
+from pathlib import Path
+
+from .messages import segment
+from .tokens import get_estimator
+
+MIN_CHARS = 200
+SHINGLE_WORDS = 5
+PERMUTATIONS = 64
+BANDS = 16  # 4 rows per band: pairs at 0.8 similarity collide in a band 99.9% of the time
+THRESHOLD = 0.8
+SEED = 1
+MERSENNE_PRIME = (1 << 61) - 1
+
+WORD = re.compile(r'\w+')
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+QUOTE = re.compile(r'^[ \t]*On \d{1,2}/\d{1,2}/\d{4} at \d{1,2}:\d{2} [AP]M, [^\n]* wrote:[ \t]*$', re.MULTILINE)
+# Header lines of a quoted reply, with the value on the label's line or the next one
+QUOTE_HEADER = re.compile(r'(?:[ \t]*(?:Sent|From|To|Subject):(?:[ \t]*\S[^\n]*|[ \t]*\n[^\n]*)(?:\n|$))*')
+
+
+class MinHasher:
+    """MinHash signatures of word shingles, using ``(a * x + b) mod p`` permutations."""
+
+    def __init__(self, permutations=PERMUTATIONS, shingle_words=SHINGLE_WORDS, seed=SEED):
+        rng = random.Random(seed)
+        self._permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+                              for _ in range(permutations)]
+        self.shingle_words = shingle_words
+        self.name = f'minhash{permutations}-w{shingle_words}-s{seed}'
+        self._signatures = {}
+
+    def shingles(self, text):
+        words = WORD.findall(text.lower())
+        size = self.shingle_words
+        return {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'))
+                for i in range(max(1, len(words) - size + 1))}
+
+    def signature(self, text):
+        shingles = frozenset(self.shingles(text))
+        # Quotes repeated word for word are hashed once
+        signature = self._signatures.get(shingles)
+        if signature is None:
+            signature = self._signatures[shingles] = tuple(
+                min((a * h + b) % MERSENNE_PRIME for h in shingles) for a, b in self._permutations)
+        return signature
+
+
+def similarity(a, b):
+    """Estimate the Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def band_keys(signature, bands=BANDS):
+    """Return one stable 63-bit bucket key per LSH band."""
+    rows = len(signature) // bands
+    keys = []
+    for band in range(bands):
+        packed = struct.pack(f'<H{rows}Q', band, *signature[band * rows:(band + 1) * rows])
+        keys.append(int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), 'little') >> 1)
+    return keys
+
+
+def _strip_span(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+def iter_units(text, messages=None):
+    """Yield ``(label, spans)`` for each unit of ``text``.
+
+    With ``messages`` (from ``messages.segment``) a unit is the new text of a
+    message or the body of one reply it quotes; otherwise it is a paragraph.
+    ``spans`` are ``(start, end)`` character offsets into ``text``.
+    """
+    if not messages:
+        start = 0
+        for number, match in enumerate(PARAGRAPH_BREAK.finditer(text + '\n\n'), 1):
+            span = _strip_span(text, start, match.start())
+            start = match.end()
+            if span:
+                yield f'paragraph {number}', [span]
+        return
+
+    for message in messages:
+        label = f"Message {message['number']}"
+        spans = []
+        for start, end in message['body']:
+            position = start
+            for quote in QUOTE.finditer(text, start, end):
+                span = _strip_span(text, position, quote.start())
+                if span:
+                    spans.append(span)
+                if spans:
+                    yield label, spans
+                label = f"the reply quoted in Message {message['number']}"
+                spans = []
+                position = QUOTE_HEADER.match(text, min(quote.end() + 1, end), end).end()
+            span = _strip_span(text, position, end)
+            if span:
+                spans.append(span)
+        if spans:
+            yield label, spans
+
+
+class DedupIndex:
+    """Units of previously processed documents, stored with their LSH buckets.
+
+    The index lives next to the extraction cache, in ``dedup.sqlite3`` under
+    ``EXTRACT_CACHE_DIR`` (``.cache/extraction`` by default).
+    """
+
+    def __init__(self, path=None, hasher=None):
+        if path is None:
+            from .cache import DEFAULT_ROOT
+            path = Path(os.environ.get('EXTRACT_CACHE_DIR') or DEFAULT_ROOT) / 'dedup.sqlite3'
+        self.path = Path(path)
+        self.hasher = hasher or MinHasher()
+        os.makedirs(self.path.parent, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' doc TEXT PRIMARY KEY, name TEXT NOT NULL, added REAL NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS units ('
+            ' id INTEGER PRIMARY KEY, doc TEXT NOT NULL, label TEXT NOT NULL,'
+            ' chars INTEGER NOT NULL, signature BLOB NOT NULL)'
+        )
+        self._db.execute('CREATE TABLE IF NOT EXISTS buckets (key INTEGER NOT NULL, unit INTEGER NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS buckets_key ON buckets (key)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS units_doc ON units (doc)')
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'hasher'").fetchone()
+        if row is None or row[0] != self.hasher.name:
+            # Signatures from different permutations cannot be compared
+            self.clear()
+            self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('hasher', ?)",
+                             (self.hasher.name,))
+
+    def candidates(self, keys, exclude_doc=None):
+        """Return ``(doc name, label, signature)`` for units sharing a bucket with ``keys``."""
+        placeholders = ','.join('?' * len(keys))
+        rows = self._db.execute(
+            'SELECT DISTINCT documents.name, units.label, units.signature FROM buckets'
+            ' JOIN units ON units.id = buckets.unit JOIN documents ON documents.doc = units.doc'
+            f' WHERE buckets.key IN ({placeholders}) AND units.doc IS NOT ?',
+            (*keys, exclude_doc)
+        ).fetchall()
+        return [(name, label, struct.unpack(f'<{len(blob) // 8}Q', blob)) for name, label, blob in rows]
+
+    def add(self, doc, name, units):
+        """Replace the units stored for ``doc`` with ``(label, chars, signature)`` tuples."""
+        self._db.execute('BEGIN')
+        try:
+            self._remove(doc)
+            self._db.execute('INSERT INTO documents (doc, name, added) VALUES (?, ?, ?)', (doc, name, time.time()))
+            for label, chars, signature in units:
+                blob = struct.pack(f'<{len(signature)}Q', *signature)
+                unit = self._db.execute('INSERT INTO units (doc, label, chars, signature) VALUES (?, ?, ?, ?)',
+                                        (doc, label, chars, blob)).lastrowid
+                self._db.executemany('INSERT INTO buckets (key, unit) VALUES (?, ?)',
+                                     [(key, unit) for key in band_keys(signature)])
+            self._db.execute('COMMIT')
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+
+    def _remove(self, doc):
+        self._db.execute('DELETE FROM buckets WHERE unit IN (SELECT id FROM units WHERE doc = ?)', (doc,))
+        self._db.execute('DELETE FROM units WHERE doc = ?', (doc,))
+        self._db.execute('DELETE FROM documents WHERE doc = ?', (doc,))
+
+    def stats(self):
+        documents, = self._db.execute('SELECT COUNT(*) FROM documents').fetchone()
+        units, = self._db.execute('SELECT COUNT(*) FROM units').fetchone()
+        return {'documents': documents, 'units': units, 'hasher': self.hasher.name}
+
+    def clear(self):
+        self._db.execute('DELETE FROM buckets')
+        self._db.execute('DELETE FROM units')
+        self._db.execute('DELETE FROM documents')
+
+    def close(self):
+        self._db.close()
+
+
+def _reference(label, chars, document=None):
+    where = f'in {document}' if document else 'above'
+    return f'[Duplicate of {label} {where}, {chars:,} chars omitted]'
+
+
+def _apply(text, start, end, edits):
+    """Return ``text[start:end]`` with the ``(start, end, replacement)`` edits applied."""
+    parts = []
+    position = start
+    for edit_start, edit_end, replacement in edits:
+        if edit_end <= start or edit_start >= end:
+            continue
+        if edit_start >= start:
+            parts.append(text[position:edit_start])
+            parts.append(replacement)
+        position = min(edit_end, end)
+    parts.append(text[position:end])
+    return ''.join(parts)
+
+
+def dedup_pages(pages, separator='\n\n', doc=None, name=None, index=None, threshold=THRESHOLD,
+                hasher=None, min_chars=MIN_CHARS):
+    """Replace near-duplicate units of a document and return ``(pages, report)``.
+
+    ``doc`` identifies the document in ``index`` (the PDF's SHA-256, say) and
+    ``name`` is how references to it read. Units of the same ``doc`` already
+    in the index are ignored, so re-running a document does not empty it.
+    When ``index`` is given, the document's remaining units are added to it.
+    The report counts the units, the duplicates found and the chars and
+    estimated tokens saved, and lists each replacement.
+    """
+    pages = list(pages)
+    if hasher is None:
+        hasher = index.hasher if index is not None else MinHasher()
+    text = separator.join(pages)
+    page_starts = []
+    position = 0
+    for page in pages:
+        page_starts.append(position)
+        position += len(page) + len(separator)
+
+    buckets = defaultdict(list)
+    seen = []  # (label, signature) of the units kept so far
+    kept = []
+    edits = []
+    replaced = []
+    units = 0
+    for label, spans in iter_units(text, segment(text, page_starts)):
+        units += 1
+        unit_text = '\n'.join(text[start:end] for start, end in spans)
+        if len(unit_text) < min_chars:
+            continue
+        signature = hasher.signature(unit_text)
+        keys = band_keys(signature)
+
+        best = None
+        for candidate in {unit for key in keys for unit in buckets[key]}:
+            score = similarity(signature, seen[candidate][1])
+            if score >= threshold and (best is None or score > best[0]):
+                best = (score, seen[candidate][0], None)
+        if best is None and index is not None:
+            for document, other_label, other in index.candidates(keys, exclude_doc=doc):
+                score = similarity(signature, other)
+                if score >= threshold and (best is None or score > best[0]):
+                    best = (score, other_label, document)
+
+        if best is None:
+            for key in keys:
+                buckets[key].append(len(seen))
+            seen.append((label, signature))
+            kept.append((label, len(unit_text), signature))
+            continue
+
+        score, other_label, document = best
+        chars = sum(end - start for start, end in spans)
+        reference = _reference(other_label, chars, document)
+        edits.append((spans[0][0], spans[0][1], reference))
+        edits.extend((start, end, '') for start, end in spans[1:])
+        replaced.append({'label': label, 'chars': chars, 'similarity': round(score, 3),
+                         'duplicate_of': other_label, 'document': document,
+                         'removed': [text[start:end] for start, end in spans], 'reference': reference})
+
+    edits.sort()
+    deduped = [_apply(text, start, start + len(page), edits) for start, page in zip(page_starts, pages)]
+    if index is not None and doc is not None:
+        index.add(doc, name or doc, kept)
+
+    estimator = get_estimator()
+    removed_tokens = sum(estimator.count_batch([part for item in replaced for part in item['removed']]))
+    reference_tokens = sum(estimator.count_batch([item['reference'] for item in replaced]))
+    chars_before = len(text)
+    chars_after = len(separator.join(deduped))
+    for item in replaced:
+        del item['removed']
+    report = {
+        'document': name,
+        'units': units,
+        'checked': len(kept) + len(replaced),
+        'duplicates': len(replaced),
+        'in_document': sum(1 for item in replaced if item['document'] is None),
+        'from_index': sum(1 for item in replaced if item['document'] is not None),
+        'threshold': threshold,
+        'hasher': hasher.name,
+        'chars_before': chars_before,
+        'chars_after': chars_after,
+        'chars_saved': chars_before - chars_after,
+        'tokens_saved': removed_tokens - reference_tokens,
+        'token_estimator': estimator.name,
+        'replaced': replaced,
+    }
+    return deduped, report
+
+
+def write_report(report, path):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,268 @@
+"""Extraction through external command-line tools (pdftotext/xpdf, Adobe).
+
+Completion is event driven instead of polling for the output file once a
+second:
+
+* ``stdout`` commands stream the text over a pipe; the job is done when the
+  pipe reaches EOF and the process exits.
+* ``file`` commands write an output file. On Linux an inotify watch on the
+  output directory reports ``IN_CLOSE_WRITE``/``IN_MOVED_TO`` for that file,
+  which only fires once the writer has closed it, so a half-written file is
+  never read. The process's stdout pipe is watched at the same time, so a
+  tool that exits without writing fails straight away. Other platforms poll
+  for the file while the process runs and accept it once its size has not
+  changed for ``SETTLE_SECONDS`` (or has settled after the process exited),
+  since viewers such as Adobe Reader keep running after saving.
+
+Several jobs can run concurrently, each with its own timeout; a job that
+overruns is killed.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ADOBE_PATHS = [
+    r"C:\Program Files (x86)\Adobe\Acrobat Reader DC\Reader\AcroRd32.exe",
+    r"C:\Program Files\Adobe\Acrobat DC\Acrobat\Acrobat.exe",
+]
+
+# argv templates; {input} and {output} are replaced per job
+COMMANDS = {
+    'pdftotext': {'argv': ['pdftotext', '-enc', 'UTF-8', '{input}', '-'], 'output': 'stdout'},
+    'adobe': {'argv': ['{adobe}', '/A', 'SaveAs:filename={output};format=txt', '{input}'], 'output': 'file'},
+}
+
+DEFAULT_TIMEOUT = 60
+# Without inotify: how often to check on the tool, and how long the output
+# must stay the same size while it is still running
+POLL_SECONDS = 0.25
+SETTLE_SECONDS = 1.0
+
+
+class ExternalCommandError(Exception):
+    pass
+
+
+def find_adobe():
+    for path in ADOBE_PATHS:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError("Adobe Reader/Acrobat not found")
+
+
+class FileWatch:
+    """inotify watch for a file being closed after writing (Linux only)."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, path):
+        self.name = os.fsencode(Path(path).name)
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(Path(path).parent), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch failed")
+
+    @staticmethod
+    def supported():
+        return sys.platform.startswith('linux')
+
+    def fileno(self):
+        return self.fd
+
+    def read_events(self):
+        """Return True if the watched file has been closed or moved into place."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name == self.name:
+                return True
+        return False
+
+    def close(self):
+        os.close(self.fd)
+
+
+def build_argv(command, input_path, output_path):
+    spec = COMMANDS[command] if isinstance(command, str) else command
+    values = {'input': str(input_path), 'output': str(output_path)}
+    if any('{adobe}' in arg for arg in spec['argv']):
+        values['adobe'] = find_adobe()
+    return [arg.format(**values) for arg in spec['argv']], spec['output']
+
+
+def command_available(command):
+    """Whether the command's executable can be found, without running it."""
+    spec = COMMANDS[command] if isinstance(command, str) else command
+    executable = spec['argv'][0]
+    if executable == '{adobe}':
+        return any(os.path.exists(path) for path in ADOBE_PATHS)
+    return shutil.which(executable) is not None
+
+
+def _kill(process):
+    if process.poll() is None:
+        process.kill()
+    process.wait()
+
+
+def _run_stdout(argv, timeout):
+    process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill(process)
+        raise ExternalCommandError(f"{argv[0]} timed out after {timeout}s")
+    if process.returncode != 0:
+        raise ExternalCommandError(
+            f"{argv[0]} failed with code {process.returncode}: {stderr.decode('utf-8', 'replace').strip()}")
+    return stdout.decode('utf-8')
+
+
+def _settled(output_path, deadline, quiet=0.0):
+    # Fallback without inotify: wait for the size to stop changing for ``quiet`` seconds
+    delay = 0.01
+    last = None
+    since = None
+    while time.monotonic() < deadline:
+        try:
+            size = os.path.getsize(output_path)
+        except FileNotFoundError:
+            size = None
+        now = time.monotonic()
+        if size is not None and size == last:
+            if now - since >= quiet:
+                return True
+        else:
+            last, since = size, now
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+    return False
+
+
+def _run_file(argv, output_path, timeout):
+    deadline = time.monotonic() + timeout
+    watch = FileWatch(output_path) if FileWatch.supported() else None
+    # The output pipe doubles as the exit notification alongside the watch
+    pipe = subprocess.PIPE if watch else subprocess.DEVNULL
+    process = subprocess.Popen(argv, stdout=pipe, stderr=subprocess.STDOUT)
+    try:
+        written = False
+        exited = False
+        output = bytearray()
+        if watch:
+            while not written:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                streams = [watch] if exited else [watch, process.stdout]
+                ready, _, _ = select.select(streams, [], [], remaining)
+                if watch in ready:
+                    written = watch.read_events()
+                if process.stdout in ready:
+                    data = process.stdout.read1(64 * 1024)
+                    output += data
+                    if not data:
+                        # Output pipe closed: the tool has exited
+                        exited = True
+                        if process.wait() != 0 and not written:
+                            break
+        else:
+            while not written and time.monotonic() < deadline:
+                try:
+                    process.wait(timeout=min(POLL_SECONDS, max(0, deadline - time.monotonic())))
+                except subprocess.TimeoutExpired:
+                    # Still running, which a viewer may do for good after saving
+                    if os.path.exists(output_path):
+                        written = _settled(output_path, deadline, SETTLE_SECONDS)
+                    continue
+                if process.returncode == 0:
+                    written = _settled(output_path, deadline)
+                break
+
+        if not written:
+            if process.poll() is not None and process.returncode != 0:
+                raise ExternalCommandError(
+                    f"{argv[0]} failed with code {process.returncode}: {output.decode('utf-8', 'replace').strip()}")
+            raise ExternalCommandError(f"{argv[0]} did not write {output_path} within {timeout}s")
+        if not os.path.exists(output_path):
+            raise ExternalCommandError(f"{argv[0]} did not create {output_path}")
+        with open(output_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    finally:
+        if watch:
+            watch.close()
+        # Viewers such as Adobe Reader stay open after saving
+        _kill(process)
+        if process.stdout:
+            process.stdout.close()
+
+
+def run_external(command, input_path, output_path=None, timeout=DEFAULT_TIMEOUT):
+    """Run an external extractor on one document and return its text."""
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"PDF file not found: {input_path}")
+    tmp_dir = None
+    if output_path is None:
+        tmp_dir = tempfile.mkdtemp(prefix='extract-')
+        output_path = Path(tmp_dir) / 'extracted-text.txt'
+    try:
+        argv, mode = build_argv(command, input_path, output_path)
+        if mode == 'stdout':
+            return _run_stdout(argv, timeout)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return _run_file(argv, output_path, timeout)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def run_many(command, paths, concurrency=4, timeout=DEFAULT_TIMEOUT):
+    """Run ``command`` on several documents at once.
+
+    Returns ``(path, text, error)`` tuples in input order; one failure or
+    timeout does not affect the other jobs.
+    """
+    def run(path):
+        try:
+            return path, run_external(command, path, timeout=timeout), None
+        except Exception as e:
+            return path, None, e
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(run, paths))
+
+
+def command_version(command):
+    argv, _ = build_argv(command, 'input.pdf', 'output.txt')
+    try:
+        result = subprocess.run([argv[0], '-v'], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return 'unknown'
+    output = (result.stdout or result.stderr).strip().splitlines()
+    return output[0] if output else 'unknown'
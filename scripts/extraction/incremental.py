@@ -0,0 +1,223 @@
+"""Incremental per-page re-extraction.
+
+Each page gets a fingerprint built from its decoded content streams, the
+resources they use (fonts, XObjects, ...) and the page boxes and rotation.
+Object numbers are not part of the fingerprint, so a regenerated report with
+unchanged earlier pages still matches. A manifest next to the raw text maps
+each fingerprint to the page's text span; a re-run only extracts pages whose
+fingerprint is new, splices them in, and rewrites only the chunk files whose
+content changed. The result is identical to a full run.
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from . import backends
+from .cache import output_settings
+from .chunking import DEFAULT_MAX_SIZE, chunk_pages
+
+MANIFEST_VERSION = 1
+# Keys that describe where an object sits in the file rather than what it draws
+IGNORED_KEYS = {'/Parent', '/Length', '/P', '/StructParents'}
+PAGE_KEYS = ('/MediaBox', '/CropBox', '/Rotate', '/UserUnit')
+
+
+class _Fingerprinter:
+    """Hash PDF objects by value, visiting each indirect object once."""
+
+    def __init__(self, pikepdf):
+        self.pikepdf = pikepdf
+        self.memo = {}
+
+    def digest(self, obj):
+        objgen = getattr(obj, 'objgen', (0, 0))
+        if objgen != (0, 0):
+            cached = self.memo.get(objgen)
+            if cached is not None:
+                return cached
+            # Placeholder breaks reference cycles
+            self.memo[objgen] = b'cycle'
+        sha = hashlib.sha256()
+        self._update(sha, obj)
+        value = sha.digest()
+        if objgen != (0, 0):
+            self.memo[objgen] = value
+        return value
+
+    def _update(self, sha, obj):
+        pikepdf = self.pikepdf
+        if isinstance(obj, pikepdf.Stream):
+            sha.update(b'S')
+            self._update_dict(sha, obj.stream_dict, skip={'/Filter', '/DecodeParms'})
+            try:
+                data = obj.read_bytes()
+            except pikepdf.PdfError:
+                data = obj.read_raw_bytes()
+            sha.update(len(data).to_bytes(8, 'big'))
+            sha.update(data)
+        elif isinstance(obj, pikepdf.Dictionary):
+            sha.update(b'D')
+            self._update_dict(sha, obj)
+        elif isinstance(obj, pikepdf.Array):
+            sha.update(b'A')
+            for item in obj:
+                sha.update(self.digest(item))
+        elif isinstance(obj, pikepdf.String):
+            sha.update(b's' + bytes(obj))
+        else:
+            sha.update(b'v' + repr(obj).encode('utf-8'))
+
+    def _update_dict(self, sha, obj, skip=()):
+        for key in sorted(obj.keys()):
+            if key in IGNORED_KEYS or key in skip:
+                continue
+            sha.update(key.encode('utf-8'))
+            sha.update(self.digest(obj[key]))
+
+    def page(self, page):
+        sha = hashlib.sha256()
+        obj = page.obj
+        for key in PAGE_KEYS:
+            if key in obj:
+                sha.update(key.encode('utf-8'))
+                sha.update(self.digest(obj[key]))
+        contents = obj.get('/Contents')
+        if contents is not None:
+            streams = contents if isinstance(contents, self.pikepdf.Array) else [contents]
+            for stream in streams:
+                sha.update(b'C')
+                sha.update(stream.read_bytes())
+        resources = obj.get('/Resources')
+        if resources is not None:
+            sha.update(b'R')
+            sha.update(self.digest(resources))
+        return sha.hexdigest()
+
+
+def page_fingerprints(input_path):
+    pikepdf = backends.load_module('pikepdf')
+    fingerprinter = _Fingerprinter(pikepdf)
+    with pikepdf.Pdf.open(input_path) as pdf:
+        return [fingerprinter.page(page) for page in pdf.pages]
+
+
+def manifest_path(output_dir):
+    return Path(output_dir) / 'raw' / 'page-manifest.json'
+
+
+def load_previous_pages(name, output_dir, settings):
+    """Return ``{fingerprint: text}`` from the last run, if it used the same settings."""
+    path = manifest_path(output_dir)
+    text_path = Path(output_dir) / 'raw' / 'extracted-text.txt'
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            manifest = json.load(f)
+        with open(text_path, 'r', encoding='utf-8', newline='') as f:
+            raw = f.read()
+    except (FileNotFoundError, ValueError):
+        return {}
+
+    expected = {
+        'manifest_version': MANIFEST_VERSION,
+        'backend': name,
+        'backend_version': str(backends.get_backend(name).version()),
+        'settings': settings,
+    }
+    if any(manifest.get(key) != value for key, value in expected.items()):
+        return {}
+    if manifest.get('text_sha256') != hashlib.sha256(raw.encode('utf-8')).hexdigest():
+        # The raw text was rewritten by something else since the manifest
+        return {}
+    return {
+        page['fingerprint']: raw[page['offset']:page['offset'] + page['length']]
+        for page in manifest['pages']
+    }
+
+
+def write_chunks(llm_input_dir, chunks):
+    """Rewrite only chunk files whose content changed and drop stale ones."""
+    written = 0
+    for i, chunk in enumerate(chunks, 1):
+        chunk_path = llm_input_dir / f'chunk-{i:03d}.txt'
+        try:
+            with open(chunk_path, 'r', encoding='utf-8', newline='') as f:
+                if f.read() == chunk:
+                    continue
+        except FileNotFoundError:
+            pass
+        with open(chunk_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(chunk)
+        written += 1
+
+    i = len(chunks) + 1
+    while (llm_input_dir / f'chunk-{i:03d}.txt').exists():
+        os.remove(llm_input_dir / f'chunk-{i:03d}.txt')
+        i += 1
+    return written
+
+
+def incremental_extract(name, input_path, output_dir, max_size=DEFAULT_MAX_SIZE, log=None, **options):
+    """Extract ``input_path`` into ``output_dir``, re-extracting only new or changed pages."""
+    backend = backends.get_backend(name)
+    output_dir = Path(output_dir)
+    llm_input_dir = output_dir / 'llm-input'
+    raw_dir = output_dir / 'raw'
+    text_path = raw_dir / 'extracted-text.txt'
+    os.makedirs(llm_input_dir, exist_ok=True)
+    os.makedirs(raw_dir, exist_ok=True)
+    settings = output_settings(name, options)
+
+    start = time.perf_counter()
+    fingerprints = page_fingerprints(input_path)
+    previous = load_previous_pages(name, output_dir, settings)
+    missing = [i for i, fp in enumerate(fingerprints) if fp not in previous]
+    if log:
+        log(f"{len(fingerprints) - len(missing)} of {len(fingerprints)} pages unchanged, "
+            f"extracting {len(missing)}")
+
+    fresh = backends.extract_page_numbers(name, input_path, missing, **options)
+    pages = [fresh[i] if i in fresh else previous[fp] for i, fp in enumerate(fingerprints)]
+
+    # Write the raw text and record where each page sits in it
+    entries = []
+    offset = 0
+    text_sha = hashlib.sha256()
+    with open(text_path, 'w', encoding='utf-8', newline='') as f:
+        for i, (fp, page) in enumerate(zip(fingerprints, pages)):
+            if i:
+                f.write(backend.separator)
+                text_sha.update(backend.separator.encode('utf-8'))
+                offset += len(backend.separator)
+            f.write(page)
+            text_sha.update(page.encode('utf-8'))
+            entries.append({'fingerprint': fp, 'offset': offset, 'length': len(page)})
+            offset += len(page)
+
+    chunks = list(chunk_pages(pages, max_size, backend.separator))
+    written = write_chunks(llm_input_dir, chunks)
+
+    manifest = {
+        'manifest_version': MANIFEST_VERSION,
+        'backend': name,
+        'backend_version': str(backend.version()),
+        'settings': settings,
+        'text_sha256': text_sha.hexdigest(),
+        'pages': entries,
+    }
+    tmp_path = manifest_path(output_dir).with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path(output_dir))
+
+    return {
+        'pages': len(pages),
+        'reused': len(pages) - len(missing),
+        'extracted': len(missing),
+        'chunks': len(chunks),
+        'chunks_written': written,
+        'elapsed': time.perf_counter() - start,
+        'text_path': str(text_path),
+        'llm_input_dir': str(llm_input_dir),
+    }
@@ -0,0 +1,109 @@
+"""Memory-mapped, zero-copy PDF input.
+
+``map_view`` returns a read-only ``memoryview`` over an ``mmap`` of the file.
+PyMuPDF opens it in place (``fitz.open(stream=view)`` does not copy a
+memoryview) and pdfminer reads it through ``MappedReader``, so a document is
+held once, in the page cache, rather than once per reader on the heap.
+
+While ``shared(path)`` is active the mapping is registered for the process.
+Page workers forked inside that block inherit it and map nothing themselves:
+every worker reads the same physical pages.
+
+A mapping is unmapped once the last view over it is released, so nothing
+needs closing explicitly.
+"""
+import io
+import mmap
+import os
+from contextlib import contextmanager
+
+_shared = {}
+
+
+def _key(input_path):
+    stat = os.stat(input_path)
+    return (os.path.abspath(input_path), stat.st_size, stat.st_mtime_ns)
+
+
+def _map(input_path):
+    with open(input_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def map_view(input_path):
+    """Return a read-only memoryview of the whole file."""
+    mapping = _shared.get(_key(input_path))
+    if mapping is None:
+        mapping = _map(input_path)
+    return memoryview(mapping if mapping is not None else b'')
+
+
+@contextmanager
+def shared(input_path):
+    """Keep ``input_path`` mapped for this process and any workers it forks."""
+    key = _key(input_path)
+    if key in _shared:
+        yield
+        return
+    mapping = _shared[key] = _map(input_path)
+    try:
+        yield
+    finally:
+        del _shared[key]
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                # Views still in use keep the pages mapped until they are released
+                pass
+
+
+class MappedReader(io.RawIOBase):
+    """Seekable binary file over a memoryview, with its own position."""
+
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+        self._pos = offset
+        return offset
+
+    def read(self, size=-1):
+        start = self._pos
+        if start >= len(self._view):
+            return b''
+        stop = len(self._view) if size is None or size < 0 else min(start + size, len(self._view))
+        self._pos = stop
+        return self._view[start:stop].tobytes()
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def open_reader(input_path):
+    return MappedReader(map_view(input_path))
@@ -0,0 +1,175 @@
+"""Segment OFW message reports into individual messages.
+
+A single compiled pattern finds every structural line of the report in one
+pass: ``Message N of M`` markers, the ``Sent``/``From``/``To``/``Subject``
+header labels and ``Page N of M`` footers. A header value is taken from the
+label's own line or, when the backend laid it out elsewhere, from the next
+non-empty lines in order (pdfminer emits ``Sent: From: To:`` before the
+three values).
+
+Each message is a dict::
+
+    {"number": 1, "total": 287, "sent": "12/01/2024 at 01:02 AM",
+     "date": "2024-12-01T01:02:00", "from": "Robert Moyer",
+     "to": "Christine Moyer", "first_viewed": "12/01/2024 at 07:30 AM",
+     "subject": "Re: Condo Sale", "offset": 352, "end": 4311,
+     "body": [[369, 404], [565, 4296]], "pages": [1, 2]}
+
+Offsets are character offsets into the joined report text, i.e. the
+backend's ``raw/extracted-text.txt``. ``body`` lists the spans of body text
+with header lines and page footers left out; headers repeated inside quoted
+replies stay in the body. ``pages`` are 1-based, like the report's footers.
+"""
+import json
+import os
+import re
+from bisect import bisect_right
+from datetime import datetime
+
+TOKENS = re.compile(
+    r'^[ \t\f]*(?:'
+    r'Message (?P<number>\d+) of (?P<total>\d+)'
+    r'|(?P<label>Sent|From|To|Subject):[ \t]*(?P<value>[^\n]*?)'
+    r'|Page (?P<page>\d+) of \d+'
+    r')[ \t]*$',
+    re.MULTILINE)
+LINE = re.compile(r'[^\n]*\S[^\n]*')
+VIEWED = re.compile(r'\s*\(First Viewed: ([^)]*)\)')
+SENT_FORMAT = '%m/%d/%Y at %I:%M %p'
+
+
+def _strip_span(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return [start, end] if start < end else None
+
+
+def _set_header(message, label, value):
+    value = value.strip()
+    if label == 'Sent':
+        message['sent'] = value
+        try:
+            message['date'] = datetime.strptime(value, SENT_FORMAT).isoformat()
+        except ValueError:
+            message['date'] = None
+    elif label == 'To':
+        viewed = VIEWED.search(value)
+        message['to'] = VIEWED.sub('', value)
+        message['first_viewed'] = viewed.group(1) if viewed else None
+    else:
+        message[label.lower()] = value
+
+
+class _Segmenter:
+    def __init__(self, text, page_starts):
+        self.text = text
+        self.page_starts = page_starts
+        self.messages = []
+        self.message = None
+        self.state = None  # 'lead' before the headers, then 'header', then 'body'
+        self.pending = []  # labels still waiting for a value
+        self.cursor = 0
+
+    def body(self, end):
+        span = _strip_span(self.text, self.cursor, end)
+        if span and self.message is not None:
+            self.message['body'].append(span)
+
+    def take_values(self, end):
+        # Fill pending labels from the non-empty lines before ``end``
+        for line in LINE.finditer(self.text, self.cursor, end):
+            if not self.pending:
+                break
+            _set_header(self.message, self.pending.pop(0), line.group())
+            self.cursor = line.end()
+        if self.message['subject'] is not None:
+            self.state = 'body'
+
+    def finish(self, end):
+        message = self.message
+        message['end'] = _strip_span(self.text, message['offset'], end)[1]
+        if self.page_starts:
+            message['pages'] = [bisect_right(self.page_starts, message['offset']),
+                                bisect_right(self.page_starts, message['end'] - 1)]
+        self.messages.append(message)
+
+    def run(self):
+        for token in TOKENS.finditer(self.text):
+            number, label = token.group('number'), token.group('label')
+            if self.message is None and not number:
+                continue  # report preamble
+            if self.state == 'header':
+                self.take_values(token.start())
+            if label:
+                if self.state == 'body':
+                    continue  # a header quoted in a reply
+                self.body(token.start())
+                self.cursor = token.end()
+                self.state = 'header'
+                if token.group('value'):
+                    _set_header(self.message, label, token.group('value'))
+                    if label == 'Subject':
+                        self.state = 'body'
+                else:
+                    self.pending.append(label)
+                continue
+
+            self.body(token.start())
+            self.cursor = token.end()
+            if number:
+                if self.message is not None:
+                    self.finish(token.start())
+                self.message = {
+                    'number': int(number), 'total': int(token.group('total')),
+                    'sent': None, 'date': None, 'from': None, 'to': None,
+                    'first_viewed': None, 'subject': None,
+                    'offset': token.start(), 'body': [],
+                }
+                self.state = 'lead'
+                self.pending = []
+
+        if self.message is not None:
+            if self.state == 'header':
+                self.take_values(len(self.text))
+            self.body(len(self.text))
+            self.finish(len(self.text))
+        return self.messages
+
+
+def segment(text, page_starts=None):
+    """Return the messages in ``text``, a whole OFW report.
+
+    ``page_starts`` are the offsets where each page begins; without them
+    messages have no ``pages``.
+    """
+    return _Segmenter(text, page_starts).run()
+
+
+def segment_pages(pages, separator='\n\n'):
+    """Segment the report made by joining ``pages`` with ``separator``."""
+    page_starts = []
+    offset = 0
+    for i, page in enumerate(pages):
+        if i:
+            offset += len(separator)
+        page_starts.append(offset)
+        offset += len(page)
+    return segment(separator.join(pages), page_starts)
+
+
+def write_messages(messages, path):
+    """Write one JSON object per line and return how many were written."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for message in messages:
+            f.write(json.dumps(message, ensure_ascii=False))
+            f.write('\n')
+    os.replace(tmp_path, path)
+    return len(messages)
+
+
+def read_messages(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
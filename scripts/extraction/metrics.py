@@ -0,0 +1,216 @@
+"""Prometheus metrics for the extractors, without a client library.
+
+Counters and histograms live in ``REGISTRY`` and are rendered in the
+Prometheus text format, either to a file for node-exporter's textfile
+collector (``write_textfile``) or over HTTP at ``/metrics`` (``serve``).
+
+Extraction metrics, all labelled by ``backend``:
+
+* ``extract_page_seconds``, ``extract_page_bytes``, ``extract_page_chars``:
+  histograms per page, recorded by ``instrument_pages``.
+* ``extract_stage_seconds{stage="open|extract|dedup|chunk|write"}``: time spent
+  in each stage of a run (``stage``).
+* ``extract_cache_requests_total{result="hit|miss"}``: extraction cache
+  lookups; the hit rate is ``rate(..{result="hit"}) / rate(..)``.
+* ``extract_page_failures_total{reason="timeout|crash|error"}``: page groups
+  that supervised extraction had to kill or retry (``supervised.py``).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [(name, value) for name, value in zip(names, values)] + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.extend(self._samples(key, value))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self, key, value):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}']
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state['count'] if state else 0
+
+    def _samples(self, key, state):
+        labels = lambda *extra: _format_labels(self.labelnames, key, extra)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state['counts']):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{labels(("le", _format_value(bound)))} {cumulative}')
+        lines.append(f'{self.name}_bucket{labels(("le", "+Inf"))} {state["count"]}')
+        lines.append(f'{self.name}_sum{labels()} {_format_value(state["sum"])}')
+        lines.append(f'{self.name}_count{labels()} {state["count"]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _get(self, cls, name, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"{name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self):
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+PAGE_SECONDS = REGISTRY.histogram('extract_page_seconds', 'Time to extract one page', ('backend',))
+PAGE_BYTES = REGISTRY.histogram('extract_page_bytes', 'UTF-8 bytes of text per page', ('backend',), SIZE_BUCKETS)
+PAGE_CHARS = REGISTRY.histogram('extract_page_chars', 'Characters of text per page', ('backend',), SIZE_BUCKETS)
+STAGE_SECONDS = REGISTRY.histogram('extract_stage_seconds', 'Time spent in each extraction stage',
+                                   ('backend', 'stage'))
+CACHE_REQUESTS = REGISTRY.counter('extract_cache_requests_total', 'Extraction cache lookups by result',
+                                  ('result',))
+PAGE_FAILURES = REGISTRY.counter('extract_page_failures_total', 'Supervised page groups that failed, by reason',
+                                 ('backend', 'reason'))
+
+
+def stage(backend, name):
+    """Time a stage (``open``, ``extract``, ``dedup``, ``chunk`` or ``write``) of a run."""
+    return STAGE_SECONDS.time(backend=backend, stage=name)
+
+
+def instrument_pages(backend, pages):
+    """Yield ``pages`` unchanged, recording the latency and size of each one."""
+    iterator = iter(pages)
+    while True:
+        start = time.perf_counter()
+        try:
+            page = next(iterator)
+        except StopIteration:
+            return
+        PAGE_SECONDS.observe(time.perf_counter() - start, backend=backend)
+        PAGE_CHARS.observe(len(page), backend=backend)
+        PAGE_BYTES.observe(len(page.encode('utf-8')), backend=backend)
+        yield page
+
+
+def write_textfile(path, registry=REGISTRY):
+    """Write the metrics atomically, as node-exporter's textfile collector expects."""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+def serve(port, host='127.0.0.1', registry=REGISTRY):
+    """Serve ``/metrics`` from a daemon thread and return the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
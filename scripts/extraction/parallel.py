@@ -0,0 +1,109 @@
+"""Page-parallel extraction.
+
+The page range is split into contiguous shards. Each worker process opens the
+document itself, extracts its shard, and the shards are reassembled in page
+order, so the result is identical to a serial pass. The file is memory-mapped
+before the pool forks, so workers read the parent's mapping instead of each
+loading their own copy.
+"""
+import os
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from . import backends, mapped
+
+# Several shards per worker keeps the pool busy when some pages are slower
+SHARDS_PER_WORKER = 4
+MIN_SHARD_PAGES = 8
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def shard_ranges(page_count, shard_count):
+    """Split ``range(page_count)`` into at most ``shard_count`` contiguous (start, stop) ranges."""
+    shard_count = max(1, min(shard_count, page_count))
+    size, extra = divmod(page_count, shard_count)
+    ranges = []
+    start = 0
+    for i in range(shard_count):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def plan_shards(page_count, workers):
+    shard_count = min(workers * SHARDS_PER_WORKER, max(1, page_count // MIN_SHARD_PAGES))
+    return shard_ranges(page_count, shard_count)
+
+
+def _fitz_shard(input_path, start, stop):
+    with backends.fitz_open_mapped(input_path) as pdf:
+        return [pdf[i].get_text() for i in range(start, stop)]
+
+
+def _pdfminer_shard(input_path, start, stop, laparams=None):
+    return list(backends.pdfminer_pages(input_path, laparams, page_numbers=range(start, stop)))
+
+
+def page_count(input_path):
+    with backends.fitz_open_mapped(input_path) as pdf:
+        return len(pdf)
+
+
+def pdfminer_page_count(input_path):
+    pdfdocument = backends.load_module('pdfminer.pdfdocument')
+    pdfparser = backends.load_module('pdfminer.pdfparser')
+    pdfpage = backends.load_module('pdfminer.pdfpage')
+    with mapped.open_reader(input_path) as fin:
+        document = pdfdocument.PDFDocument(pdfparser.PDFParser(fin))
+        return sum(1 for _ in pdfpage.PDFPage.create_pages(document))
+
+
+# Backends whose pages can be counted and extracted by page range
+PAGE_COUNTS = {'fitz': page_count, 'pdfminer': pdfminer_page_count}
+
+
+def run_shards(shard_func, input_path, ranges, workers):
+    """Run ``shard_func(input_path, start, stop)`` for each range and yield results in order."""
+    if workers <= 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            yield shard_func(input_path, start, stop)
+        return
+
+    # Only a couple of shards per worker are in flight at once, so results
+    # waiting for a slow consumer cannot pile up in memory
+    remaining = iter(ranges)
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        pending = deque(pool.submit(shard_func, input_path, start, stop)
+                        for start, stop in islice(remaining, workers * 2))
+        while pending:
+            result = pending.popleft().result()
+            shard = next(remaining, None)
+            if shard:
+                pending.append(pool.submit(shard_func, input_path, *shard))
+            yield result
+
+
+def fitz_pages_parallel(input_path, workers=None):
+    """Yield PyMuPDF page text in page order, extracting shards in parallel."""
+    workers = workers or default_workers()
+    with mapped.shared(input_path):
+        ranges = plan_shards(page_count(input_path), workers)
+        for pages in run_shards(_fitz_shard, str(input_path), ranges, workers):
+            yield from pages
+
+
+def pdfminer_pages_parallel(input_path, laparams=None, workers=None):
+    """Yield pdfminer page text in page order, running shards with ``page_numbers`` in parallel."""
+    workers = workers or default_workers()
+    shard = partial(_pdfminer_shard, laparams=laparams)
+    with mapped.shared(input_path):
+        ranges = plan_shards(pdfminer_page_count(input_path), workers)
+        for pages in run_shards(shard, str(input_path), ranges, workers):
+            yield from pages
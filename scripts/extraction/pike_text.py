@@ -0,0 +1,284 @@
+"""Plain-text extraction from parsed content streams with pikepdf.
+
+Walks the text-showing operators (``Tj``, ``TJ``, ``'``, ``"``) of each page
+and of the form XObjects it draws, decodes strings through the font's
+ToUnicode CMap (parsed once per font object and cached), and starts a new
+line whenever the text position moves vertically (``Td``, ``TD``, ``Tm``,
+``T*``). No glyph widths or layout analysis are involved, which keeps it much
+cheaper than pdfminer on text-only exports such as OFW reports.
+"""
+import re
+
+from . import backends
+
+TEXT_OPERATORS = 'BT Tf Tj TJ \' " Td TD Tm T* TL Do'
+
+# Kerning in a TJ array wider than this (thousandths of an em) is a word gap
+SPACE_ADJUSTMENT = -250
+
+MAX_FORM_DEPTH = 8
+
+CODESPACE = re.compile(rb'begincodespacerange(.*?)endcodespacerange', re.S)
+BFCHAR = re.compile(rb'beginbfchar(.*?)endbfchar', re.S)
+BFRANGE = re.compile(rb'beginbfrange(.*?)endbfrange', re.S)
+HEX = re.compile(rb'<([0-9A-Fa-f\s]*)>')
+RANGE_ENTRY = re.compile(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f\s]*>|\[[^\]]*\])')
+
+SIMPLE_ENCODINGS = {
+    '/WinAnsiEncoding': 'cp1252',
+    '/MacRomanEncoding': 'mac_roman',
+    '/StandardEncoding': 'latin-1',
+    '/PDFDocEncoding': 'latin-1',
+}
+
+GLYPH_NAMES = {
+    'space': ' ', 'exclam': '!', 'quotedbl': '"', 'numbersign': '#', 'dollar': '$', 'percent': '%',
+    'ampersand': '&', 'quotesingle': "'", 'parenleft': '(', 'parenright': ')', 'asterisk': '*',
+    'plus': '+', 'comma': ',', 'hyphen': '-', 'period': '.', 'slash': '/', 'zero': '0', 'one': '1',
+    'two': '2', 'three': '3', 'four': '4', 'five': '5', 'six': '6', 'seven': '7', 'eight': '8',
+    'nine': '9', 'colon': ':', 'semicolon': ';', 'less': '<', 'equal': '=', 'greater': '>',
+    'question': '?', 'at': '@', 'bracketleft': '[', 'backslash': '\\', 'bracketright': ']',
+    'asciicircum': '^', 'underscore': '_', 'grave': '`', 'braceleft': '{', 'bar': '|',
+    'braceright': '}', 'asciitilde': '~', 'quoteleft': '‘', 'quoteright': '’',
+    'quotedblleft': '“', 'quotedblright': '”', 'endash': '–', 'emdash': '—',
+    'bullet': '•', 'ellipsis': '…', 'fi': 'fi', 'fl': 'fl', 'nbspace': ' ',
+}
+
+
+def _hex_bytes(value):
+    digits = re.sub(rb'\s', b'', value).decode('ascii')
+    if len(digits) % 2:
+        # A final odd digit is padded with 0
+        digits += '0'
+    return bytes.fromhex(digits)
+
+
+def _utf16(data):
+    return data.decode('utf-16-be', errors='replace')
+
+
+def parse_cmap(data):
+    """Parse a ToUnicode CMap into ``({code: text}, code lengths)``."""
+    mapping = {}
+    lengths = set()
+    for block in CODESPACE.findall(data):
+        lengths.update(len(_hex_bytes(h)) for h in HEX.findall(block))
+
+    for block in BFCHAR.findall(data):
+        values = [_hex_bytes(h) for h in HEX.findall(block)]
+        for src, dst in zip(values[::2], values[1::2]):
+            mapping[src] = _utf16(dst)
+            lengths.add(len(src))
+
+    for block in BFRANGE.findall(data):
+        for lo, hi, dst in RANGE_ENTRY.findall(block):
+            lo, hi = _hex_bytes(lo), _hex_bytes(hi)
+            width = len(lo)
+            lengths.add(width)
+            start, stop = int.from_bytes(lo, 'big'), int.from_bytes(hi, 'big')
+            if dst.startswith(b'['):
+                targets = [_hex_bytes(h) for h in HEX.findall(dst)]
+                for offset, target in enumerate(targets[:stop - start + 1]):
+                    mapping[(start + offset).to_bytes(width, 'big')] = _utf16(target)
+                continue
+            base = _hex_bytes(HEX.match(dst).group(1))
+            base_value = int.from_bytes(base, 'big')
+            for offset in range(stop - start + 1):
+                target = (base_value + offset).to_bytes(len(base), 'big')
+                mapping[(start + offset).to_bytes(width, 'big')] = _utf16(target)
+
+    return mapping, sorted(lengths) or [1]
+
+
+def _glyph_text(name):
+    if name in GLYPH_NAMES:
+        return GLYPH_NAMES[name]
+    if len(name) == 1:
+        return name
+    if name.startswith('uni') and len(name) == 7:
+        try:
+            return chr(int(name[3:], 16))
+        except ValueError:
+            pass
+    return None
+
+
+class FontDecoder:
+    """Turn the bytes of a shown string into text for one font."""
+
+    def __init__(self, font):
+        self.mapping = None
+        self.lengths = [1]
+        self.codec = 'latin-1'
+        self.differences = {}
+        self.composite = str(font.get('/Subtype')) == '/Type0'
+
+        to_unicode = font.get('/ToUnicode')
+        if to_unicode is not None and hasattr(to_unicode, 'read_bytes'):
+            self.mapping, self.lengths = parse_cmap(to_unicode.read_bytes())
+        elif self.composite:
+            self.lengths = [2]
+
+        encoding = font.get('/Encoding')
+        if encoding is not None and not self.composite:
+            if hasattr(encoding, 'keys'):
+                base = encoding.get('/BaseEncoding')
+                self.codec = SIMPLE_ENCODINGS.get(str(base), 'latin-1') if base is not None else 'latin-1'
+                code = 0
+                for item in encoding.get('/Differences', []):
+                    if isinstance(item, int):
+                        code = int(item)
+                        continue
+                    text = _glyph_text(str(item)[1:])
+                    if text is not None:
+                        self.differences[code] = text
+                    code += 1
+            else:
+                self.codec = SIMPLE_ENCODINGS.get(str(encoding), 'latin-1')
+
+    def decode(self, data):
+        if self.mapping is not None:
+            return self._decode_cmap(data)
+        if self.composite:
+            # CIDs without a ToUnicode map carry no recoverable text
+            return ''
+        if not self.differences:
+            return data.decode(self.codec, errors='replace')
+        return ''.join(self.differences.get(b) or bytes([b]).decode(self.codec, errors='replace')
+                       for b in data)
+
+    def _decode_cmap(self, data):
+        mapping = self.mapping
+        if len(self.lengths) == 1:
+            width = self.lengths[0]
+            return ''.join(mapping.get(data[i:i + width], '') for i in range(0, len(data), width))
+
+        parts = []
+        i = 0
+        while i < len(data):
+            for width in self.lengths:
+                text = mapping.get(data[i:i + width])
+                if text is not None:
+                    parts.append(text)
+                    i += width
+                    break
+            else:
+                i += self.lengths[0]
+        return ''.join(parts)
+
+
+class _TextState:
+    def __init__(self):
+        self.out = []
+        self.y = 0.0
+        self.last_y = None
+        self.leading = 0.0
+        self.moved = False
+        self.newline = False
+
+    def move(self, y=None, newline=False):
+        if y is not None:
+            self.y = y
+        self.moved = True
+        self.newline = self.newline or newline
+
+    def show(self, text):
+        if not text:
+            return
+        if self.out:
+            if self.newline or (self.last_y is not None and abs(self.y - self.last_y) > 0.1):
+                self.out.append('\n')
+            elif self.moved and not self.out[-1][-1:].isspace() and not text[:1].isspace():
+                self.out.append(' ')
+        self.out.append(text)
+        self.last_y = self.y
+        self.moved = False
+        self.newline = False
+
+
+class PikeTextExtractor:
+    """Extract page text from one open ``pikepdf.Pdf``, sharing decoded fonts across pages."""
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self._pikepdf = backends.load_module('pikepdf')
+        self._decoders = {}
+
+    def decoder(self, font, name=None, local=None):
+        """Return a decoder for ``font``.
+
+        Indirect fonts are shared across pages by object number. A direct
+        (inline) font has no stable identity, so it is only reused by its
+        resource ``name`` within ``local``, the cache of one resources walk.
+        """
+        if font.is_indirect:
+            cache, key = self._decoders, font.objgen
+        elif local is not None:
+            cache, key = local, name
+        else:
+            return FontDecoder(font)
+        decoder = cache.get(key)
+        if decoder is None:
+            decoder = cache[key] = FontDecoder(font)
+        return decoder
+
+    def page_text(self, page):
+        state = _TextState()
+        self._walk(page.obj, page.obj.get('/Resources'), state, 0)
+        return ''.join(state.out) + '\n' if state.out else ''
+
+    def _walk(self, stream, resources, state, depth):
+        pikepdf = self._pikepdf
+        fonts = resources.get('/Font', {}) if resources is not None else {}
+        xobjects = resources.get('/XObject', {}) if resources is not None else {}
+        direct = {}
+        decoder = None
+        for operands, operator in pikepdf.parse_content_stream(stream, TEXT_OPERATORS):
+            op = str(operator)
+            if op == 'Tj':
+                if decoder:
+                    state.show(decoder.decode(bytes(operands[0])))
+            elif op == 'TJ':
+                if decoder:
+                    parts = []
+                    for item in operands[0]:
+                        if isinstance(item, pikepdf.String):
+                            parts.append(decoder.decode(bytes(item)))
+                        elif float(item) < SPACE_ADJUSTMENT and parts and not parts[-1][-1:].isspace():
+                            parts.append(' ')
+                    state.show(''.join(parts))
+            elif op in ("'", '"'):
+                state.move(state.y - state.leading, newline=True)
+                if decoder:
+                    state.show(decoder.decode(bytes(operands[-1])))
+            elif op == 'Tf':
+                name = str(operands[0])
+                font = fonts.get(name)
+                decoder = self.decoder(font, name, direct) if font is not None else None
+            elif op == 'BT':
+                state.move(0.0)
+            elif op == 'Tm':
+                state.move(float(operands[5]))
+            elif op in ('Td', 'TD'):
+                ty = float(operands[1])
+                if op == 'TD':
+                    state.leading = -ty
+                state.move(state.y + ty)
+            elif op == 'T*':
+                state.move(state.y - state.leading, newline=True)
+            elif op == 'TL':
+                state.leading = float(operands[0])
+            elif op == 'Do' and depth < MAX_FORM_DEPTH:
+                xobject = xobjects.get(str(operands[0]))
+                if xobject is not None and str(xobject.get('/Subtype')) == '/Form':
+                    self._walk(xobject, xobject.get('/Resources', resources), state, depth + 1)
+
+
+def pike_text_pages(input_path, page_numbers=None):
+    """Yield decoded text for each page (or just ``page_numbers``)."""
+    pikepdf = backends.load_module('pikepdf')
+    with pikepdf.Pdf.open(input_path) as pdf:
+        extractor = PikeTextExtractor(pdf)
+        numbers = range(len(pdf.pages)) if page_numbers is None else sorted(page_numbers)
+        for i in numbers:
+            yield extractor.page_text(pdf.pages[i])
@@ -0,0 +1,347 @@
+"""Overlap extraction, chunking and writing across documents with asyncio.
+
+Documents flow through three stages joined by bounded queues::
+
+    extract (process pool) -> [chunk queue] -> chunk (thread) -> [write queue] -> write (thread)
+
+Each document is extracted as one job, or as page shards of ``shard_pages``
+pages for backends that can count and extract page ranges. While document N
+is chunked and written, the pool is already extracting document N+1 (or
+shard k+1). When chunking or writing falls behind, the queues fill up and
+extraction waits, so at most ``workers`` jobs in flight plus ``queue_size``
+items per queue are held in memory.
+
+Each document's output is the same as ``stream_extract``'s. The summary has
+the usual batch totals plus, per stage, the busy time and utilisation (busy
+time over wall time, per pool process for extraction) and, per queue, the
+maximum and time-averaged depth. The busiest stage is the ``bottleneck``; a
+queue that stays full also points at the stage it feeds. With ``index`` the
+write stage also adds each document to the search index (``search.py``).
+
+A document that kills its pool process (a segfault or OOM kill) fails on its
+own: the pool is replaced for new work and each job lost with it is rerun
+in a one-process pool of its own, so only the document that crashes again is
+recorded as failed. Tika with a
+``server`` option extracts in threads that share one pooled session instead.
+"""
+import asyncio
+import os
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from . import backends, metrics
+from .batch import output_dirs, summarize
+from .cache import file_sha256
+from .chunking import DEFAULT_MAX_SIZE
+from .parallel import PAGE_COUNTS, default_workers, shard_ranges
+from .search import SearchIndex
+from .streaming import ChunkWriter, stream_to_files
+from .tika_client import get_client
+
+DEFAULT_QUEUE_SIZE = 4
+STATUS_INTERVAL = 1.0
+
+
+def _extract_job(name, input_path, page_numbers, options):
+    start = time.perf_counter()
+    backend = backends.get_backend(name)
+    if page_numbers is None:
+        pages = list(backend.pages(input_path, **options))
+    else:
+        pages = list(backend.pages(input_path, page_numbers=page_numbers, **options))
+    return pages, time.perf_counter() - start
+
+
+class _ChunkList:
+    """Collect chunks from ``stream_to_files`` instead of writing them."""
+
+    def __init__(self):
+        self.entries = []
+        self.count = 0
+        self.chars = 0
+
+    def write(self, chunk, pages=None, tokens=None):
+        self.entries.append({'chunk': chunk, 'pages': pages, 'tokens': tokens})
+        self.count += 1
+        self.chars += len(chunk)
+
+
+def _chunk_document(pages, separator, max_size, max_tokens):
+    collector = _ChunkList()
+    stream_to_files(pages, None, collector, separator, max_size, max_tokens=max_tokens)
+    return collector.entries
+
+
+def _write_document(output_dir, text, chunks, max_tokens):
+    llm_input_dir = output_dir / 'llm-input'
+    raw_dir = output_dir / 'raw'
+    os.makedirs(llm_input_dir, exist_ok=True)
+    os.makedirs(raw_dir, exist_ok=True)
+    with open(raw_dir / 'extracted-text.txt', 'w', encoding='utf-8') as f:
+        f.write(text)
+    writer = ChunkWriter(llm_input_dir)
+    for entry in chunks:
+        writer.write(entry['chunk'], entry['pages'], entry['tokens'])
+    if max_tokens:
+        writer.write_metadata(raw_dir / 'chunks.json', max_tokens)
+
+
+class MonitoredQueue(asyncio.Queue):
+    """An ``asyncio.Queue`` that tracks its maximum and time-averaged depth."""
+
+    def __init__(self, maxsize, clock=time.perf_counter):
+        super().__init__(maxsize)
+        self.clock = clock
+        self.max_depth = 0
+        self._area = 0.0
+        self._start = self._changed = clock()
+
+    def _advance(self):
+        # Called before every change, while qsize() is still the old depth
+        now = self.clock()
+        self._area += self.qsize() * (now - self._changed)
+        self._changed = now
+
+    def put_nowait(self, item):
+        self._advance()
+        super().put_nowait(item)
+        self.max_depth = max(self.max_depth, self.qsize())
+
+    def get_nowait(self):
+        self._advance()
+        return super().get_nowait()
+
+    def stats(self):
+        now = self.clock()
+        elapsed = now - self._start
+        area = self._area + self.qsize() * (now - self._changed)
+        return {'size': self.maxsize, 'depth': self.qsize(), 'max_depth': self.max_depth,
+                'mean_depth': round(area / elapsed, 3) if elapsed else 0.0}
+
+
+class _Document:
+    def __init__(self, path, output_dir):
+        self.path = path
+        self.output_dir = output_dir
+        self.pages = []
+        self.chunks = None
+        self.error = None
+        self.start = time.perf_counter()
+        self.result = {'file': str(path), 'output_dir': str(output_dir), 'bytes': 0, 'pages': 0}
+
+    def fail(self, error, tb):
+        if self.error is None:
+            self.error = error
+            self.result.update(ok=False, error=f"{type(error).__name__}: {error}", traceback=tb)
+
+
+class Pipeline:
+    """Run documents through the extract, chunk and write stages."""
+
+    def __init__(self, files, output_root, backend='fitz', workers=None, max_size=DEFAULT_MAX_SIZE,
+                 max_tokens=None, queue_size=DEFAULT_QUEUE_SIZE, shard_pages=None, on_result=None,
+                 on_status=None, status_interval=STATUS_INTERVAL, index=False, **options):
+        self.files = list(files)
+        self.dirs = output_dirs(self.files, output_root)
+        self.backend = backend
+        self.separator = backends.get_backend(backend).separator
+        self.workers = workers or default_workers()
+        self.max_size = max_size
+        self.max_tokens = max_tokens
+        self.queue_size = queue_size
+        self.shard_pages = shard_pages if backend in PAGE_COUNTS else None
+        self.on_result = on_result
+        self.on_status = on_status
+        self.status_interval = status_interval
+        self.options = options
+        self.index = index
+        self.results = []
+        self.busy = {'extract': 0.0, 'chunk': 0.0, 'write': 0.0}
+        self.items = {'extract': 0, 'chunk': 0, 'write': 0}
+
+    def run(self):
+        """Process every file and return the batch summary with stage and queue stats."""
+        return asyncio.run(self._run())
+
+    async def _run(self):
+        self.chunk_queue = MonitoredQueue(self.queue_size)
+        self.write_queue = MonitoredQueue(self.queue_size)
+        self.start = time.perf_counter()
+        # Only the write thread uses the search index
+        self.search_index = SearchIndex(check_same_thread=False) if self.index else None
+        self.pool = self._new_pool()
+        self.broken = False
+        with ThreadPoolExecutor(max_workers=1) as chunk_thread, ThreadPoolExecutor(max_workers=1) as write_thread:
+            stages = asyncio.gather(self._extract(), self._chunk(chunk_thread), self._write(write_thread))
+            monitor = asyncio.ensure_future(self._monitor()) if self.on_status else None
+            try:
+                await stages
+            finally:
+                if monitor:
+                    monitor.cancel()
+                if self.search_index:
+                    self.search_index.close()
+                self.pool.shutdown()
+        elapsed = time.perf_counter() - self.start
+        order = {str(path): i for i, path in enumerate(self.files)}
+        self.results.sort(key=lambda r: order[r['file']])
+        summary = summarize(self.files, self.results, elapsed)
+        summary.update(self.status(elapsed))
+        return summary
+
+    def status(self, elapsed=None):
+        """Return per-stage utilisation, per-queue depth and the current bottleneck."""
+        elapsed = elapsed if elapsed is not None else time.perf_counter() - self.start
+        capacity = {'extract': self.workers, 'chunk': 1, 'write': 1}
+        stages = {
+            name: {'items': self.items[name], 'busy': round(busy, 3),
+                   'utilisation': round(busy / (elapsed * capacity[name]), 3) if elapsed else 0.0}
+            for name, busy in self.busy.items()
+        }
+        return {
+            'stages': stages,
+            'queues': {'chunk': self.chunk_queue.stats(), 'write': self.write_queue.stats()},
+            'bottleneck': max(stages, key=lambda name: stages[name]['utilisation']),
+        }
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.status_interval)
+            status = self.status()
+            status.update(done=len(self.results), total=len(self.files))
+            self.on_status(status)
+
+    def _new_pool(self):
+        if self.backend == 'tika' and self.options.get('server'):
+            # Tika server requests wait on I/O, so threads share one pooled session
+            get_client(self.options['server'], pool_size=self.workers)
+            return ThreadPoolExecutor(max_workers=self.workers)
+        return ProcessPoolExecutor(max_workers=self.workers)
+
+    def _submit(self, job):
+        """Submit ``job`` (a function and its arguments) to the pool, replacing the pool if it died."""
+        if self.broken:
+            self.pool.shutdown(wait=False)
+            self.pool = self._new_pool()
+            self.broken = False
+        try:
+            return asyncio.wrap_future(self.pool.submit(*job))
+        except BrokenProcessPool:
+            self.broken = True
+            return self._submit(job)
+
+    async def _run_job(self, future, job):
+        try:
+            return await future
+        except BrokenProcessPool:
+            # A dead worker takes every job in flight down with the pool. Rerun
+            # this one in a pool of its own, which nothing else can break, to
+            # tell whether it was the cause
+            self.broken = True
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                return await asyncio.wrap_future(pool.submit(*job))
+
+    async def _shards(self, path):
+        if not self.shard_pages:
+            return [None]
+        job = (PAGE_COUNTS[self.backend], str(path))
+        count = await self._run_job(self._submit(job), job)
+        shard_count = max(1, -(-count // self.shard_pages))
+        return [range(start, stop) for start, stop in shard_ranges(count, shard_count)] or [None]
+
+    async def _extract(self):
+        # Jobs complete in any order but are queued in submission order, so
+        # each document's shards reach the chunker in page order
+        pending = deque()
+        for path in self.files:
+            document = _Document(path, self.dirs[path])
+            try:
+                document.result['bytes'] = os.path.getsize(path)
+                shards = await self._shards(path)
+            except Exception as e:
+                document.fail(e, traceback.format_exc())
+                await self.chunk_queue.put((document, None, True))
+                continue
+            for i, shard in enumerate(shards):
+                job = (_extract_job, self.backend, str(path), list(shard) if shard is not None else None,
+                       self.options)
+                pending.append((document, self._submit(job), job, i == len(shards) - 1))
+                if len(pending) >= self.workers:
+                    await self._queue_shard(*pending.popleft())
+        while pending:
+            await self._queue_shard(*pending.popleft())
+        await self.chunk_queue.put(None)
+
+    async def _queue_shard(self, document, future, job, last):
+        try:
+            pages, elapsed = await self._run_job(future, job)
+        except Exception as e:
+            document.fail(e, traceback.format_exc())
+            pages = None
+        else:
+            self.busy['extract'] += elapsed
+            self.items['extract'] += 1
+            metrics.STAGE_SECONDS.observe(elapsed, backend=self.backend, stage='extract')
+        await self.chunk_queue.put((document, pages, last))
+
+    async def _chunk(self, thread):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.chunk_queue.get()
+            if item is None:
+                await self.write_queue.put(None)
+                return
+            document, pages, last = item
+            if pages is not None and document.error is None:
+                document.pages.extend(pages)
+            if not last:
+                continue
+            if document.error is None:
+                start = time.perf_counter()
+                try:
+                    document.chunks = await loop.run_in_executor(
+                        thread, _chunk_document, document.pages, self.separator, self.max_size, self.max_tokens)
+                except Exception as e:
+                    document.fail(e, traceback.format_exc())
+                self._record('chunk', time.perf_counter() - start)
+            await self.write_queue.put(document)
+
+    async def _write(self, thread):
+        loop = asyncio.get_running_loop()
+        while True:
+            document = await self.write_queue.get()
+            if document is None:
+                return
+            if document.error is None:
+                start = time.perf_counter()
+                try:
+                    await loop.run_in_executor(thread, self._write_document, document)
+                    document.result.update(ok=True, pages=len(document.pages), chunks=len(document.chunks))
+                except Exception as e:
+                    document.fail(e, traceback.format_exc())
+                self._record('write', time.perf_counter() - start)
+            document.result['elapsed'] = time.perf_counter() - document.start
+            # Drop the text as soon as it is on disk
+            document.pages = document.chunks = None
+            self.results.append(document.result)
+            if self.on_result:
+                self.on_result(document.result)
+
+    def _write_document(self, document):
+        _write_document(document.output_dir, self.separator.join(document.pages), document.chunks, self.max_tokens)
+        if self.search_index:
+            self.search_index.add(document.path, document.pages, file_sha256(document.path), self.backend,
+                                  self.separator, document.output_dir / 'raw' / 'extracted-text.txt')
+
+    def _record(self, stage, elapsed):
+        self.busy[stage] += elapsed
+        self.items[stage] += 1
+        metrics.STAGE_SECONDS.observe(elapsed, backend=self.backend, stage=stage)
+
+
+def run_pipeline(files, output_root, backend='fitz', workers=None, max_size=DEFAULT_MAX_SIZE, **kwargs):
+    """Process ``files`` through the pipeline and return the summary (see ``Pipeline``)."""
+    return Pipeline(files, output_root, backend, workers, max_size, **kwargs).run()
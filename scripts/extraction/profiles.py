@@ -0,0 +1,50 @@
+"""Compare pdfminer layout profiles on a document.
+
+Every profile is timed and its output compared page by page with the
+``default`` profile (the settings pdfminer_extract.py has always used), so
+it is clear what a faster profile costs in fidelity for a given document.
+"""
+import difflib
+import time
+
+from . import backends
+
+
+def page_similarity(expected, actual):
+    """Word-level similarity, so layout-only differences (line breaks, spacing) count less."""
+    if expected == actual:
+        return 1.0
+    matcher = difflib.SequenceMatcher(None, expected.split(), actual.split(), autojunk=False)
+    return matcher.ratio()
+
+
+def compare_pdfminer_profiles(input_path, profiles=None, workers=1):
+    """Return timing and difference statistics for each pdfminer profile."""
+    profiles = profiles or list(backends.PDFMINER_PROFILES)
+    if 'default' not in profiles:
+        profiles = ['default'] + list(profiles)
+
+    outputs = {}
+    report = {}
+    for name in profiles:
+        laparams = backends.PDFMINER_PROFILES[name]
+        start = time.perf_counter()
+        pages = list(backends.pdfminer_pages(input_path, laparams, workers=workers))
+        elapsed = time.perf_counter() - start
+        outputs[name] = pages
+        report[name] = {
+            'elapsed': elapsed,
+            'pages': len(pages),
+            'pages_per_sec': len(pages) / elapsed if elapsed else 0.0,
+            'chars': sum(len(page) for page in pages),
+        }
+
+    baseline = outputs['default']
+    for name, pages in outputs.items():
+        similarities = [page_similarity(a, b) for a, b in zip(baseline, pages)]
+        stats = report[name]
+        stats['identical_pages'] = sum(1 for a, b in zip(baseline, pages) if a == b)
+        stats['similarity'] = sum(similarities) / len(similarities) if similarities else 1.0
+        stats['char_delta'] = stats['chars'] - report['default']['chars']
+        stats['speedup'] = report['default']['elapsed'] / stats['elapsed'] if stats['elapsed'] else 0.0
+    return report
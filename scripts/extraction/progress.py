@@ -0,0 +1,46 @@
+"""Rate-limited progress events.
+
+Instead of one flushed log line per page, ``Progress`` emits a single JSON
+line at most every ``interval`` seconds, plus one when the stage finishes::
+
+    {"event": "progress", "stage": "extract", "done": 120, "total": 358,
+     "elapsed": 1.02, "rate": 117.6}
+"""
+import json
+import time
+
+DEFAULT_INTERVAL = 1.0
+
+
+def print_event(event):
+    print(json.dumps(event), flush=True)
+
+
+class Progress:
+    def __init__(self, stage, total=None, interval=DEFAULT_INTERVAL, emit=print_event, clock=time.monotonic):
+        self.stage = stage
+        self.total = total
+        self.interval = interval
+        self.emit = emit
+        self.clock = clock
+        self.done = 0
+        self.start = self._last = clock()
+
+    def _event(self, event, fields):
+        elapsed = self.clock() - self.start
+        data = {'event': event, 'stage': self.stage, 'done': self.done, 'total': self.total,
+                'elapsed': round(elapsed, 3), 'rate': round(self.done / elapsed, 1) if elapsed else None}
+        data.update(fields)
+        self.emit(data)
+
+    def update(self, count=1, **fields):
+        """Count ``count`` more items and emit an event if the interval has passed."""
+        self.done += count
+        now = self.clock()
+        if now - self._last >= self.interval:
+            self._last = now
+            self._event('progress', fields)
+
+    def finish(self, **fields):
+        self._event('done', fields)
+
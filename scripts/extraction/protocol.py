@@ -0,0 +1,42 @@
+"""Length-prefixed JSON framing used between the MCP server and extract workers.
+
+Every message is a 4-byte big-endian length followed by that many bytes of
+UTF-8 encoded JSON.
+"""
+import json
+import struct
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE_SIZE = 1 << 30
+
+
+def _read_exact(stream, size):
+    data = bytearray()
+    while len(data) < size:
+        block = stream.read(size - len(data))
+        if not block:
+            break
+        data += block
+    return bytes(data)
+
+
+def read_message(stream):
+    """Read one message, or return None on a clean end of stream."""
+    header = _read_exact(stream, HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise EOFError("Truncated message header")
+    (size,) = HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large: {size} bytes")
+    payload = _read_exact(stream, size)
+    if len(payload) < size:
+        raise EOFError(f"Truncated message: expected {size} bytes, got {len(payload)}")
+    return json.loads(payload.decode('utf-8'))
+
+
+def write_message(stream, message):
+    payload = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    stream.write(HEADER.pack(len(payload)) + payload)
+    stream.flush()
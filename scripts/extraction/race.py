@@ -0,0 +1,132 @@
+"""Hedged extraction: run several backends at once and keep the first good result.
+
+Each backend runs in its own process. Results are scored as they arrive with
+a cheap quality check (non-empty pages, printable characters, OFW message
+headers); the first one that passes wins and the other processes are killed,
+so latency follows the fastest healthy backend rather than the slowest.
+"""
+import multiprocessing
+import re
+import time
+from multiprocessing.connection import wait
+
+from . import backends, mapped
+
+MIN_NONEMPTY_RATIO = 0.9
+MIN_PRINTABLE_RATIO = 0.98
+
+# Control characters (other than whitespace) and U+FFFD mark a bad decode
+BAD_CHARS = re.compile('[\x00-\x08\x0e-\x1f\x7f\ufffd]')
+OFW_HEADERS = re.compile(r'^(?:Message \d+ of \d+|Sent:|From:|To:|Subject:)', re.MULTILINE)
+
+
+class RaceError(Exception):
+    pass
+
+
+def score_pages(pages, require_ofw=False):
+    """Cheap quality check for an extraction result."""
+    nonempty = sum(1 for page in pages if page.strip())
+    chars = sum(len(page) for page in pages)
+    bad = sum(len(BAD_CHARS.findall(page)) for page in pages)
+    headers = sum(len(OFW_HEADERS.findall(page)) for page in pages)
+    score = {
+        'nonempty_ratio': nonempty / len(pages) if pages else 0.0,
+        'printable_ratio': 1 - bad / chars if chars else 0.0,
+        'ofw_headers': headers,
+    }
+    score['passed'] = (
+        score['nonempty_ratio'] >= MIN_NONEMPTY_RATIO
+        and score['printable_ratio'] >= MIN_PRINTABLE_RATIO
+        and (headers > 0 or not require_ofw)
+    )
+    return score
+
+
+def _run_backend(conn, name, input_path, options, require_ofw):
+    try:
+        result = backends.extract(name, input_path, **options)
+        result['score'] = score_pages(result['pages'], require_ofw)
+        conn.send(('ok', result))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _rank(result):
+    score = result['score']
+    return (score['nonempty_ratio'], score['printable_ratio'], score['ofw_headers'])
+
+
+def race_extract(input_path, names, timeout=None, require_ofw=False, options=None):
+    """Extract ``input_path`` with every backend in ``names`` concurrently.
+
+    ``options`` maps a backend name to its keyword options. Returns the
+    winning result (``backend``, ``pages``, ``text``, ``score``) plus an
+    ``attempts`` entry per backend. If nothing passes the quality check the
+    best-scoring result is returned with ``score['passed']`` False; if every
+    backend fails, ``RaceError`` is raised.
+    """
+    names = list(dict.fromkeys(names))
+    for name in names:
+        backends.get_backend(name)
+    options = options or {}
+
+    start = time.perf_counter()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    running = {}
+    # Forked backends inherit one mapping of the file instead of each reading it
+    with mapped.shared(input_path):
+        for name in names:
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_run_backend, args=(sender, name, str(input_path), options.get(name, {}), require_ofw),
+                daemon=True)
+            process.start()
+            sender.close()
+            running[receiver] = (name, process)
+
+    attempts = {}
+    winner = None
+    fallback = None
+    try:
+        while running and winner is None:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            ready = wait(list(running), remaining)
+            if not ready:
+                break
+            for conn in ready:
+                name, process = running.pop(conn)
+                try:
+                    status, payload = conn.recv()
+                except EOFError:
+                    status, payload = 'error', f"process exited with code {process.exitcode}"
+                conn.close()
+                process.join()
+                attempt = {'elapsed': time.perf_counter() - start}
+                if status == 'error':
+                    attempt.update(status='error', error=payload)
+                else:
+                    attempt.update(status='rejected', score=payload['score'])
+                    if payload['score']['passed'] and winner is None:
+                        attempt['status'] = 'won'
+                        winner = payload
+                    elif fallback is None or _rank(payload) > _rank(fallback):
+                        fallback = payload
+                attempts[name] = attempt
+    finally:
+        for conn, (name, process) in running.items():
+            process.kill()
+            process.join()
+            conn.close()
+            attempts[name] = {'status': 'cancelled' if winner else 'timeout',
+                              'elapsed': time.perf_counter() - start}
+
+    result = winner or fallback
+    if result is None:
+        errors = '; '.join(f"{n}: {a.get('error', a['status'])}" for n, a in attempts.items())
+        raise RaceError(f"No extractor produced a result for {input_path} ({errors})")
+    result['attempts'] = {name: attempts[name] for name in names}
+    result['elapsed'] = time.perf_counter() - start
+    return result
@@ -0,0 +1,154 @@
+"""Pre-scan a PDF and route each page to the cheapest backend that handles it.
+
+The scan only reads the page tree, font dictionaries and decompressed content
+streams; no text is laid out. Each page is classified as:
+
+* ``text``: an ordinary text layer, extracted with PyMuPDF.
+* ``layout``: rotated or vertical text (or a rotated page), sent to pdfminer
+  whose layout analysis handles these better.
+* ``image``: images but no text layer; needs OCR, so every backend returns
+  nothing useful and the page stays on PyMuPDF.
+* ``empty``: neither text nor images.
+
+Fonts without a ToUnicode map whose encoding cannot be decoded without one
+are reported per page, since no backend recovers real text from them.
+"""
+import re
+import time
+
+from . import backends
+
+STANDARD_ENCODINGS = {'WinAnsiEncoding', 'MacRomanEncoding', 'StandardEncoding', 'PDFDocEncoding'}
+
+# "a b c d e f Tm" or "... cm"; a non-zero b or c rotates or skews the text
+MATRIX = re.compile(rb'(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+-?[\d.]+\s+-?[\d.]+\s+(Tm|cm)\b')
+TEXT_SHOW = re.compile(rb'\bT[jJ]\b')
+
+
+def _rotated(content):
+    for match in MATRIX.finditer(content):
+        try:
+            b, c = float(match.group(2)), float(match.group(3))
+        except ValueError:
+            continue
+        if abs(b) > 1e-6 or abs(c) > 1e-6:
+            return True
+    return False
+
+
+class _FontInfo:
+    """Per-document font facts, looked up once per font object."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._fonts = {}
+
+    def get(self, font):
+        xref, _, subtype, basefont, _, encoding = font[:6]
+        info = self._fonts.get(xref)
+        if info is None:
+            has_map = xref > 0 and self.doc.xref_get_key(xref, 'ToUnicode')[0] != 'null'
+            info = self._fonts[xref] = {
+                'name': basefont,
+                'vertical': encoding.endswith('-V'),
+                'unmapped': not has_map and (subtype in ('Type0', 'Type3') or (
+                    encoding not in STANDARD_ENCODINGS and subtype not in ('Type1', 'TrueType', 'MMType1'))),
+            }
+        return info
+
+
+def classify_page(doc, page, fonts):
+    """Return the classification and routing decision for one page."""
+    content = b''.join(doc.xref_stream(xref) or b'' for xref in page.get_contents())
+    page_fonts = [fonts.get(font) for font in page.get_fonts()]
+    has_images = bool(page.get_images())
+    # Fonts alone are not enough: resource dictionaries are often shared by
+    # every page. Text drawn only inside form XObjects shows up as a "Do".
+    shows_text = bool(TEXT_SHOW.search(content)) or (b'Do' in content and not has_images)
+    has_text = bool(page_fonts) and shows_text
+
+    reasons = []
+    if page.rotation:
+        reasons.append(f'page rotated {page.rotation}')
+    if has_text and _rotated(content):
+        reasons.append('rotated text')
+    if any(font['vertical'] for font in page_fonts):
+        reasons.append('vertical text')
+
+    if not has_text:
+        kind = 'image' if has_images else 'empty'
+    elif reasons:
+        kind = 'layout'
+    else:
+        kind = 'text'
+
+    return {
+        'page': page.number,
+        'kind': kind,
+        'backend': 'pdfminer' if kind == 'layout' else 'fitz',
+        'reasons': reasons,
+        'needs_ocr': kind == 'image',
+        'unmapped_fonts': sorted({font['name'] for font in page_fonts if font['unmapped']}),
+    }
+
+
+def scan(input_path):
+    """Classify every page and return a routing plan."""
+    start = time.perf_counter()
+    with backends.fitz_open_mapped(input_path) as doc:
+        fonts = _FontInfo(doc)
+        pages = [classify_page(doc, page, fonts) for page in doc]
+
+    routes = {}
+    for page in pages:
+        routes.setdefault(page['backend'], []).append(page['page'])
+    kinds = {}
+    for page in pages:
+        kinds[page['kind']] = kinds.get(page['kind'], 0) + 1
+    return {
+        'file': str(input_path),
+        'page_count': len(pages),
+        'pages': pages,
+        'routes': routes,
+        'kinds': kinds,
+        'needs_ocr': [page['page'] for page in pages if page['needs_ocr']],
+        'scan_elapsed': time.perf_counter() - start,
+    }
+
+
+def run_plan(input_path, plan, separator='\n\n'):
+    """Extract each page with the backend the plan chose, in page order."""
+    pages = [None] * plan['page_count']
+    timings = {}
+    for name, numbers in plan['routes'].items():
+        start = time.perf_counter()
+        extracted = backends.extract_page_numbers(name, input_path, numbers)
+        for number, text in extracted.items():
+            pages[number] = text
+        timings[name] = {'pages': len(numbers), 'elapsed': time.perf_counter() - start}
+    return {
+        'pages': pages,
+        'text': separator.join(pages),
+        'timings': timings,
+    }
+
+
+def routed_extract(input_path, compare=False):
+    """Scan, then extract along the plan.
+
+    With ``compare`` the whole document is also run through pdfminer, to
+    report the time saved against always using it.
+    """
+    plan = scan(input_path)
+    result = run_plan(input_path, plan)
+    result['plan'] = plan
+    result['elapsed'] = plan['scan_elapsed'] + sum(t['elapsed'] for t in result['timings'].values())
+    if compare:
+        start = time.perf_counter()
+        for _ in backends.pdfminer_pages(input_path):
+            pass
+        baseline = time.perf_counter() - start
+        result['pdfminer_elapsed'] = baseline
+        result['time_saved'] = baseline - result['elapsed']
+        result['speedup'] = baseline / result['elapsed'] if result['elapsed'] else 0.0
+    return result
@@ -0,0 +1,205 @@
+"""Full-text search over extracted reports with SQLite FTS5.
+
+Each document is indexed as one passage per message when it segments as an
+OFW report (``messages.py``), otherwise one per page. Passages carry the
+message headers, the 1-based pages they span and UTF-8 byte offsets into the
+document's ``raw/extracted-text.txt``, so a hit can be opened without
+re-extracting. FTS5 stores the text itself, so ranked hits and snippets come
+straight from the index without reading the text files.
+
+Updates are incremental per document: a document whose PDF hash and backend
+are unchanged is skipped, otherwise its passages are replaced in one
+transaction. The index is ``search.sqlite3`` next to the extraction cache
+(``EXTRACT_CACHE_DIR``, ``.cache/extraction`` by default).
+"""
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from .cache import DEFAULT_ROOT
+from .messages import segment
+
+# Weights for bm25() by column: text, subject, sender, recipient
+RANK_WEIGHTS = (1.0, 4.0, 2.0, 2.0)
+SNIPPET_TOKENS = 16
+TERM = re.compile(r'\w+')
+
+
+def default_path():
+    return Path(os.environ.get('EXTRACT_CACHE_DIR') or DEFAULT_ROOT) / 'search.sqlite3'
+
+
+def _byte_offsets(text, offsets):
+    """Map character offsets (any order) to UTF-8 byte offsets in one pass."""
+    result = {}
+    position = 0
+    total = 0
+    for offset in sorted(set(offsets)):
+        total += len(text[position:offset].encode('utf-8'))
+        position = offset
+        result[offset] = total
+    return result
+
+
+def iter_passages(pages, separator='\n\n'):
+    """Yield a passage for each message of the document, or each page if it has none."""
+    text = separator.join(pages)
+    page_starts = []
+    position = 0
+    for page in pages:
+        page_starts.append(position)
+        position += len(page) + len(separator)
+
+    messages = segment(text, page_starts)
+    if messages:
+        spans = [(message['offset'], message['end']) for message in messages]
+    else:
+        spans = [(start, start + len(page)) for start, page in zip(page_starts, pages)]
+    offsets = _byte_offsets(text, [offset for span in spans for offset in span])
+
+    if not messages:
+        for number, (start, end) in enumerate(spans, 1):
+            yield {'kind': 'page', 'text': text[start:end], 'subject': None, 'sender': None, 'recipient': None,
+                   'number': None, 'sent': None, 'page': number, 'last_page': number,
+                   'start': offsets[start], 'end': offsets[end]}
+        return
+    for message in messages:
+        first, last = message.get('pages') or (None, None)
+        yield {'kind': 'message', 'text': '\n'.join(text[start:end] for start, end in message['body']),
+               'subject': message['subject'], 'sender': message['from'], 'recipient': message['to'],
+               'number': message['number'], 'sent': message['date'] or message['sent'],
+               'page': first, 'last_page': last,
+               'start': offsets[message['offset']], 'end': offsets[message['end']]}
+
+
+def match_query(query):
+    """Turn free text into an FTS5 query that requires every word."""
+    return ' '.join(f'"{term}"' for term in TERM.findall(query))
+
+
+class SearchIndex:
+    def __init__(self, path=None, check_same_thread=True):
+        self.path = Path(path or default_path())
+        os.makedirs(self.path.parent, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None,
+                                   check_same_thread=check_same_thread)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, sha256 TEXT NOT NULL, backend TEXT NOT NULL,'
+            ' text_path TEXT, pages INTEGER NOT NULL, passage_count INTEGER NOT NULL, first_row INTEGER NOT NULL,'
+            ' indexed REAL NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5('
+            ' text, subject, sender, recipient,'
+            ' document UNINDEXED, kind UNINDEXED, number UNINDEXED, sent UNINDEXED,'
+            ' page UNINDEXED, last_page UNINDEXED, start UNINDEXED, "end" UNINDEXED,'
+            " tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+
+    def is_current(self, path, sha256, backend):
+        row = self._db.execute('SELECT sha256, backend FROM documents WHERE path = ?',
+                               (str(Path(path).resolve()),)).fetchone()
+        return row is not None and (row['sha256'], row['backend']) == (sha256, backend)
+
+    def add(self, path, pages, sha256, backend, separator='\n\n', text_path=None):
+        """Index ``pages`` of the PDF at ``path``, replacing any earlier passages for it.
+
+        Returns the number of passages written, or ``None`` when the document is
+        already indexed with the same hash and backend.
+        """
+        path = str(Path(path).resolve())
+        if self.is_current(path, sha256, backend):
+            return None
+        passages = list(iter_passages(pages, separator))
+        self._db.execute('BEGIN')
+        try:
+            self._remove(path)
+            # A document's passages get consecutive rowids, so removing them needs no scan
+            first_row = self._db.execute('SELECT COALESCE(MAX(rowid), 0) + 1 FROM passages').fetchone()[0]
+            document = self._db.execute(
+                'INSERT INTO documents (path, sha256, backend, text_path, pages, passage_count, first_row, indexed)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (path, sha256, backend, str(text_path) if text_path else None, len(pages), len(passages), first_row,
+                 time.time())
+            ).lastrowid
+            self._db.executemany(
+                'INSERT INTO passages (rowid, text, subject, sender, recipient, document, kind, number, sent,'
+                ' page, last_page, start, "end") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(first_row + i, row['text'], row['subject'], row['sender'], row['recipient'], document,
+                  row['kind'], row['number'], row['sent'], row['page'], row['last_page'], row['start'], row['end'])
+                 for i, row in enumerate(passages)]
+            )
+            self._db.execute('COMMIT')
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+        return len(passages)
+
+    def _remove(self, path):
+        row = self._db.execute('SELECT id, passage_count, first_row FROM documents WHERE path = ?', (path,)).fetchone()
+        if row is not None:
+            self._db.execute('DELETE FROM passages WHERE rowid BETWEEN ? AND ?',
+                             (row['first_row'], row['first_row'] + row['passage_count'] - 1))
+            self._db.execute('DELETE FROM documents WHERE id = ?', (row['id'],))
+        return row is not None
+
+    def remove(self, path):
+        """Drop a document from the index and return whether it was there."""
+        self._db.execute('BEGIN')
+        try:
+            removed = self._remove(str(Path(path).resolve()))
+            self._db.execute('COMMIT')
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+        return removed
+
+    def search(self, query, limit=20, raw=False, kind=None, document=None):
+        """Return the best ``limit`` hits for ``query``, best first.
+
+        ``query`` is free text in which every word must match, or FTS5 query
+        syntax (phrases, ``OR``, ``NEAR``, ``subject:``) with ``raw``.
+        """
+        expression = query if raw else match_query(query)
+        if not expression:
+            return []
+        weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+        sql = (
+            'SELECT documents.path, documents.text_path, passages.kind, passages.number, passages.subject, passages.sender,'
+            ' passages.recipient, passages.sent, passages.page, passages.last_page, passages.start, passages."end",'
+            f" snippet(passages, 0, '[', ']', '...', {SNIPPET_TOKENS}) AS snippet, bm25(passages, {weights}) AS score"
+            ' FROM passages JOIN documents ON documents.id = passages.document WHERE passages MATCH ?'
+        )
+        params = [expression]
+        if kind:
+            sql += ' AND passages.kind = ?'
+            params.append(kind)
+        if document:
+            sql += ' AND documents.path = ?'
+            params.append(str(Path(document).resolve()))
+        sql += ' ORDER BY score LIMIT ?'
+        params.append(limit)
+        return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+
+    def documents(self):
+        return [dict(row) for row in self._db.execute(
+            'SELECT path, sha256, backend, text_path, pages, passage_count, indexed FROM documents ORDER BY path'
+        ).fetchall()]
+
+    def stats(self):
+        documents, passages, pages = self._db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(passage_count), 0), COALESCE(SUM(pages), 0) FROM documents').fetchone()
+        return {'documents': documents, 'passages': passages, 'pages': pages,
+                'bytes': self.path.stat().st_size if self.path.exists() else 0}
+
+    def optimize(self):
+        """Merge the FTS5 segments; worth running after indexing many documents."""
+        self._db.execute("INSERT INTO passages (passages) VALUES ('optimize')")
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,174 @@
+"""Bounded-memory extraction.
+
+Pages go from the backend straight into ``raw/extracted-text.txt`` and through
+the chunker into ``llm-input/chunk-NNN.txt`` as they are produced. At any time
+only the current page, the pending paragraph and the chunk being filled are
+held in memory, so peak RSS does not grow with the number of pages.
+
+With ``max_tokens`` chunks are packed to a token budget instead of
+``max_size`` characters, and ``raw/chunks.json`` records each chunk's
+estimated token count for the monitoring layer.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+from . import backends, metrics
+from .chunk_store import ChunkStoreWriter
+from .chunking import DEFAULT_MAX_SIZE, iter_chunk_spans, iter_paragraph_spans, iter_token_chunk_spans
+from .tokens import get_estimator
+
+
+def tika_stream(input_path, server=None):
+    """Stream plain text from a Tika server as it is produced.
+
+    Unlike ``tika.parser.from_file`` the response body is never held whole.
+    """
+    from .tika_client import DEFAULT_SERVER, get_client
+    return get_client(server or DEFAULT_SERVER).stream(input_path)
+
+
+def stream_pages(name, input_path, **options):
+    """Yield text pieces for ``name`` without materialising the document."""
+    if name == 'tika':
+        return tika_stream(input_path, **options)
+    return backends.get_backend(name).pages(input_path, **options)
+
+
+class ChunkWriter:
+    """Write chunks to ``chunk-NNN.txt`` files one at a time."""
+
+    def __init__(self, llm_input_dir):
+        self.llm_input_dir = Path(llm_input_dir)
+        self.count = 0
+        self.chars = 0
+        self.entries = []
+
+    def write(self, chunk, pages=None, tokens=None):
+        self.count += 1
+        self.chars += len(chunk)
+        chunk_path = self.llm_input_dir / f'chunk-{self.count:03d}.txt'
+        with open(chunk_path, 'w', encoding='utf-8') as f:
+            f.write(chunk)
+        self.entries.append({
+            'file': chunk_path.name,
+            'chars': len(chunk),
+            'tokens': tokens,
+            'pages': list(pages) if pages and pages[0] is not None else None,
+        })
+
+    def write_metadata(self, path, max_tokens):
+        """Write ``chunks.json`` with the per-chunk token counts."""
+        metadata = {
+            'estimator': get_estimator().name,
+            'max_tokens': max_tokens,
+            'chunk_count': self.count,
+            'total_tokens': sum(entry['tokens'] or 0 for entry in self.entries),
+            'chunks': self.entries,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+
+
+def stream_to_files(pages, text_path, chunk_writer, separator='\n\n', max_size=DEFAULT_MAX_SIZE,
+                    on_page=None, max_tokens=None):
+    """Write ``pages`` to ``text_path`` and ``chunk_writer`` in a single pass.
+
+    The raw file is identical to ``separator.join(pages)`` and the chunks to
+    ``chunk_text`` of that text. Each chunk is written with the 0-based span
+    of pages its text came from. With ``text_path=None`` no raw file is
+    written. With ``max_tokens`` chunks are packed by tokens and each is
+    written with its token count.
+    """
+    stats = {'pages': 0, 'chars': 0}
+
+    def pieces(raw):
+        for i, page in enumerate(pages):
+            if i and separator:
+                if raw:
+                    raw.write(separator)
+                yield separator
+            if raw:
+                raw.write(page)
+            stats['pages'] += 1
+            stats['chars'] += len(page)
+            if on_page:
+                on_page(stats['pages'])
+            yield page
+
+    # Separators are whitespace, so text only ever comes from page pieces
+    step = 2 if separator else 1
+    raw = open(text_path, 'w', encoding='utf-8') if text_path else None
+    try:
+        paragraphs = iter_paragraph_spans(pieces(raw))
+        if max_tokens:
+            chunks = iter_token_chunk_spans(paragraphs, max_tokens)
+        else:
+            chunks = ((chunk, first, last, None) for chunk, first, last in iter_chunk_spans(paragraphs, max_size))
+        for chunk, first, last, tokens in chunks:
+            chunk_writer.write(chunk, (first // step, last // step), tokens)
+    finally:
+        if raw:
+            raw.close()
+
+    stats['chunks'] = chunk_writer.count
+    if max_tokens:
+        stats['tokens'] = sum(entry['tokens'] for entry in chunk_writer.entries)
+    return stats
+
+
+def stream_extract(name, input_path, output_dir, max_size=DEFAULT_MAX_SIZE, log=None, chunk_store=False,
+                   max_tokens=None, pages=None, **options):
+    """Extract ``input_path`` with backend ``name`` into ``output_dir`` in streaming mode.
+
+    With ``chunk_store`` the chunks go to a single-file store in
+    ``output_dir/chunks`` (see ``chunk_store.py``) and the raw text, which the
+    store already holds, is not written separately. ``pages`` that were
+    already extracted (by ``TikaClient.extract_many``, say) are written
+    instead of running the backend.
+    """
+    output_dir = Path(output_dir)
+    if pages is None:
+        pages = metrics.instrument_pages(name, stream_pages(name, input_path, **options))
+    if chunk_store:
+        return _stream_to_store(name, input_path, output_dir, max_size, log, max_tokens, pages)
+    llm_input_dir = output_dir / 'llm-input'
+    raw_dir = output_dir / 'raw'
+    text_path = raw_dir / 'extracted-text.txt'
+    os.makedirs(llm_input_dir, exist_ok=True)
+    os.makedirs(raw_dir, exist_ok=True)
+
+    def on_page(count):
+        if log and count % 500 == 0:
+            log(f"Streamed {count} pages...")
+
+    start = time.perf_counter()
+    separator = backends.get_backend(name).separator
+    writer = ChunkWriter(llm_input_dir)
+    stats = stream_to_files(pages, text_path, writer, separator, max_size, on_page, max_tokens)
+    if max_tokens:
+        writer.write_metadata(raw_dir / 'chunks.json', max_tokens)
+    stats['elapsed'] = time.perf_counter() - start
+    stats['text_path'] = str(text_path)
+    stats['llm_input_dir'] = str(llm_input_dir)
+    return stats
+
+
+def _stream_to_store(name, input_path, output_dir, max_size, log, max_tokens, pages):
+    store_dir = output_dir / 'chunks'
+
+    def on_page(count):
+        if log and count % 500 == 0:
+            log(f"Streamed {count} pages...")
+
+    start = time.perf_counter()
+    separator = backends.get_backend(name).separator
+    metadata = {'source': str(input_path), 'backend': name, 'max_size': max_size}
+    if max_tokens:
+        metadata.update(max_tokens=max_tokens, estimator=get_estimator().name)
+    with ChunkStoreWriter(store_dir, metadata) as writer:
+        stats = stream_to_files(pages, None, writer, separator, max_size, on_page, max_tokens)
+    stats['elapsed'] = time.perf_counter() - start
+    stats['store_dir'] = str(store_dir)
+    return stats
@@ -0,0 +1,286 @@
+"""Supervised extraction that isolates pathological pages.
+
+Pages are extracted in small groups by long-lived worker processes. Each
+group has a wall-clock limit of ``timeout`` seconds, and each worker an
+address-space limit of ``memory_mb`` (POSIX only; the limit covers the whole
+worker, including the libraries it inherited). A worker that overruns, dies
+or raises is killed and replaced, so one bad page cannot stall or take down
+the document.
+
+A failed group is split and retried a page at a time to find the bad page.
+A page that fails on its own is retried once with a cheaper backend
+(``FALLBACKS``); if that fails too the page is left empty and marked
+``failed`` in ``raw/extraction-manifest.json`` while the rest of the document
+completes. The report also lists the slow groups (over ``SLOW_FRACTION`` of
+the limit), and failures are counted in ``extract_page_failures_total``.
+"""
+import json
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from . import backends, mapped, metrics
+from .chunking import DEFAULT_MAX_SIZE
+from .parallel import PAGE_COUNTS, default_workers
+from .streaming import ChunkWriter, stream_to_files
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MEMORY_MB = 2048
+DEFAULT_GROUP_PAGES = 20
+SLOW_FRACTION = 0.5
+
+# Cheaper backend to retry a failed page with
+FALLBACKS = {'pdfminer': 'fitz', 'fitz': 'pikepdf'}
+
+
+def _limit_memory(memory_mb):
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _serve(conn, input_path, memory_mb):
+    _limit_memory(memory_mb)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        name, page_numbers, options = job
+        try:
+            pages = list(backends.get_backend(name).pages(input_path, page_numbers=page_numbers, **options))
+        except Exception as e:
+            # Includes MemoryError from the address-space limit
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+        else:
+            conn.send(('ok', pages))
+
+
+def _backend_options(name, options=None):
+    options = dict(options or {})
+    if name == 'fitz':
+        # Workers serve many groups, so keep the document open between them
+        options.setdefault('keep_open', True)
+    return options
+
+
+class _Job:
+    def __init__(self, backend, pages, options):
+        self.backend = backend
+        self.pages = pages
+        self.options = options
+
+
+class _Worker:
+    def __init__(self, input_path, memory_mb):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve, args=(child, input_path, memory_mb), daemon=True)
+        self.process.start()
+        child.close()
+        self.job = None
+        self.started = self.deadline = None
+
+    def submit(self, job, timeout):
+        self.job = job
+        self.started = time.perf_counter()
+        self.deadline = time.monotonic() + timeout
+        self.conn.send((job.backend, job.pages, job.options))
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join()
+        self.conn.close()
+
+
+class PageSupervisor:
+    """Extract a document's pages in supervised worker processes."""
+
+    def __init__(self, name, input_path, timeout=DEFAULT_TIMEOUT, memory_mb=DEFAULT_MEMORY_MB,
+                 group_pages=DEFAULT_GROUP_PAGES, workers=None, fallback=True, **options):
+        if name not in PAGE_COUNTS:
+            raise ValueError(f"Supervised extraction needs a backend that extracts page ranges: "
+                             f"{', '.join(PAGE_COUNTS)}")
+        backends.get_backend(name)
+        self.name = name
+        self.input_path = str(input_path)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.group_pages = max(1, group_pages)
+        self.workers = workers or default_workers()
+        self.fallback = FALLBACKS.get(name) if fallback else None
+        if self.fallback and not backends.get_backend(self.fallback).available():
+            self.fallback = None
+        self.options = _backend_options(name, options)
+
+    def run(self):
+        """Return ``(pages, report)``; failed pages are empty strings."""
+        start = time.perf_counter()
+        with mapped.shared(self.input_path):
+            count = PAGE_COUNTS[self.name](self.input_path)
+            self.pages = [''] * count
+            self.manifest = [None] * count
+            self.errors = [[] for _ in range(count)]
+            self.report = {
+                'backend': self.name, 'fallback': self.fallback, 'pages': count, 'timeout': self.timeout,
+                'memory_mb': self.memory_mb, 'group_pages': self.group_pages,
+                'ok': 0, 'recovered': 0, 'failed': 0, 'retries': 0,
+                'failures': {'timeout': 0, 'crash': 0, 'error': 0},
+                'failed_pages': [], 'recovered_pages': [], 'slow': [],
+            }
+            self.queue = deque(_Job(self.name, list(range(first, min(first + self.group_pages, count))),
+                                    self.options)
+                               for first in range(0, count, self.group_pages))
+            self._supervise(max(1, min(self.workers, len(self.queue))))
+        self.report['failed_pages'].sort()
+        self.report['recovered_pages'].sort()
+        self.report['elapsed'] = time.perf_counter() - start
+        self.report['page_status'] = self.manifest
+        return self.pages, self.report
+
+    def _supervise(self, size):
+        idle = []
+        busy = []
+        try:
+            while self.queue or busy:
+                while self.queue and len(busy) < size:
+                    worker = idle.pop() if idle else _Worker(self.input_path, self.memory_mb)
+                    job = self.queue.popleft()
+                    try:
+                        worker.submit(job, self.timeout)
+                    except OSError:
+                        worker.stop(kill=True)
+                        self._retry(job, 'crash', 'worker exited before the job was sent', 0.0)
+                        continue
+                    busy.append(worker)
+                if not busy:
+                    continue
+                remaining = max(0.0, min(worker.deadline for worker in busy) - time.monotonic())
+                ready = wait([worker.conn for worker in busy], remaining)
+                for worker in list(busy):
+                    if worker.conn in ready:
+                        try:
+                            status, payload = worker.conn.recv()
+                        except EOFError:
+                            worker.process.join()
+                            status, payload = 'crash', f"worker exited with code {worker.process.exitcode}"
+                    elif time.monotonic() >= worker.deadline:
+                        status, payload = 'timeout', f"no result after {self.timeout:g}s"
+                    else:
+                        continue
+                    busy.remove(worker)
+                    elapsed = time.perf_counter() - worker.started
+                    if status == 'ok' and len(payload) != len(worker.job.pages):
+                        status, payload = 'error', f"expected {len(worker.job.pages)} pages, got {len(payload)}"
+                    if status == 'ok':
+                        idle.append(worker)
+                        self._record(worker.job, payload, elapsed)
+                    else:
+                        # A worker that failed may be hung or left in a bad state
+                        worker.stop(kill=True)
+                        self._retry(worker.job, status, payload, elapsed)
+        finally:
+            for worker in idle:
+                worker.stop()
+            for worker in busy:
+                worker.stop(kill=True)
+
+    def _record(self, job, texts, elapsed):
+        per_page = elapsed / len(job.pages)
+        for number, text in zip(job.pages, texts):
+            status = 'ok' if job.backend == self.name else 'recovered'
+            entry = {'page': number + 1, 'status': status, 'backend': job.backend, 'seconds': round(per_page, 4)}
+            if self.errors[number]:
+                entry['errors'] = self.errors[number]
+            self.pages[number] = text
+            self.manifest[number] = entry
+            self.report[status] += 1
+            if status == 'recovered':
+                self.report['recovered_pages'].append(number + 1)
+            metrics.PAGE_SECONDS.observe(per_page, backend=job.backend)
+        if elapsed > self.timeout * SLOW_FRACTION:
+            self.report['slow'].append({'pages': [job.pages[0] + 1, job.pages[-1] + 1], 'backend': job.backend,
+                                        'seconds': round(elapsed, 3)})
+
+    def _retry(self, job, status, error, elapsed):
+        self.report['failures'][status] += 1
+        metrics.PAGE_FAILURES.inc(backend=job.backend, reason=status)
+        attempt = {'backend': job.backend, 'status': status, 'error': error, 'seconds': round(elapsed, 3)}
+        if len(job.pages) > 1:
+            attempt['group'] = [job.pages[0] + 1, job.pages[-1] + 1]
+        for number in job.pages:
+            self.errors[number].append(attempt)
+
+        if len(job.pages) > 1:
+            # Retry the pages one at a time to isolate the bad one
+            self.queue.extendleft(_Job(job.backend, [number], job.options) for number in reversed(job.pages))
+        elif job.backend == self.name and self.fallback:
+            self.report['retries'] += 1
+            self.queue.appendleft(_Job(self.fallback, job.pages, _backend_options(self.fallback)))
+        else:
+            number = job.pages[0]
+            self.manifest[number] = {'page': number + 1, 'status': 'failed', 'backend': None,
+                                     'errors': self.errors[number]}
+            self.report['failed'] += 1
+            self.report['failed_pages'].append(number + 1)
+
+
+def supervised_pages(name, input_path, timeout=DEFAULT_TIMEOUT, memory_mb=DEFAULT_MEMORY_MB,
+                     group_pages=DEFAULT_GROUP_PAGES, workers=None, fallback=True, **options):
+    """Extract ``input_path`` under supervision and return ``(pages, report)`` (see ``PageSupervisor``)."""
+    return PageSupervisor(name, input_path, timeout, memory_mb, group_pages, workers, fallback, **options).run()
+
+
+def write_manifest(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def summary(report):
+    """The report without the per-page entries."""
+    return {key: value for key, value in report.items() if key != 'page_status'}
+
+
+def supervised_extract(name, input_path, output_dir, max_size=DEFAULT_MAX_SIZE, log=None, max_tokens=None,
+                       **kwargs):
+    """Extract ``input_path`` into ``output_dir`` under supervision, as ``stream_extract`` lays it out.
+
+    The per-page manifest goes to ``raw/extraction-manifest.json``.
+    """
+    output_dir = Path(output_dir)
+    llm_input_dir = output_dir / 'llm-input'
+    raw_dir = output_dir / 'raw'
+    text_path = raw_dir / 'extracted-text.txt'
+    llm_input_dir.mkdir(parents=True, exist_ok=True)
+    raw_dir.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    pages, report = supervised_pages(name, input_path, **kwargs)
+    if log and (report['failed'] or report['recovered']):
+        log(f"{report['failed']} pages failed ({report['failed_pages'][:20]}), "
+            f"{report['recovered']} recovered with {report['fallback']}")
+    writer = ChunkWriter(llm_input_dir)
+    stats = stream_to_files(pages, text_path, writer, backends.get_backend(name).separator, max_size,
+                            max_tokens=max_tokens)
+    if max_tokens:
+        writer.write_metadata(raw_dir / 'chunks.json', max_tokens)
+    manifest_path = raw_dir / 'extraction-manifest.json'
+    write_manifest(report, manifest_path)
+
+    stats.update(supervision=summary(report), elapsed=time.perf_counter() - start, text_path=str(text_path),
+                 llm_input_dir=str(llm_input_dir), manifest_path=str(manifest_path))
+    return stats
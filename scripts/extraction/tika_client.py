@@ -0,0 +1,120 @@
+"""Client for a long-running local Tika server.
+
+``tika.parser.from_file`` may start or probe a Tika JVM on every script run
+and opens a new connection per document. ``TikaClient`` instead keeps a pooled
+keep-alive HTTP session to a server started once (``java -jar
+tika-server.jar``), sends up to ``pool_size`` documents at once with
+``extract_many``, and retries connection errors and 5xx responses with
+exponential backoff.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import backends
+
+DEFAULT_SERVER = os.environ.get('TIKA_SERVER_ENDPOINT', 'http://localhost:9998')
+READ_SIZE = 64 * 1024
+
+
+class TikaError(Exception):
+    pass
+
+
+class TikaClient:
+    def __init__(self, server=DEFAULT_SERVER, pool_size=4, connect_timeout=5, read_timeout=300,
+                 retries=3, backoff=0.5):
+        requests = backends.load_module('requests')
+        adapters = backends.load_module('requests.adapters')
+        self.server = server.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self._requests = requests
+        self.session = requests.Session()
+        adapter = adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _put(self, input_path, stream=False):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            try:
+                with open(input_path, 'rb') as fin:
+                    response = self.session.put(f"{self.server}/tika", data=fin, stream=stream,
+                                                timeout=self.timeout, headers={'Accept': 'text/plain'})
+            except (self._requests.ConnectionError, self._requests.Timeout) as e:
+                last_error = e
+                continue
+            if response.status_code >= 500:
+                last_error = TikaError(f"Tika server returned {response.status_code}")
+                response.close()
+                continue
+            if response.status_code != 200:
+                response.close()
+                raise TikaError(f"Tika server returned {response.status_code} for {input_path}")
+            response.encoding = 'utf-8'
+            return response
+        raise TikaError(f"Tika request failed after {self.retries + 1} attempts: {last_error}")
+
+    def extract(self, input_path):
+        """Return the plain text of one document."""
+        response = self._put(input_path)
+        text = response.text
+        if not text.strip():
+            raise TikaError(f"Failed to extract text from PDF: {input_path}")
+        return text
+
+    def stream(self, input_path):
+        """Yield the plain text of one document as it arrives."""
+        with self._put(input_path, stream=True) as response:
+            for piece in response.iter_content(chunk_size=READ_SIZE, decode_unicode=True):
+                if piece:
+                    yield piece
+
+    def extract_many(self, paths, concurrency=None, handle=None):
+        """Extract several documents concurrently.
+
+        Returns ``(path, result, error)`` tuples in input order; a failure is
+        reported in ``error`` and does not stop the others. ``result`` is the
+        text or, with ``handle``, what ``handle(path, text, seconds)`` returns.
+        ``handle`` runs in the request's thread as each document arrives, so
+        texts can be written out instead of held until all are done.
+        """
+        def run(path):
+            try:
+                start = time.perf_counter()
+                text = self.extract(path)
+                return path, handle(path, text, time.perf_counter() - start) if handle else text, None
+            except Exception as e:
+                return path, None, e
+
+        with ThreadPoolExecutor(max_workers=concurrency or self.pool_size) as pool:
+            return list(pool.map(run, paths))
+
+    def is_alive(self):
+        try:
+            response = self.session.get(f"{self.server}/tika", timeout=self.timeout)
+            return response.status_code == 200
+        except self._requests.RequestException:
+            return False
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(server=DEFAULT_SERVER, **settings):
+    """Return a shared client for ``server``, so long-lived processes reuse its connections."""
+    with _clients_lock:
+        client = _clients.get(server)
+        if client is None:
+            client = _clients[server] = TikaClient(server, **settings)
+        return client
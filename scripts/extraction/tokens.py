@@ -0,0 +1,84 @@
+"""Token estimates for packing chunks to a token budget.
+
+``src/services/chunk-monitoring.js`` judges chunking in tokens, not
+characters, so token-budgeted chunking (``chunking.iter_token_chunk_spans``)
+needs a count that is cheap enough to run on every paragraph. When
+``tiktoken`` is installed its ``cl100k_base`` encoding is used, counting each
+batch of paragraphs in one call. Otherwise a regex estimate is used: runs of
+up to six letters, groups of up to three digits, line breaks and single
+symbols each count as one token. This tracks BPE counts on English prose
+more closely than ``len(text) / 4`` and errs on the high side.
+
+Counts are cached per paragraph text, so headers and boilerplate repeated
+across a report are only counted once.
+"""
+import re
+from collections import OrderedDict
+
+# Per-chunk budget used by src/services/ai.js (MAX_CHUNK_SIZE) and the
+# "ideal chunk" in chunk-monitoring.js, below its 180k TOKEN_LIMIT_WARNING
+DEFAULT_MAX_TOKENS = 150000
+DEFAULT_ENCODING = 'cl100k_base'
+CACHE_SIZE = 8192
+HEURISTIC = re.compile(r'[^\W\d_]{1,6}|\d{1,3}|\n+|[^\s\w]|_')
+HEURISTIC_NAME = 'heuristic1'
+
+_estimator = None
+
+
+def _tiktoken_encoding(name):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding(name)
+
+
+class TokenEstimator:
+    """Count tokens for batches of texts, caching the count of each text."""
+
+    def __init__(self, encoding=DEFAULT_ENCODING, cache_size=CACHE_SIZE):
+        self._encoding = _tiktoken_encoding(encoding) if encoding else None
+        self.name = f'tiktoken:{encoding}' if self._encoding else HEURISTIC_NAME
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _count_uncached(self, texts):
+        if self._encoding is not None:
+            return [len(tokens) for tokens in self._encoding.encode_ordinary_batch(texts)]
+        return [len(HEURISTIC.findall(text)) for text in texts]
+
+    def count_batch(self, texts):
+        counts = []
+        missing = []
+        for text in texts:
+            count = self._cache.get(text)
+            if count is None:
+                missing.append(len(counts))
+            else:
+                self._cache.move_to_end(text)
+            counts.append(count)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            fresh = self._count_uncached([texts[i] for i in missing])
+            for i, count in zip(missing, fresh):
+                counts[i] = count
+                self._cache[texts[i]] = count
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return counts
+
+    def count(self, text):
+        return self.count_batch([text])[0]
+
+
+def get_estimator():
+    """Return the shared estimator, creating it on first use."""
+    global _estimator
+    if _estimator is None:
+        _estimator = TokenEstimator()
+    return _estimator
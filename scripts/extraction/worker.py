@@ -0,0 +1,337 @@
+"""Long-lived extraction worker and a small pool of worker processes.
+
+A worker reads framed JSON requests from stdin and answers each one on stdout
+(see ``protocol.py``). Backends stay imported between requests and recently
+used PyMuPDF documents stay open, so repeated calls skip interpreter startup,
+imports and re-opening the file.
+
+Requests::
+
+    {"id": 1, "op": "extract", "backend": "fitz", "file": "report.pdf"}
+    {"id": 2, "op": "ping"}
+    {"id": 3, "op": "cache_stats"}
+    {"id": 4, "op": "race", "backends": ["fitz", "pdfminer"], "file": "report.pdf"}
+    {"id": 5, "op": "scan", "file": "report.pdf"}
+    {"id": 6, "op": "metrics"}
+    {"id": 7, "op": "backends"}
+    {"id": 8, "op": "shutdown"}
+
+Extraction results are served from the on-disk cache (``cache.py``) unless
+the request sets ``"cache": false``. An extract request with ``"max_tokens"``
+packs chunks to that token budget and the response adds ``chunk_tokens`` and
+``total_tokens``. With ``"dedup": true`` near-duplicate messages are replaced
+by references before chunking (``dedup.py``) and the response adds the
+``dedup`` report; these chunks are not cached. With ``"supervise": true``
+pages are extracted by supervised processes that are killed when a page
+group hangs or crashes (``supervised.py``; limits in ``"page_timeout"``,
+``"page_memory"`` and ``"page_group"``). Bad pages are retried with a
+cheaper backend or left empty, and the response adds the ``supervision``
+report with the failed, recovered and slow pages. The ``metrics`` op returns
+the worker's Prometheus metrics (``metrics.py``) as text. The ``backends`` op
+lists every backend and whether it is installed without importing any of
+them, so it makes a cheap health check.
+"""
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from . import backends, metrics
+from .cache import ExtractionCache, cached_extract, file_sha256
+from .chunking import DEFAULT_MAX_SIZE, chunk_pages, chunk_pages_by_tokens, chunk_text
+from .dedup import DedupIndex, dedup_pages
+from .protocol import read_message, write_message
+from .race import race_extract
+from .routing import scan
+from .supervised import summary, supervised_pages
+from .tokens import get_estimator
+
+WORKER_SCRIPT = Path(__file__).resolve().parent.parent / 'extract_worker.py'
+
+_cache = None
+_dedup_index = None
+
+
+def log(msg):
+    # stdout carries the protocol, so worker logs go to stderr
+    print(f"[LOG] {msg}", file=sys.stderr, flush=True)
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = ExtractionCache()
+    return _cache
+
+
+def get_dedup_index():
+    global _dedup_index
+    if _dedup_index is None:
+        _dedup_index = DedupIndex()
+    return _dedup_index
+
+
+def dedup_chunks(name, input_path, result, max_size, max_tokens):
+    """Replace near-duplicates in ``result``'s pages and re-chunk them in place."""
+    backend = backends.get_backend(name)
+    with metrics.stage(name, 'dedup'):
+        pages, report = dedup_pages(result['pages'], backend.separator, doc=file_sha256(input_path),
+                                    name=os.path.basename(input_path), index=get_dedup_index())
+    rechunk(name, result, pages, max_size, max_tokens)
+    return report
+
+
+def rechunk(name, result, pages, max_size, max_tokens):
+    """Set ``result``'s chunks (and token counts) from ``pages``."""
+    separator = backends.get_backend(name).separator
+    with metrics.stage(name, 'chunk'):
+        if max_tokens:
+            chunks = list(chunk_pages_by_tokens(pages, max_tokens, separator))
+            result['chunks'] = [chunk for chunk, _ in chunks]
+            result['chunk_tokens'] = [tokens for _, tokens in chunks]
+        else:
+            result['chunks'] = list(chunk_pages(pages, max_size, separator))
+
+
+def supervised_extract(name, input_path, request, max_size, max_tokens, options):
+    """Extract under supervision (``supervised.py``) and return the result and report summary."""
+    settings = {key: request[field] for field, key in (('page_timeout', 'timeout'), ('page_memory', 'memory_mb'),
+                                                       ('page_group', 'group_pages')) if request.get(field)}
+    with metrics.stage(name, 'extract'):
+        pages, report = supervised_pages(name, input_path, **settings, **options)
+    result = {'pages': pages, 'text': backends.get_backend(name).join(pages), 'cached': False}
+    rechunk(name, result, pages, max_size, max_tokens)
+    return result, summary(report)
+
+
+def handle_extract(request):
+    name = request['backend']
+    input_path = request['file']
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"PDF file not found: {input_path}")
+
+    options = dict(request.get('options') or {})
+    if name == 'fitz':
+        options.setdefault('keep_open', True)
+    elif name == 'tika' and os.environ.get('TIKA_SERVER_ENDPOINT'):
+        options.setdefault('server', os.environ['TIKA_SERVER_ENDPOINT'])
+
+    start = time.perf_counter()
+    cache = get_cache() if request.get('cache', True) else None
+    max_size = request.get('max_size', DEFAULT_MAX_SIZE)
+    max_tokens = request.get('max_tokens')
+    supervision = None
+    if request.get('supervise'):
+        # Failed pages come back empty, so supervised results are never cached
+        result, supervision = supervised_extract(name, input_path, request, max_size, max_tokens, options)
+    else:
+        result = cached_extract(name, input_path, cache, max_size, max_tokens, **options)
+    report = dedup_chunks(name, input_path, result, max_size, max_tokens) if request.get('dedup') else None
+    response = {
+        'backend': name,
+        'file': input_path,
+        'page_count': len(result['pages']),
+        'text': result['text'],
+        'chunks': result['chunks'],
+        'cached': result['cached'],
+        'elapsed': time.perf_counter() - start,
+    }
+    if max_tokens:
+        response.update(chunk_tokens=result['chunk_tokens'], total_tokens=sum(result['chunk_tokens']),
+                        token_estimator=get_estimator().name)
+    if report is not None:
+        response['dedup'] = report
+    if supervision is not None:
+        response['supervision'] = supervision
+    return response
+
+
+def handle_race(request):
+    input_path = request['file']
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"PDF file not found: {input_path}")
+
+    result = race_extract(input_path, request['backends'], timeout=request.get('timeout'),
+                          require_ofw=request.get('require_ofw', False), options=request.get('options'))
+    return {
+        'backend': result['backend'],
+        'file': input_path,
+        'page_count': len(result['pages']),
+        'text': result['text'],
+        'chunks': chunk_text(result['text'], request.get('max_size', DEFAULT_MAX_SIZE)),
+        'score': result['score'],
+        'attempts': result['attempts'],
+        'elapsed': result['elapsed'],
+    }
+
+
+def handle(request):
+    op = request.get('op', 'extract')
+    response = {'id': request.get('id'), 'ok': True}
+    try:
+        if op == 'extract':
+            response.update(handle_extract(request))
+        elif op == 'race':
+            response.update(handle_race(request))
+        elif op == 'scan':
+            if not os.path.exists(request['file']):
+                raise FileNotFoundError(f"PDF file not found: {request['file']}")
+            response['plan'] = scan(request['file'])
+        elif op == 'ping':
+            response.update({'pid': os.getpid(), 'loaded': backends.loaded_modules()})
+        elif op == 'cache_stats':
+            response['cache'] = get_cache().stats()
+        elif op == 'backends':
+            response['backends'] = backends.list_backends()
+        elif op == 'metrics':
+            response['metrics'] = metrics.REGISTRY.render()
+        elif op == 'shutdown':
+            response['shutdown'] = True
+        else:
+            raise ValueError(f"Unknown op: {op}")
+    except Exception as e:
+        response.update({
+            'ok': False,
+            'error': str(e),
+            'error_type': type(e).__name__,
+            'traceback': traceback.format_exc(),
+        })
+    return response
+
+
+def preload(names):
+    for name in names:
+        backend = backends.get_backend(name)
+        if backend.module is None:
+            continue
+        try:
+            backends.load_module(backend.module)
+            log(f"Preloaded {name}")
+        except ImportError as e:
+            log(f"Could not preload {name}: {e}")
+
+
+def serve(stdin=None, stdout=None, preload_names=()):
+    """Answer requests until stdin closes or a shutdown request arrives."""
+    stdin = stdin or sys.stdin.buffer
+    if stdout is None:
+        # Move the protocol onto a private descriptor and point fd 1 at
+        # stderr, so stray output from backends (Python prints, import-time
+        # warnings, native library messages) cannot corrupt the stream
+        sys.stdout.flush()
+        stdout = os.fdopen(os.dup(1), 'wb')
+        os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    preload(preload_names)
+    try:
+        while True:
+            request = read_message(stdin)
+            if request is None:
+                break
+            response = handle(request)
+            write_message(stdout, response)
+            if response.get('shutdown'):
+                break
+    finally:
+        backends.close_documents()
+
+
+class WorkerProcess:
+    def __init__(self, preload=(), python=None):
+        cmd = [python or sys.executable, str(WORKER_SCRIPT)]
+        if preload:
+            cmd += ['--preload', ','.join(preload)]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self._next_id = 0
+
+    def request(self, message):
+        self._next_id += 1
+        message = dict(message, id=self._next_id)
+        write_message(self.process.stdin, message)
+        response = read_message(self.process.stdout)
+        if response is None:
+            raise EOFError(f"Worker {self.process.pid} exited with code {self.process.wait()}")
+        return response
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.request({'op': 'shutdown'})
+            except (OSError, EOFError):
+                pass
+        for stream in (self.process.stdin, self.process.stdout):
+            stream.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+
+
+class WorkerPool:
+    """A fixed number of worker processes shared between threads."""
+
+    def __init__(self, size=2, preload=(), python=None):
+        self._preload = tuple(preload)
+        self._python = python
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        worker = WorkerProcess(self._preload, self._python)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _discard(self, worker):
+        worker.kill()
+        with self._lock:
+            self._workers.remove(worker)
+
+    def request(self, message):
+        worker = self._idle.get()
+        try:
+            response = worker.request(message)
+        except (OSError, EOFError, ValueError):
+            # A broken worker is replaced rather than returned to the pool
+            self._discard(worker)
+            worker = self._spawn()
+            raise
+        finally:
+            self._idle.put(worker)
+        return response
+
+    def extract(self, backend, input_path, **options):
+        response = self.request({
+            'op': 'extract',
+            'backend': backend,
+            'file': str(input_path),
+            'options': options,
+        })
+        if not response['ok']:
+            raise RuntimeError(f"{backend} extraction failed: {response['error']}")
+        return response
+
+    def close(self):
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,38 +1,85 @@
 import os
 import sys
+import argparse
 from pathlib import Path
-import fitz  # PyMuPDF
-import re
+
+from extraction import metrics
+from extraction.backends import open_fitz
+from extraction.cache import ExtractionCache, file_sha256
+from extraction.checkpoint import DEFAULT_RANGE_PAGES, checkpoint_extract
+from extraction.chunking import chunk_pages_by_tokens, chunk_text
+from extraction.dedup import DedupIndex, dedup_pages, write_report
+from extraction.incremental import incremental_extract
+from extraction.messages import segment_pages, write_messages
+from extraction.streaming import ChunkWriter, stream_extract
+from extraction.parallel import default_workers, fitz_pages_parallel
+from extraction.progress import Progress
+from extraction.search import SearchIndex
 
 def log(msg):
     print(f"[LOG] {msg}", flush=True)
 
-def chunk_text(text, max_size=100000):
-    chunks = []
-    current_chunk = ""
-    
-    # Split into paragraphs
-    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
-    
-    for paragraph in paragraphs:
-        if len(current_chunk) + len(paragraph) + 2 > max_size:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = paragraph
-        else:
-            current_chunk = f"{current_chunk}\n\n{paragraph}" if current_chunk else paragraph
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+def make_chunks(pages, max_tokens=None):
+    """Return the chunks of ``pages`` and, with ``max_tokens``, their token counts."""
+    if max_tokens:
+        token_chunks = list(chunk_pages_by_tokens(pages, max_tokens))
+        return [chunk for chunk, _ in token_chunks], [tokens for _, tokens in token_chunks]
+    return chunk_text('\n\n'.join(pages)), None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract text from a PDF with PyMuPDF")
+    parser.add_argument('input', nargs='?', help="PDF to extract (default: test-data/OFW_Messages_Report_Dec.pdf)")
+    parser.add_argument('--output-dir', help="Output directory (default: test-data/processed)")
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help="Worker processes for page-parallel extraction (1 = serial, default: CPU count)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write pages to the output files as they are extracted (bounded memory)")
+    parser.add_argument('--chunk-store', action='store_true',
+                        help="Stream chunks into one chunks/chunks.txt blob plus manifest instead of chunk files")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always re-extract instead of reusing a cached result")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-extract pages that are new or changed since the last run")
+    parser.add_argument('--checkpoint', action='store_true',
+                        help="Commit pages in ranges under OUTPUT_DIR/raw/checkpoint as they are extracted, "
+                             "so an interrupted run can be resumed")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted --checkpoint run from its last committed page")
+    parser.add_argument('--checkpoint-pages', type=int, default=DEFAULT_RANGE_PAGES,
+                        help=f"Pages per checkpointed range (default: {DEFAULT_RANGE_PAGES})")
+    parser.add_argument('--max-tokens', type=int,
+                        help="Pack chunks to this many estimated tokens instead of 100,000 characters")
+    parser.add_argument('--metrics-file',
+                        help="Write Prometheus metrics here when done (node-exporter textfile collector)")
+    parser.add_argument('--messages', action='store_true',
+                        help="Also split the report into OUTPUT_DIR/messages.jsonl")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Replace near-duplicate messages in the chunks with references "
+                             "(report in raw/dedup-report.json)")
+    parser.add_argument('--index', action='store_true',
+                        help="Add the report's messages (or pages) to the full-text search index")
+    args = parser.parse_args()
+    if args.index and (args.stream or args.chunk_store or args.incremental):
+        parser.error("--index cannot be combined with --stream, --chunk-store or --incremental")
+    if args.dedup and (args.stream or args.chunk_store or args.incremental):
+        parser.error("--dedup cannot be combined with --stream, --chunk-store or --incremental")
+    if args.messages and (args.stream or args.chunk_store or args.incremental):
+        parser.error("--messages cannot be combined with --stream, --chunk-store or --incremental")
+    if args.max_tokens and args.incremental:
+        parser.error("--max-tokens cannot be combined with --incremental")
+    if (args.checkpoint or args.resume) and (args.stream or args.chunk_store or args.incremental or args.dedup
+                                             or args.index or args.messages):
+        parser.error("--checkpoint and --resume cannot be combined with --stream, --chunk-store, --incremental, "
+                     "--dedup, --index or --messages")
+    return args
 
 def main():
+    args = parse_args()
     try:
         # Setup paths using absolute paths
         script_dir = Path(__file__).resolve().parent
-        input_path = script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
-        output_dir = script_dir.parent / 'test-data' / 'processed'
+        input_path = Path(args.input) if args.input else script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
+        output_dir = Path(args.output_dir) if args.output_dir else script_dir.parent / 'test-data' / 'processed'
         
         # Print absolute paths for debugging
         log(f"Current working directory: {os.getcwd()}")
@@ -57,52 +104,162 @@ def main():
         os.makedirs(raw_dir, exist_ok=True)
         log("Created output directories")
         
-        # Extract text using PyMuPDF with detailed error handling
-        log("Opening PDF...")
-        try:
-            pdf = fitz.open(str(input_path.resolve()))
-            log(f"PDF opened successfully. Pages: {len(pdf)}")
-        except Exception as e:
-            log(f"Error opening PDF: {str(e)}")
-            log(f"Error type: {type(e).__name__}")
-            if hasattr(e, 'args'):
-                log(f"Error args: {e.args}")
-            raise
-        
-        # Extract text from each page with error handling
-        log("Extracting text...")
-        text_parts = []
-        for i in range(len(pdf)):
+        if args.incremental:
+            log("Extracting new or changed pages...")
+            stats = incremental_extract('fitz', input_path, output_dir, log=log)
+            log("Processing complete!")
+            log(f"- Raw text: {stats['text_path']} ({stats['reused']} pages reused, {stats['extracted']} extracted)")
+            log(f"- {stats['chunks']} chunks in: {stats['llm_input_dir']} ({stats['chunks_written']} rewritten)")
+            return
+        
+        if args.checkpoint or args.resume:
+            log("Extracting with page-range checkpoints...")
+            stats = checkpoint_extract('fitz', input_path, output_dir, log=log, resume=args.resume,
+                                       range_pages=args.checkpoint_pages, max_tokens=args.max_tokens,
+                                       workers=args.workers)
+            log("Processing complete!")
+            if stats['resumed']:
+                log(f"- Resumed after page {stats['resumed']}, extracted {stats['extracted']} more")
+            log(f"- Raw text: {stats['text_path']} ({stats['pages']} pages, {stats['chars']:,} chars)")
+            log(f"- Created {stats['chunks']} chunks in: {stats['llm_input_dir']}")
+            return
+        
+        if args.chunk_store:
+            log("Streaming chunks to a single-file chunk store...")
+            stats = stream_extract('fitz', input_path, output_dir, log=log, chunk_store=True,
+                                   max_tokens=args.max_tokens, workers=args.workers)
+            log("Processing complete!")
+            log(f"- Chunk store: {stats['store_dir']} ({stats['pages']} pages, {stats['chunks']} chunks)")
+            return
+        
+        if args.stream:
+            log("Streaming pages to output files...")
+            stats = stream_extract('fitz', input_path, output_dir, log=log, max_tokens=args.max_tokens,
+                                   workers=args.workers)
+            log("Processing complete!")
+            log(f"- Raw text: {stats['text_path']} ({stats['pages']} pages, {stats['chars']:,} chars)")
+            log(f"- Created {stats['chunks']} chunks in: {stats['llm_input_dir']}")
+            return
+        
+        # Reuse a previous extraction of the same file and settings
+        cache = None if args.no_cache else ExtractionCache()
+        cache_key = cache.key('fitz', input_path, max_tokens=args.max_tokens) if cache else None
+        cached = cache.get(cache_key) if cache else None
+        
+        if cached:
+            log(f"Cache hit: reusing {len(cached['pages'])} pages and {len(cached['chunks'])} chunks")
+            text_parts = cached['pages']
+            full_text = '\n\n'.join(text_parts)
+            chunks = cached['chunks']
+            chunk_tokens = cached.get('chunk_tokens')
+        else:
+            # Extract text using PyMuPDF with detailed error handling
+            log("Opening PDF...")
             try:
-                log(f"Processing page {i+1}/{len(pdf)}...")
-                page = pdf[i]
-                text = page.get_text()
-                if not text.strip():
-                    log(f"Warning: Page {i+1} appears to be empty")
-                text_parts.append(text)
+                with metrics.stage('fitz', 'open'):
+                    # Zero-copy: PyMuPDF reads the pages straight from a memory map of the file
+                    pdf = open_fitz(input_path.resolve())
+                log(f"PDF opened successfully. Pages: {len(pdf)}")
             except Exception as e:
-                log(f"Error processing page {i+1}: {str(e)}")
+                log(f"Error opening PDF: {str(e)}")
+                log(f"Error type: {type(e).__name__}")
+                if hasattr(e, 'args'):
+                    log(f"Error args: {e.args}")
                 raise
+            
+            # Extract text from each page with error handling
+            log("Extracting text...")
+            progress = Progress('extract', total=len(pdf))
+            with metrics.stage('fitz', 'extract'):
+                if args.workers > 1:
+                    log(f"Extracting {len(pdf)} pages with {args.workers} worker processes...")
+                    pages = fitz_pages_parallel(input_path.resolve(), args.workers)
+                    text_parts = []
+                    for text in metrics.instrument_pages('fitz', pages):
+                        text_parts.append(text)
+                        progress.update()
+                    empty = [i + 1 for i, text in enumerate(text_parts) if not text.strip()]
+                    if empty:
+                        log(f"Warning: {len(empty)} pages appear to be empty: {empty[:20]}")
+                else:
+                    text_parts = []
+                    try:
+                        for text in metrics.instrument_pages('fitz', (page.get_text() for page in pdf)):
+                            if not text.strip():
+                                log(f"Warning: Page {len(text_parts)+1} appears to be empty")
+                            text_parts.append(text)
+                            progress.update()
+                    except Exception as e:
+                        log(f"Error processing page {len(text_parts)+1}: {str(e)}")
+                        raise
+            progress.finish()
+            
+            # Combine text from all pages
+            full_text = '\n\n'.join(text_parts)
+            
+            # Create chunks
+            log("Creating chunks...")
+            with metrics.stage('fitz', 'chunk'):
+                chunks, chunk_tokens = make_chunks(text_parts, args.max_tokens)
+            if cache:
+                cache.put(cache_key, {'backend': 'fitz', 'pages': text_parts, 'chunks': chunks,
+                                      'chunk_tokens': chunk_tokens})
         
-        # Combine text from all pages
-        full_text = '\n\n'.join(text_parts)
+        if args.dedup:
+            # Deduped chunks depend on the index, so they are never cached
+            log("Replacing near-duplicate messages with references...")
+            index = DedupIndex()
+            try:
+                with metrics.stage('fitz', 'dedup'):
+                    deduped, report = dedup_pages(text_parts, doc=file_sha256(input_path), name=input_path.name,
+                                                  index=index)
+            finally:
+                index.close()
+            with metrics.stage('fitz', 'chunk'):
+                chunks, chunk_tokens = make_chunks(deduped, args.max_tokens)
+            report_path = raw_dir / 'dedup-report.json'
+            write_report(report, report_path)
+            log(f"Replaced {report['duplicates']} duplicates ({report['in_document']} in this report, "
+                f"{report['from_index']} from earlier ones): {report['chars_saved']:,} chars and "
+                f"~{report['tokens_saved']:,} tokens saved")
+            log(f"Dedup report saved to: {report_path}")
+        
+        with metrics.stage('fitz', 'write'):
+            # Save raw text
+            log("Saving raw text...")
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write(full_text)
+            log(f"Raw text saved to: {text_path}")
         
-        # Save raw text
-        log("Saving raw text...")
-        with open(text_path, 'w', encoding='utf-8') as f:
-            f.write(full_text)
-        log(f"Raw text saved to: {text_path}")
+            if args.messages:
+                messages_path = output_dir / 'messages.jsonl'
+                count = write_messages(segment_pages(text_parts), messages_path)
+                log(f"Saved {count} messages to: {messages_path}")
         
-        # Create chunks
-        log("Creating chunks...")
-        chunks = chunk_text(full_text)
+            # Save chunks
+            log(f"Saving {len(chunks)} chunks...")
+            if args.max_tokens:
+                writer = ChunkWriter(llm_input_dir)
+                for chunk, tokens in zip(chunks, chunk_tokens):
+                    writer.write(chunk, tokens=tokens)
+                writer.write_metadata(raw_dir / 'chunks.json', args.max_tokens)
+                log(f"Chunk token counts saved to: {raw_dir / 'chunks.json'} ({sum(chunk_tokens):,} tokens)")
+            else:
+                for i, chunk in enumerate(chunks, 1):
+                    chunk_path = llm_input_dir / f'chunk-{i:03d}.txt'
+                    with open(chunk_path, 'w', encoding='utf-8') as f:
+                        f.write(chunk)
         
-        # Save chunks
-        log(f"Saving {len(chunks)} chunks...")
-        for i, chunk in enumerate(chunks, 1):
-            chunk_path = llm_input_dir / f'chunk-{i:03d}.txt'
-            with open(chunk_path, 'w', encoding='utf-8') as f:
-                f.write(chunk)
+        if args.index:
+            index = SearchIndex()
+            try:
+                count = index.add(input_path, text_parts, file_sha256(input_path), 'fitz', text_path=text_path)
+            finally:
+                index.close()
+            if count is None:
+                log(f"Search index is up to date: {index.path}")
+            else:
+                log(f"Indexed {count} passages in: {index.path}")
         
         log("Processing complete!")
         log(f"- Raw text: {text_path}")
@@ -117,6 +274,8 @@ def main():
     finally:
         if 'pdf' in locals():
             pdf.close()
+        if args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
 
 if __name__ == '__main__':
     main()
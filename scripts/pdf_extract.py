@@ -2,25 +2,7 @@ import os
 import PyPDF2
 from pathlib import Path
 
-def chunk_text(text, max_size=100000):
-    chunks = []
-    current_chunk = ""
-    
-    # Split into paragraphs
-    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-    
-    for paragraph in paragraphs:
-        if len(current_chunk) + len(paragraph) + 2 > max_size:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = paragraph
-        else:
-            current_chunk = f"{current_chunk}\n\n{paragraph}" if current_chunk else paragraph
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+from extraction.chunking import iter_chunks
 
 def main():
     # Setup paths
@@ -49,7 +31,7 @@ def main():
     print(f'Saved raw text to: {raw_text_path}')
     
     # Create and save chunks
-    chunks = chunk_text(text)
+    chunks = list(iter_chunks(p.strip() for p in text.split('\n\n')))
     for i, chunk in enumerate(chunks, 1):
         chunk_path = llm_input_dir / f'chunk-{i:03d}.txt'
         with open(chunk_path, 'w', encoding='utf-8') as file:
@@ -1,40 +1,57 @@
 import os
 import sys
+import argparse
 from pathlib import Path
-from io import StringIO
-from pdfminer.high_level import extract_text_to_fp
-from pdfminer.layout import LAParams
-import re
+
+from extraction.backends import PDFMINER_PROFILES
+from extraction.cache import ExtractionCache, cached_extract
+from extraction.checkpoint import DEFAULT_RANGE_PAGES, checkpoint_extract
+from extraction.incremental import incremental_extract
+from extraction.parallel import default_workers
+from extraction.profiles import compare_pdfminer_profiles
+from extraction.streaming import stream_extract
 
 def log(msg):
     print(f"[LOG] {msg}", flush=True)
 
-def chunk_text(text, max_size=100000):
-    chunks = []
-    current_chunk = ""
-    
-    # Split into paragraphs
-    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
-    
-    for paragraph in paragraphs:
-        if len(current_chunk) + len(paragraph) + 2 > max_size:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = paragraph
-        else:
-            current_chunk = f"{current_chunk}\n\n{paragraph}" if current_chunk else paragraph
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract text from a PDF with pdfminer")
+    parser.add_argument('input', nargs='?', help="PDF to extract (default: test-data/OFW_Messages_Report_Dec.pdf)")
+    parser.add_argument('--output-dir', help="Output directory (default: test-data/processed)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write pages to the output files as they are extracted (bounded memory)")
+    parser.add_argument('--chunk-store', action='store_true',
+                        help="Stream chunks into one chunks/chunks.txt blob plus manifest instead of chunk files")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always re-extract instead of reusing a cached result")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-extract pages that are new or changed since the last run")
+    parser.add_argument('--checkpoint', action='store_true',
+                        help="Commit pages in ranges under OUTPUT_DIR/raw/checkpoint as they are extracted, "
+                             "so an interrupted run can be resumed")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted --checkpoint run from its last committed page")
+    parser.add_argument('--checkpoint-pages', type=int, default=DEFAULT_RANGE_PAGES,
+                        help=f"Pages per checkpointed range (default: {DEFAULT_RANGE_PAGES})")
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help="Worker processes for page-sharded extraction (1 = serial, default: CPU count)")
+    parser.add_argument('--profile', choices=sorted(PDFMINER_PROFILES), default='default',
+                        help="Layout analysis profile: default (vertical detection), fast (no vertical "
+                             "detection) or none (no layout analysis)")
+    parser.add_argument('--compare-profiles', action='store_true',
+                        help="Time every profile and report its output difference from the default, then exit")
+    args = parser.parse_args()
+    if (args.checkpoint or args.resume) and (args.stream or args.chunk_store or args.incremental):
+        parser.error("--checkpoint and --resume cannot be combined with --stream, --chunk-store or --incremental")
+    return args
 
 def main():
+    args = parse_args()
     try:
         # Setup paths using absolute paths
         script_dir = Path(__file__).resolve().parent
-        input_path = script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
-        output_dir = script_dir.parent / 'test-data' / 'processed'
+        input_path = Path(args.input) if args.input else script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
+        output_dir = Path(args.output_dir) if args.output_dir else script_dir.parent / 'test-data' / 'processed'
         llm_input_dir = output_dir / 'llm-input'
         raw_dir = output_dir / 'raw'
         text_path = raw_dir / 'extracted-text.txt'
@@ -50,25 +67,69 @@ def main():
             raise FileNotFoundError(f"PDF file not found: {input_path}")
         log("Found input PDF file")
         
+        if args.compare_profiles:
+            log(f"Comparing pdfminer profiles with {args.workers} workers...")
+            report = compare_pdfminer_profiles(input_path, workers=args.workers)
+            for name, stats in report.items():
+                log(f"- {name}: {stats['elapsed']:.2f}s ({stats['pages_per_sec']:.1f} pages/sec, "
+                    f"{stats['speedup']:.2f}x), {stats['identical_pages']}/{stats['pages']} pages identical, "
+                    f"similarity {stats['similarity']:.3f}, {stats['char_delta']:+,} chars")
+            return
+        
+        laparams = PDFMINER_PROFILES[args.profile]
+        log(f"Layout profile: {args.profile}")
+        
         # Create output directories
         os.makedirs(output_dir, exist_ok=True)
         os.makedirs(llm_input_dir, exist_ok=True)
         os.makedirs(raw_dir, exist_ok=True)
         log("Created output directories")
         
-        # Extract text using pdfminer
-        log("Extracting text from PDF...")
-        output_string = StringIO()
-        with open(input_path, 'rb') as fin:
-            extract_text_to_fp(fin, output_string, laparams=LAParams(
-                line_margin=0.5,
-                word_margin=0.1,
-                boxes_flow=0.5,
-                detect_vertical=True
-            ))
+        if args.incremental:
+            log("Extracting new or changed pages...")
+            stats = incremental_extract('pdfminer', input_path, output_dir, log=log, laparams=laparams)
+            log("Processing complete!")
+            log(f"- Raw text: {stats['text_path']} ({stats['reused']} pages reused, {stats['extracted']} extracted)")
+            log(f"- {stats['chunks']} chunks in: {stats['llm_input_dir']} ({stats['chunks_written']} rewritten)")
+            return
+        
+        if args.checkpoint or args.resume:
+            log("Extracting with page-range checkpoints...")
+            stats = checkpoint_extract('pdfminer', input_path, output_dir, log=log, resume=args.resume,
+                                       range_pages=args.checkpoint_pages, laparams=laparams,
+                                       workers=args.workers)
+            log("Processing complete!")
+            if stats['resumed']:
+                log(f"- Resumed after page {stats['resumed']}, extracted {stats['extracted']} more")
+            log(f"- Raw text: {stats['text_path']} ({stats['pages']} pages, {stats['chars']:,} chars)")
+            log(f"- Created {stats['chunks']} chunks in: {stats['llm_input_dir']}")
+            return
         
-        full_text = output_string.getvalue()
-        log("Text extraction complete")
+        if args.chunk_store:
+            log("Streaming chunks to a single-file chunk store...")
+            stats = stream_extract('pdfminer', input_path, output_dir, log=log, chunk_store=True, laparams=laparams,
+                                   workers=args.workers)
+            log("Processing complete!")
+            log(f"- Chunk store: {stats['store_dir']} ({stats['pages']} pages, {stats['chunks']} chunks)")
+            return
+        
+        if args.stream:
+            log("Streaming pages to output files...")
+            stats = stream_extract('pdfminer', input_path, output_dir, log=log, laparams=laparams,
+                                   workers=args.workers)
+            log("Processing complete!")
+            log(f"- Raw text: {stats['text_path']} ({stats['pages']} pages, {stats['chars']:,} chars)")
+            log(f"- Created {stats['chunks']} chunks in: {stats['llm_input_dir']}")
+            return
+        
+        # Extract text using pdfminer, reusing a cached result when neither
+        # the file nor the LAParams have changed
+        log("Extracting text from PDF...")
+        cache = None if args.no_cache else ExtractionCache()
+        result = cached_extract('pdfminer', input_path, cache, laparams=laparams, workers=args.workers)
+        full_text = result['text']
+        chunks = result['chunks']
+        log("Loaded text from cache" if result['cached'] else "Text extraction complete")
         
         # Save raw text
         log("Saving raw text...")
@@ -76,10 +137,6 @@ def main():
             f.write(full_text)
         log(f"Raw text saved to: {text_path}")
         
-        # Create chunks
-        log("Creating chunks...")
-        chunks = chunk_text(full_text)
-        
         # Save chunks
         log(f"Saving {len(chunks)} chunks...")
         for i, chunk in enumerate(chunks, 1):
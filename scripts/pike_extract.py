@@ -1,38 +1,35 @@
 import os
 import sys
+import argparse
 from pathlib import Path
 import pikepdf
-import re
+
+from extraction import metrics
+from extraction.chunking import chunk_text
+from extraction.pike_text import PikeTextExtractor
+from extraction.progress import Progress
+from extraction.streaming import stream_extract
 
 def log(msg):
     print(f"[LOG] {msg}", flush=True)
 
-def chunk_text(text, max_size=100000):
-    chunks = []
-    current_chunk = ""
-    
-    # Split into paragraphs
-    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
-    
-    for paragraph in paragraphs:
-        if len(current_chunk) + len(paragraph) + 2 > max_size:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = paragraph
-        else:
-            current_chunk = f"{current_chunk}\n\n{paragraph}" if current_chunk else paragraph
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract text from a PDF with pikepdf")
+    parser.add_argument('input', nargs='?', help="PDF to extract (default: test-data/OFW_Messages_Report_Dec.pdf)")
+    parser.add_argument('--output-dir', help="Output directory (default: test-data/processed)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write pages to the output files as they are extracted (bounded memory)")
+    parser.add_argument('--metrics-file',
+                        help="Write Prometheus metrics here when done (node-exporter textfile collector)")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     try:
         # Setup paths
         script_dir = Path(__file__).parent
-        input_path = script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
-        output_dir = script_dir.parent / 'test-data' / 'processed'
+        input_path = Path(args.input) if args.input else script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
+        output_dir = Path(args.output_dir) if args.output_dir else script_dir.parent / 'test-data' / 'processed'
         llm_input_dir = output_dir / 'llm-input'
         raw_dir = output_dir / 'raw'
         text_path = raw_dir / 'extracted-text.txt'
@@ -51,38 +48,54 @@ def main():
         os.makedirs(raw_dir, exist_ok=True)
         log("Created output directories")
         
+        if args.stream:
+            log("Streaming pages to output files...")
+            stats = stream_extract('pikepdf', input_path, output_dir, log=log)
+            log("Processing complete!")
+            log(f"- Raw text: {stats['text_path']} ({stats['pages']} pages, {stats['chars']:,} chars)")
+            log(f"- Created {stats['chunks']} chunks in: {stats['llm_input_dir']}")
+            return
+        
         # Extract text using pikepdf
         log("Opening PDF...")
-        pdf = pikepdf.Pdf.open(input_path)
+        with metrics.stage('pikepdf', 'open'):
+            pdf = pikepdf.Pdf.open(input_path)
         log(f"PDF opened successfully. Pages: {len(pdf.pages)}")
         
-        # Extract text from each page
+        # Extract text from each page, decoding strings through each font's ToUnicode map
         log("Extracting text...")
+        extractor = PikeTextExtractor(pdf)
+        progress = Progress('extract', total=len(pdf.pages))
         text_parts = []
-        for i, page in enumerate(pdf.pages, 1):
-            log(f"Processing page {i}/{len(pdf.pages)}...")
-            text = page.get_contents().decode('utf-8', errors='ignore')
-            text_parts.append(text)
+        with metrics.stage('pikepdf', 'extract'):
+            pages = (extractor.page_text(page) for page in pdf.pages)
+            for text in metrics.instrument_pages('pikepdf', pages):
+                text_parts.append(text)
+                progress.update()
+        progress.finish()
         
         # Combine text from all pages
         full_text = '\n\n'.join(text_parts)
         
         # Save raw text
         log("Saving raw text...")
-        with open(text_path, 'w', encoding='utf-8') as f:
-            f.write(full_text)
+        with metrics.stage('pikepdf', 'write'):
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write(full_text)
         log(f"Raw text saved to: {text_path}")
         
         # Create chunks
         log("Creating chunks...")
-        chunks = chunk_text(full_text)
+        with metrics.stage('pikepdf', 'chunk'):
+            chunks = chunk_text(full_text)
         
         # Save chunks
         log(f"Saving {len(chunks)} chunks...")
-        for i, chunk in enumerate(chunks, 1):
-            chunk_path = llm_input_dir / f'chunk-{i:03d}.txt'
-            with open(chunk_path, 'w', encoding='utf-8') as f:
-                f.write(chunk)
+        with metrics.stage('pikepdf', 'write'):
+            for i, chunk in enumerate(chunks, 1):
+                chunk_path = llm_input_dir / f'chunk-{i:03d}.txt'
+                with open(chunk_path, 'w', encoding='utf-8') as f:
+                    f.write(chunk)
         
         log("Processing complete!")
         log(f"- Raw text: {text_path}")
@@ -94,6 +107,9 @@ def main():
         log("Traceback:")
         log(traceback.format_exc())
         sys.exit(1)
+    finally:
+        if args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
 
 if __name__ == '__main__':
     main()
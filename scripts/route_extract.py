@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+from extraction.chunking import chunk_text
+from extraction.routing import routed_extract, scan
+
+def log(msg):
+    print(f"[LOG] {msg}", flush=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pre-scan a PDF and extract each page with the cheapest suitable backend")
+    parser.add_argument('input', nargs='?', help="PDF to extract (default: test-data/OFW_Messages_Report_Dec.pdf)")
+    parser.add_argument('--output-dir', help="Output directory (default: test-data/processed)")
+    parser.add_argument('--plan-only', action='store_true', help="Print the routing plan without extracting")
+    parser.add_argument('--compare', action='store_true',
+                        help="Also run pdfminer on every page and report the time saved")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    try:
+        script_dir = Path(__file__).resolve().parent
+        input_path = Path(args.input) if args.input else script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
+        output_dir = Path(args.output_dir) if args.output_dir else script_dir.parent / 'test-data' / 'processed'
+        llm_input_dir = output_dir / 'llm-input'
+        raw_dir = output_dir / 'raw'
+        text_path = raw_dir / 'extracted-text.txt'
+        plan_path = raw_dir / 'routing-plan.json'
+
+        log(f"Input PDF: {input_path}")
+        log(f"Output directory: {output_dir}")
+
+        # Verify input file exists
+        if not input_path.exists():
+            raise FileNotFoundError(f"PDF file not found: {input_path}")
+        log("Found input PDF file")
+
+        if args.plan_only:
+            plan = scan(input_path)
+            print(json.dumps(plan, indent=2))
+            return
+
+        # Create output directories
+        os.makedirs(llm_input_dir, exist_ok=True)
+        os.makedirs(raw_dir, exist_ok=True)
+        log("Created output directories")
+
+        log("Scanning pages and extracting along the routing plan...")
+        result = routed_extract(input_path, compare=args.compare)
+        plan = result['plan']
+        log(f"Scanned {plan['page_count']} pages in {plan['scan_elapsed']:.2f}s: {plan['kinds']}")
+        for name, timing in result['timings'].items():
+            log(f"- {name}: {timing['pages']} pages in {timing['elapsed']:.2f}s")
+        if plan['needs_ocr']:
+            log(f"Warning: {len(plan['needs_ocr'])} pages have no text layer: {[n + 1 for n in plan['needs_ocr'][:20]]}")
+        if args.compare:
+            log(f"Routed: {result['elapsed']:.2f}s, pdfminer only: {result['pdfminer_elapsed']:.2f}s "
+                f"({result['time_saved']:.2f}s saved, {result['speedup']:.1f}x)")
+
+        # Save raw text and the plan
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write(result['text'])
+        report = {key: result[key] for key in ('timings', 'elapsed', 'pdfminer_elapsed', 'time_saved', 'speedup')
+                  if key in result}
+        with open(plan_path, 'w', encoding='utf-8') as f:
+            json.dump({'plan': plan, 'report': report}, f, indent=2)
+
+        # Create and save chunks
+        chunks = chunk_text(result['text'])
+        log(f"Saving {len(chunks)} chunks...")
+        for i, chunk in enumerate(chunks, 1):
+            chunk_path = llm_input_dir / f'chunk-{i:03d}.txt'
+            with open(chunk_path, 'w', encoding='utf-8') as f:
+                f.write(chunk)
+
+        log("Processing complete!")
+        log(f"- Raw text: {text_path}")
+        log(f"- Routing plan: {plan_path}")
+        log(f"- Created {len(chunks)} chunks in: {llm_input_dir}")
+
+    except Exception as e:
+        log(f"ERROR: {str(e)}")
+        import traceback
+        log("Traceback:")
+        log(traceback.format_exc())
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
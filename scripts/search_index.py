@@ -0,0 +1,98 @@
+import sys
+import json
+import argparse
+import time
+
+from extraction.backends import BACKENDS
+from extraction.batch import expand_inputs
+from extraction.cache import ExtractionCache, cached_extract, file_sha256
+from extraction.search import SearchIndex
+
+def log(msg):
+    print(f"[LOG] {msg}", flush=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Full-text search over extracted reports (SQLite FTS5)")
+    parser.add_argument('--index-path', help="Index file (default: search.sqlite3 in the extraction cache)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="Extract and index PDFs, skipping ones already indexed unchanged")
+    add.add_argument('inputs', nargs='+', help="PDF files, directories or glob patterns")
+    add.add_argument('--backend', default='fitz', choices=sorted(BACKENDS), help="Extractor backend")
+    add.add_argument('--no-cache', action='store_true', help="Re-extract instead of using the extraction cache")
+
+    query = commands.add_parser('query', help="Print ranked hits with snippets")
+    query.add_argument('query', help="Words that must all match (FTS5 syntax with --raw)")
+    query.add_argument('--limit', type=int, default=10, help="Maximum hits (default: 10)")
+    query.add_argument('--raw', action='store_true', help="Pass the query to FTS5 as is (phrases, OR, NEAR, subject:)")
+    query.add_argument('--document', help="Only search this PDF")
+    query.add_argument('--json', action='store_true', help="Print the hits as JSON")
+
+    remove = commands.add_parser('remove', help="Drop documents from the index")
+    remove.add_argument('inputs', nargs='+', help="PDF paths as they were indexed")
+
+    commands.add_parser('stats', help="Show what is indexed")
+    return parser.parse_args()
+
+def print_hit(rank, hit):
+    pages = f"p. {hit['page']}" if hit['page'] == hit['last_page'] else f"pp. {hit['page']}-{hit['last_page']}"
+    title = f"Message {hit['number']}: {hit['subject']}" if hit['kind'] == 'message' else 'Page'
+    print(f"{rank}. {hit['path']} {pages} (bytes {hit['start']}-{hit['end']}, score {-hit['score']:.2f})")
+    if hit['kind'] == 'message':
+        print(f"   {title} ({hit['sender']} -> {hit['recipient']}, {hit['sent']})")
+    print(f"   {' '.join(hit['snippet'].split())}")
+
+def main():
+    args = parse_args()
+    index = None
+    try:
+        index = SearchIndex(args.index_path)
+
+        if args.command == 'query':
+            start = time.perf_counter()
+            hits = index.search(args.query, args.limit, raw=args.raw, document=args.document)
+            elapsed = time.perf_counter() - start
+            if args.json:
+                print(json.dumps(hits, indent=2, ensure_ascii=False))
+                return
+            for rank, hit in enumerate(hits, 1):
+                print_hit(rank, hit)
+            log(f"{len(hits)} hits in {elapsed * 1000:.1f} ms")
+
+        elif args.command == 'add':
+            cache = None if args.no_cache else ExtractionCache()
+            separator = BACKENDS[args.backend].separator
+            for path in expand_inputs(args.inputs):
+                sha256 = file_sha256(path)
+                if index.is_current(path, sha256, args.backend):
+                    log(f"Up to date: {path}")
+                    continue
+                result = cached_extract(args.backend, path, cache)
+                count = index.add(path, result['pages'], sha256, args.backend, separator)
+                log(f"Indexed {count} passages from {len(result['pages'])} pages: {path}")
+            index.optimize()
+
+        elif args.command == 'remove':
+            for path in args.inputs:
+                log(f"{'Removed' if index.remove(path) else 'Not indexed'}: {path}")
+
+        elif args.command == 'stats':
+            stats = index.stats()
+            log(f"Index: {index.path}")
+            log(f"- {stats['documents']} documents, {stats['pages']} pages, {stats['passages']} passages "
+                f"({stats['bytes'] / (1024 * 1024):.1f} MB)")
+            for document in index.documents():
+                log(f"  {document['path']} ({document['backend']}, {document['passage_count']} passages)")
+
+    except Exception as e:
+        log(f"ERROR: {str(e)}")
+        import traceback
+        log("Traceback:")
+        log(traceback.format_exc())
+        sys.exit(1)
+    finally:
+        if index:
+            index.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+
+from extraction.backends import BACKENDS, extract
+from extraction.messages import segment_pages, write_messages
+
+def log(msg):
+    print(f"[LOG] {msg}", flush=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Split an OFW message report into messages.jsonl (one message per line)")
+    parser.add_argument('input', nargs='?', help="PDF to segment (default: test-data/OFW_Messages_Report_Dec.pdf)")
+    parser.add_argument('--output-dir', help="Output directory (default: test-data/processed)")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='fitz',
+                        help="Extraction backend (default: fitz)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    try:
+        script_dir = Path(__file__).resolve().parent
+        input_path = Path(args.input) if args.input else script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
+        output_dir = Path(args.output_dir) if args.output_dir else script_dir.parent / 'test-data' / 'processed'
+        raw_dir = output_dir / 'raw'
+        text_path = raw_dir / 'extracted-text.txt'
+        messages_path = output_dir / 'messages.jsonl'
+
+        log(f"Input PDF: {input_path}")
+        log(f"Output directory: {output_dir}")
+
+        # Verify input file exists
+        if not input_path.exists():
+            raise FileNotFoundError(f"PDF file not found: {input_path}")
+        os.makedirs(raw_dir, exist_ok=True)
+
+        log(f"Extracting text with {args.backend}...")
+        result = extract(args.backend, input_path)
+
+        # Message offsets point into this file
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write(result['text'])
+
+        messages = segment_pages(result['pages'], BACKENDS[args.backend].separator)
+        write_messages(messages, messages_path)
+
+        total = messages[0]['total'] if messages else 0
+        incomplete = [m['number'] for m in messages if not (m['date'] and m['from'] and m['subject'])]
+        log("Processing complete!")
+        log(f"- Raw text: {text_path}")
+        log(f"- {len(messages)} of {total} messages in: {messages_path}")
+        if incomplete:
+            log(f"Warning: {len(incomplete)} messages have incomplete headers: {incomplete[:20]}")
+
+    except Exception as e:
+        log(f"ERROR: {str(e)}")
+        import traceback
+        log("Traceback:")
+        log(traceback.format_exc())
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,65 @@
 import os
 import sys
+import argparse
 from pathlib import Path
 from tika import parser
-import re
+
+from extraction.batch import run_batch
+from extraction.chunking import chunk_text
+from extraction.streaming import stream_extract
+from extraction.tika_client import get_client
 
 def log(msg):
     print(f"[LOG] {msg}", flush=True)
 
-def chunk_text(text, max_size=100000):
-    chunks = []
-    current_chunk = ""
-    
-    # Split into paragraphs
-    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
-    
-    for paragraph in paragraphs:
-        if len(current_chunk) + len(paragraph) + 2 > max_size:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = paragraph
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description="Extract text from a PDF with Apache Tika")
+    arg_parser.add_argument('inputs', nargs='*', metavar='input',
+                            help="PDFs to extract (default: test-data/OFW_Messages_Report_Dec.pdf); several need "
+                                 "--server and each gets a subdirectory of the output directory")
+    arg_parser.add_argument('--output-dir', help="Output directory (default: test-data/processed)")
+    arg_parser.add_argument('--stream', action='store_true',
+                            help="Write pages to the output files as they are extracted (bounded memory)")
+    arg_parser.add_argument('--server',
+                            help="URL of a running Tika server (e.g. http://localhost:9998); reuses "
+                                 "keep-alive connections instead of starting Tika per run")
+    arg_parser.add_argument('--workers', type=int, default=4,
+                            help="With --server and several inputs, documents sent at once (default: 4)")
+    args = arg_parser.parse_args()
+    if len(args.inputs) > 1 and not args.server:
+        arg_parser.error("several inputs need --server")
+    if len(args.inputs) > 1 and args.stream:
+        arg_parser.error("--stream takes a single input")
+    return args
+
+def extract_many(args, output_dir):
+    """Send every input to the Tika server, --workers at a time, writing each as it arrives."""
+    inputs = [Path(item) for item in args.inputs]
+    missing = [str(path) for path in inputs if not path.exists()]
+    if missing:
+        raise FileNotFoundError(f"PDF files not found: {', '.join(missing)}")
+    log(f"Extracting {len(inputs)} PDFs with {args.workers} concurrent requests to {args.server}...")
+    summary = run_batch(inputs, output_dir, 'tika', args.workers, server=args.server)
+    for result in summary['results']:
+        if result['ok']:
+            log(f"OK {result['file']}: {result['chunks']} chunks in {result['output_dir']}")
         else:
-            current_chunk = f"{current_chunk}\n\n{paragraph}" if current_chunk else paragraph
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+            log(f"FAILED {result['file']}: {result['error']}")
+    log(f"Processing complete! {summary['succeeded']}/{summary['documents']} succeeded in "
+        f"{summary['elapsed']:.2f}s")
+    if summary['failed']:
+        sys.exit(1)
 
 def main():
+    args = parse_args()
     try:
         # Setup paths using absolute paths
         script_dir = Path(__file__).resolve().parent
-        input_path = script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
-        output_dir = script_dir.parent / 'test-data' / 'processed'
+        output_dir = Path(args.output_dir) if args.output_dir else script_dir.parent / 'test-data' / 'processed'
+        if len(args.inputs) > 1:
+            extract_many(args, output_dir)
+            return
+        input_path = Path(args.inputs[0]) if args.inputs else script_dir.parent / 'test-data' / 'OFW_Messages_Report_Dec.pdf'
         llm_input_dir = output_dir / 'llm-input'
         raw_dir = output_dir / 'raw'
         text_path = raw_dir / 'extracted-text.txt'
@@ -54,13 +81,23 @@ def main():
         os.makedirs(raw_dir, exist_ok=True)
         log("Created output directories")
         
+        if args.stream:
+            log("Streaming pages to output files...")
+            stats = stream_extract('tika', input_path, output_dir, log=log, server=args.server)
+            log("Processing complete!")
+            log(f"- Raw text: {stats['text_path']} ({stats['pages']} pages, {stats['chars']:,} chars)")
+            log(f"- Created {stats['chunks']} chunks in: {stats['llm_input_dir']}")
+            return
+        
         # Extract text using Apache Tika
         log("Extracting text from PDF...")
-        parsed = parser.from_file(str(input_path.resolve()))
-        if not parsed.get('content'):
-            raise Exception("Failed to extract text from PDF")
-        
-        full_text = parsed['content']
+        if args.server:
+            full_text = get_client(args.server).extract(input_path)
+        else:
+            parsed = parser.from_file(str(input_path.resolve()))
+            if not parsed.get('content'):
+                raise Exception("Failed to extract text from PDF")
+            full_text = parsed['content']
         log("Text extraction complete")
         
         # Save raw text
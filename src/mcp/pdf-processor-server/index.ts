@@ -14,10 +14,12 @@ import { google } from 'googleapis';
 import fs from 'fs';
 import { spawn } from 'child_process';
 import path from 'path';
+import { ExtractionWorkerPool } from './worker-pool.js';
 
 class PDFProcessorServer {
   private server: Server;
   private extractors: Map<string, any>;
+  private workers: ExtractionWorkerPool;
 
   constructor() {
     this.server = new Server(
@@ -34,6 +36,11 @@ class PDFProcessorServer {
     );
 
     // Initialize extractors
+    this.workers = new ExtractionWorkerPool(
+      Number(process.env.EXTRACT_WORKERS || 2),
+      'scripts/extract_worker.py',
+      ['fitz', 'pdfminer']
+    );
     this.extractors = new Map();
     this.setupExtractors();
     this.setupTools();
@@ -42,6 +49,7 @@ class PDFProcessorServer {
     // Error handling
     this.server.onerror = (error) => console.error('[MCP Error]', error);
     process.on('SIGINT', async () => {
+      this.workers.close();
       await this.server.close();
       process.exit(0);
     });
@@ -63,50 +71,32 @@ class PDFProcessorServer {
       }
     });
 
-    // PyMuPDF Extractor
-    this.extractors.set('fitz', {
-      extract: async (file: string) => {
-        return new Promise((resolve, reject) => {
-          const process = spawn('python', ['scripts/fitz_extract.py', file]);
-          let output = '';
-          process.stdout.on('data', (data) => output += data);
-          process.on('close', (code) => {
-            if (code === 0) resolve(output);
-            else reject(new Error(`PyMuPDF extraction failed with code ${code}`));
-          });
-        });
-      }
-    });
-
-    // PDFMiner Extractor
-    this.extractors.set('pdfminer', {
-      extract: async (file: string) => {
-        return new Promise((resolve, reject) => {
-          const process = spawn('python', ['scripts/pdfminer_extract.py', file]);
-          let output = '';
-          process.stdout.on('data', (data) => output += data);
-          process.on('close', (code) => {
-            if (code === 0) resolve(output);
-            else reject(new Error(`PDFMiner extraction failed with code ${code}`));
-          });
-        });
-      }
-    });
-
-    // Tika Extractor
-    this.extractors.set('tika', {
-      extract: async (file: string) => {
-        return new Promise((resolve, reject) => {
-          const process = spawn('python', ['scripts/tika_extract.py', file]);
-          let output = '';
-          process.stdout.on('data', (data) => output += data);
-          process.on('close', (code) => {
-            if (code === 0) resolve(output);
-            else reject(new Error(`Tika extraction failed with code ${code}`));
-          });
-        });
-      }
-    });
+    // PyMuPDF, PDFMiner and Tika run in long-lived Python workers so each
+    // call reuses an interpreter with the backend already imported
+    const workerExtractors: Record<string, string> = {
+      fitz: 'PyMuPDF',
+      pdfminer: 'PDFMiner',
+      tika: 'Tika'
+    };
+    // With EXTRACT_PAGE_TIMEOUT set, PyMuPDF and PDFMiner pages run in
+    // supervised processes, so one hanging or crashing page cannot stall the
+    // request; it is retried with a cheaper backend or left empty
+    const pageTimeout = Number(process.env.EXTRACT_PAGE_TIMEOUT || 0);
+    for (const [name, label] of Object.entries(workerExtractors)) {
+      const settings = pageTimeout && name !== 'tika'
+        ? { supervise: true, page_timeout: pageTimeout }
+        : {};
+      this.extractors.set(name, {
+        extract: async (file: string) => {
+          try {
+            const response = await this.workers.extract(name, file, {}, settings);
+            return response.text;
+          } catch (error) {
+            throw new Error(`${label} extraction failed: ${(error as Error).message}`);
+          }
+        }
+      });
+    }
   }
 
   private setupTools() {
@@ -143,6 +133,14 @@ class PDFProcessorServer {
                   enum: ['adobe', 'fitz', 'pdfminer', 'tika']
                 },
                 description: 'List of extractors to use'
+              },
+              race: {
+                type: 'boolean',
+                description: 'Run the extractors concurrently and return the first result that passes a quality check, including finding OFW message headers'
+              },
+              timeout: {
+                type: 'number',
+                description: 'Race timeout in seconds'
               }
             },
             required: ['file_path']
@@ -255,18 +253,22 @@ class PDFProcessorServer {
     try {
       // Basic file analysis
       const stats = fs.statSync(filePath);
+      const plan = await this.workers.scan(filePath);
       const analysis = {
         file_info: {
           size: stats.size,
           created: stats.birthtime,
-          modified: stats.mtime
+          modified: stats.mtime,
+          page_count: plan.page_count
         },
         characteristics: {
-          is_scanned: false, // To be implemented
-          needs_ocr: false,  // To be implemented
+          is_scanned: plan.needs_ocr.length === plan.page_count && plan.page_count > 0,
+          needs_ocr: plan.needs_ocr.length > 0,
           has_forms: false,  // To be implemented
           has_tables: false  // To be implemented
         },
+        page_kinds: plan.kinds,
+        routing: plan.routes,
         recommended_extractors: [] as string[]
       };
 
@@ -274,7 +276,7 @@ class PDFProcessorServer {
       if (analysis.characteristics.is_scanned) {
         analysis.recommended_extractors.push('adobe');
       } else {
-        analysis.recommended_extractors.push('fitz');
+        analysis.recommended_extractors.push(...Object.keys(plan.routes));
       }
 
       return {
@@ -302,6 +304,10 @@ class PDFProcessorServer {
     const extractors = args.extractors || ['fitz'];
     const results = [];
 
+    if (args.race) {
+      return this.raceExtract(filePath, extractors, args.timeout);
+    }
+
     try {
       // Execute extractions in parallel
       const extractionPromises = extractors.map(async (extractor: string) => {
@@ -339,6 +345,41 @@ class PDFProcessorServer {
     }
   }
 
+  private async raceExtract(filePath: string, extractors: string[], timeout?: number) {
+    // Adobe runs outside the worker backends, so it cannot take part in a race
+    const backends = extractors.filter((name) => name !== 'adobe');
+    if (backends.length === 0) {
+      throw new McpError(ErrorCode.InvalidParams, 'Race mode needs at least one of fitz, pdfminer or tika');
+    }
+
+    try {
+      // These are OFW reports, so an extraction without message headers has
+      // lost the structure and must not win the race
+      const response = await this.workers.race(backends, filePath, { timeout, require_ofw: true });
+      return {
+        content: [
+          {
+            type: 'text',
+            text: JSON.stringify({
+              content: [{ extractor: response.backend, text: response.text }],
+              metadata: {
+                extractors_used: [response.backend],
+                timestamp: new Date().toISOString(),
+                score: response.score,
+                attempts: response.attempts
+              }
+            }, null, 2)
+          }
+        ]
+      };
+    } catch (error) {
+      throw new McpError(
+        ErrorCode.InternalError,
+        `Extraction failed: ${error.message}`
+      );
+    }
+  }
+
   private async extractStructure(args: any) {
     const filePath = args.file_path;
     if (!fs.existsSync(filePath)) {
@@ -0,0 +1,121 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+
+// Client side of scripts/extract_worker.py: each message is a 4-byte
+// big-endian length followed by UTF-8 JSON.
+
+interface PendingRequest {
+  resolve: (value: any) => void;
+  reject: (error: Error) => void;
+}
+
+class ExtractionWorker {
+  private process: ChildProcessWithoutNullStreams;
+  private buffer = Buffer.alloc(0);
+  private pending = new Map<number, PendingRequest>();
+  private nextId = 0;
+  public exited = false;
+
+  constructor(script: string, preload: string[]) {
+    const args = [script];
+    if (preload.length) args.push('--preload', preload.join(','));
+    this.process = spawn('python', args);
+
+    this.process.stdout.on('data', (data: Buffer) => this.onData(data));
+    this.process.stderr.on('data', (data: Buffer) => console.error(data.toString().trimEnd()));
+    this.process.on('close', (code) => {
+      this.exited = true;
+      const error = new Error(`Extraction worker exited with code ${code}`);
+      for (const request of this.pending.values()) request.reject(error);
+      this.pending.clear();
+    });
+  }
+
+  get inFlight() {
+    return this.pending.size;
+  }
+
+  request(message: Record<string, any>): Promise<any> {
+    const id = ++this.nextId;
+    const payload = Buffer.from(JSON.stringify({ ...message, id }), 'utf8');
+    const header = Buffer.alloc(4);
+    header.writeUInt32BE(payload.length, 0);
+
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      this.process.stdin.write(Buffer.concat([header, payload]));
+    });
+  }
+
+  private onData(data: Buffer) {
+    this.buffer = Buffer.concat([this.buffer, data]);
+    while (this.buffer.length >= 4) {
+      const size = this.buffer.readUInt32BE(0);
+      if (this.buffer.length < 4 + size) break;
+      const response = JSON.parse(this.buffer.subarray(4, 4 + size).toString('utf8'));
+      this.buffer = this.buffer.subarray(4 + size);
+
+      const request = this.pending.get(response.id);
+      if (!request) continue;
+      this.pending.delete(response.id);
+      if (response.ok) request.resolve(response);
+      else request.reject(new Error(response.error));
+    }
+  }
+
+  close() {
+    this.process.stdin.end();
+  }
+}
+
+export class ExtractionWorkerPool {
+  private workers: ExtractionWorker[] = [];
+
+  constructor(
+    private size = 2,
+    private script = 'scripts/extract_worker.py',
+    private preload: string[] = []
+  ) {}
+
+  private pick(): ExtractionWorker {
+    // Replace workers that died, then hand the request to the least busy one
+    this.workers = this.workers.filter(worker => !worker.exited);
+    while (this.workers.length < this.size) {
+      this.workers.push(new ExtractionWorker(this.script, this.preload));
+    }
+    return this.workers.reduce((best, worker) =>
+      worker.inFlight < best.inFlight ? worker : best
+    );
+  }
+
+  request(message: Record<string, any>): Promise<any> {
+    return this.pick().request(message);
+  }
+
+  // Pass { max_tokens } in settings to get token-budgeted chunks with chunk_tokens
+  async extract(backend: string, file: string, options: Record<string, any> = {},
+                settings: Record<string, any> = {}) {
+    return this.request({ op: 'extract', backend, file, options, ...settings });
+  }
+
+  // Run several backends at once in one worker and keep the first good result
+  async race(backends: string[], file: string, options: Record<string, any> = {}) {
+    return this.request({ op: 'race', backends, file, ...options });
+  }
+
+  // Classify pages and plan which backend extracts each one
+  async scan(file: string) {
+    const response = await this.request({ op: 'scan', file });
+    return response.plan;
+  }
+
+  // Which backends are installed; answered without importing any of them
+  async backends() {
+    const response = await this.request({ op: 'backends' });
+    return response.backends;
+  }
+
+  close() {
+    for (const worker of this.workers) worker.close();
+    this.workers = [];
+  }
+}
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+OFW_PDF = ROOT / 'tests' / 'fixtures' / 'ofw' / 'OFW_Messages_Report_Dec.pdf'
+
+
+@pytest.fixture(autouse=True)
+def extraction_cache_dir(tmp_path, monkeypatch):
+    # Keep worker and script caches out of the repository during tests
+    monkeypatch.setenv('EXTRACT_CACHE_DIR', str(tmp_path / 'extraction-cache'))
+
+
+@pytest.fixture
+def ofw_pdf():
+    return OFW_PDF
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Build a small text PDF with one list of lines per page."""
+    fitz = pytest.importorskip('fitz')
+
+    def build(pages, name='sample.pdf'):
+        path = tmp_path / name
+        pdf = fitz.open()
+        for lines in pages:
+            page = pdf.new_page()
+            y = 72
+            for line in lines:
+                page.insert_text((72, y), line)
+                y += 14
+        pdf.save(str(path))
+        pdf.close()
+        return path
+
+    return build
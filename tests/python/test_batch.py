@@ -0,0 +1,57 @@
+import multiprocessing
+import os
+
+import pytest
+
+from extraction import backends
+from extraction.batch import expand_inputs, output_dirs, run_batch
+
+
+def test_expand_inputs_accepts_files_directories_and_globs(make_pdf, tmp_path):
+    a = make_pdf([['a']], name='a.pdf')
+    nested = tmp_path / 'case' / 'nested'
+    nested.mkdir(parents=True)
+    b = nested / 'b.pdf'
+    b.write_bytes(a.read_bytes())
+    (nested / 'notes.txt').write_text('not a pdf')
+
+    files = expand_inputs([str(a), str(tmp_path / 'case'), str(tmp_path / '*.pdf')])
+    assert files == [a.resolve(), b.resolve()]
+
+
+def test_output_dirs_are_unique(tmp_path):
+    dirs = output_dirs([tmp_path / 'x' / 'report.pdf', tmp_path / 'y' / 'report.pdf'], tmp_path / 'out')
+    assert sorted(d.name for d in dirs.values()) == ['report', 'report-2']
+
+
+def test_failures_do_not_stop_the_batch(make_pdf, tmp_path):
+    good = make_pdf([['Message 1'], ['Message 2']], name='good.pdf')
+    bad = tmp_path / 'bad.pdf'
+    bad.write_text('not a pdf')
+
+    summary = run_batch([bad, good], tmp_path / 'out', 'fitz', workers=2)
+
+    assert [r['ok'] for r in summary['results']] == [False, True]
+    assert summary['failed'] == 1 and summary['pages'] == 2
+    assert (tmp_path / 'out' / 'good' / 'raw' / 'extracted-text.txt').exists()
+    assert summary['pages_per_sec'] > 0
+
+
+def crash_pages(input_path, **options):
+    if 'crash' in os.path.basename(input_path):
+        os._exit(1)
+    yield from backends.fitz_pages(input_path)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason="the stub backend reaches workers by fork")
+def test_a_document_that_kills_its_worker_does_not_stop_the_batch(make_pdf, tmp_path, monkeypatch):
+    pytest.importorskip('fitz')
+    monkeypatch.setitem(backends.BACKENDS, 'crashy', backends.Backend('crashy', 'fitz', crash_pages, '\n\n'))
+    files = [make_pdf([['Message 1']], name='a.pdf'), make_pdf([['Message 1']], name='crash.pdf'),
+             make_pdf([['Message 1'], ['Message 2']], name='b.pdf'), make_pdf([['Message 1']], name='c.pdf')]
+
+    summary = run_batch(files, tmp_path / 'out', 'crashy', workers=2)
+
+    assert [r['ok'] for r in summary['results']] == [True, False, True, True]
+    assert 'BrokenProcessPool' in summary['results'][1]['error']
+    assert summary['pages'] == 4
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from extraction import bench
+from extraction.bench import compare, run_case
+from extraction.corpus import LINES_PER_PAGE, ensure_corpus, generate_report, report_lines
+from extraction.messages import segment_pages
+
+fitz = pytest.importorskip('fitz')
+
+
+def test_report_lines_fill_the_pages():
+    lines = report_lines(3, seed=1)
+    assert len(lines) == 3 * LINES_PER_PAGE
+    assert lines == report_lines(3, seed=1)
+    assert lines != report_lines(3, seed=2)
+
+
+def test_synthetic_report_segments(tmp_path):
+    path = tmp_path / 'report.pdf'
+    count = generate_report(path, 12, seed=3)
+
+    with fitz.open(str(path)) as pdf:
+        pages = [page.get_text() for page in pdf]
+    assert len(pages) == 12
+    assert pages[-1].rstrip().endswith('Page 12 of 12')
+
+    messages = segment_pages(pages)
+    assert [m['number'] for m in messages] == list(range(1, count + 1))
+    assert all(m['total'] == count for m in messages)
+    assert all(m['date'] and m['from'] and m['to'] and m['subject'] for m in messages)
+    assert [m['date'] for m in messages] == sorted(m['date'] for m in messages)
+    assert any(m['subject'].startswith('Re: ') for m in messages)
+
+
+def test_corpus_is_reused(tmp_path):
+    first = ensure_corpus(tmp_path, [2])
+    mtime = first[2].stat().st_mtime_ns
+    assert ensure_corpus(tmp_path, [2])[2].stat().st_mtime_ns == mtime
+
+
+def test_run_case(tmp_path):
+    path = ensure_corpus(tmp_path, [5])[5]
+    result = run_case('fitz', path, 5, timeout=120)
+    assert result['ok'], result.get('error')
+    assert result['pages_per_sec'] > 0
+    assert result['peak_rss_kb'] > 0
+    assert result['output_bytes'] >= result['output_chars'] > 0
+    assert set(result['chunk_elapsed']) == {'chars', 'tokens'}
+    assert result['wall'] >= result['extract_elapsed']
+
+
+def crash_measure(name, input_path, conn):
+    os._exit(1)
+
+
+def test_run_case_survives_a_crashing_backend(tmp_path, monkeypatch):
+    # The spawned child imports this module to find the stand-in
+    monkeypatch.setattr(bench, '_measure', crash_measure)
+    result = run_case('fitz', ensure_corpus(tmp_path, [2])[2], 2, timeout=120)
+    assert not result['ok']
+    assert result['error'] == 'backend process exited with code 1'
+
+
+def test_compare_flags_slower_cases():
+    def results(*cases):
+        return {'version': 1, 'cases': [dict(backend=b, pages=p, ok=True, wall=w) for b, p, w in cases]}
+
+    baseline = results(('fitz', 10, 1.0), ('pdfminer', 10, 2.0))
+    current = results(('fitz', 10, 1.05), ('pdfminer', 10, 2.5), ('tika', 10, 9.0))
+    rows = compare(baseline, current, threshold=10)
+    assert [(row['backend'], row['regression']) for row in rows] == [('fitz', False), ('pdfminer', True)]
+    assert rows[1]['change'] == pytest.approx(25.0) and rows[1]['status'] == 'slower'
+
+
+def test_compare_flags_failed_and_missing_cases():
+    baseline = {'version': 1, 'cases': [dict(backend=b, pages=10, ok=True, wall=1.0)
+                                        for b in ('fitz', 'pdfminer', 'pikepdf')]}
+    current = {'version': 1, 'cases': [dict(backend='fitz', pages=10, ok=True, wall=1.0),
+                                       dict(backend='pdfminer', pages=10, ok=False, error='Timed out after 60s')]}
+    rows = compare(baseline, current)
+    assert [(row['backend'], row['status'], row['regression']) for row in rows] == \
+        [('fitz', 'ok', False), ('pdfminer', 'failed', True), ('pikepdf', 'missing', True)]
+    assert rows[1]['error'] == 'Timed out after 60s'
@@ -0,0 +1,57 @@
+import pytest
+
+from extraction.backends import PDFMINER_LAPARAMS
+from extraction.cache import ExtractionCache, cached_extract
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache(tmp_path / 'cache')
+    yield cache
+    cache.close()
+
+
+def test_hit_returns_stored_result_without_extracting(cache, make_pdf, monkeypatch):
+    path = make_pdf([['Message 1 of 2'], ['Message 2 of 2']])
+    first = cached_extract('fitz', path, cache)
+
+    from extraction import backends
+    monkeypatch.setattr(backends.BACKENDS['fitz'], 'pages', lambda *a, **k: pytest.fail("PDF was opened"))
+    second = cached_extract('fitz', path, cache)
+
+    assert first['cached'] is False and second['cached'] is True
+    assert second['pages'] == first['pages']
+    assert second['chunks'] == first['chunks']
+    assert second['text'] == first['text']
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_key_depends_on_content_and_settings(cache, make_pdf, tmp_path):
+    a = make_pdf([['same']], name='a.pdf')
+    b = tmp_path / 'copy.pdf'
+    b.write_bytes(a.read_bytes())
+    c = make_pdf([['different']], name='c.pdf')
+
+    assert cache.key('fitz', a) == cache.key('fitz', b)
+    assert cache.key('fitz', a) != cache.key('fitz', c)
+    assert cache.key('fitz', a) != cache.key('fitz', a, max_size=500)
+    assert cache.key('fitz', a) == cache.key('fitz', a, {'workers': 4, 'keep_open': True})
+    assert cache.key('pdfminer', a) == cache.key('pdfminer', a, {'laparams': PDFMINER_LAPARAMS})
+    assert cache.key('pdfminer', a) != cache.key('pdfminer', a, {'laparams': {'detect_vertical': False}})
+
+
+def test_lru_eviction_respects_size_cap(tmp_path):
+    cache = ExtractionCache(tmp_path / 'cache', max_bytes=2500)
+    entry = {'backend': 'fitz', 'pages': ['x' * 1000], 'chunks': []}
+    cache.put('a' * 64, entry)
+    cache.put('b' * 64, entry)
+    assert cache.get('a' * 64) is not None  # a is now more recent than b
+    cache.put('c' * 64, entry)
+
+    assert cache.get('b' * 64) is None
+    assert cache.get('a' * 64) is not None
+    assert cache.get('c' * 64) is not None
+    assert cache.stats()['bytes'] <= 2500
+    cache.close()
@@ -0,0 +1,119 @@
+import pytest
+
+from extraction.batch import run_batch
+from extraction.checkpoint import checkpoint_dir, checkpoint_extract, committed_ranges
+from extraction.streaming import stream_extract
+
+pytest.importorskip('fitz')
+
+
+class Killed(Exception):
+    pass
+
+
+def pages_for(count):
+    return [[f"Message {i + 1}", 'From: Robert Moyer', f"body {i}"] for i in range(count)]
+
+
+def read_output(output_dir):
+    raw = (output_dir / 'raw' / 'extracted-text.txt').read_text(encoding='utf-8')
+    chunks = [p.read_text(encoding='utf-8') for p in sorted((output_dir / 'llm-input').glob('chunk-*.txt'))]
+    return raw, chunks
+
+
+def kill_after(pages):
+    def on_commit(stop, count):
+        if stop >= pages:
+            raise Killed()
+    return on_commit
+
+
+@pytest.mark.parametrize('backend', ['fitz', 'pdfminer'])
+def test_resumed_run_matches_uninterrupted_run(make_pdf, tmp_path, backend):
+    path = make_pdf(pages_for(23))
+    output_dir = tmp_path / 'out'
+    with pytest.raises(Killed):
+        checkpoint_extract(backend, path, output_dir, max_size=300, range_pages=5, on_commit=kill_after(10))
+    assert committed_ranges(checkpoint_dir(output_dir)) == [(0, 5), (5, 10)]
+
+    stats = checkpoint_extract(backend, path, output_dir, max_size=300, range_pages=5, resume=True)
+    assert (stats['resumed'], stats['extracted'], stats['pages']) == (10, 13, 23)
+    assert [path.name for path in checkpoint_dir(output_dir).iterdir()] == ['checkpoint.json']
+
+    stream_extract(backend, path, tmp_path / 'full', max_size=300)
+    assert read_output(output_dir) == read_output(tmp_path / 'full')
+
+
+def test_partial_ranges_are_never_reused(make_pdf, tmp_path):
+    path = make_pdf(pages_for(12))
+    output_dir = tmp_path / 'out'
+    with pytest.raises(Killed):
+        checkpoint_extract('fitz', path, output_dir, range_pages=4, on_commit=kill_after(8))
+    directory = checkpoint_dir(output_dir)
+    # A range that was being written when the process died, and a gap
+    (directory / 'pages-000008-000012.tmp').write_text('["half')
+    (directory / 'pages-000004-000008.json').unlink()
+
+    stats = checkpoint_extract('fitz', path, output_dir, range_pages=4, resume=True)
+    assert stats['resumed'] == 4
+
+    stream_extract('fitz', path, tmp_path / 'full')
+    assert read_output(output_dir) == read_output(tmp_path / 'full')
+
+
+def test_changed_file_or_settings_start_over(make_pdf, tmp_path):
+    path = make_pdf(pages_for(6))
+    output_dir = tmp_path / 'out'
+    with pytest.raises(Killed):
+        checkpoint_extract('pdfminer', path, output_dir, range_pages=2, on_commit=kill_after(2))
+
+    stats = checkpoint_extract('pdfminer', path, output_dir, range_pages=2, resume=True,
+                               laparams={'detect_vertical': False})
+    assert stats['resumed'] == 0
+
+    with pytest.raises(Killed):
+        checkpoint_extract('fitz', path, output_dir, range_pages=2, on_commit=kill_after(4))
+    # Without resume an old checkpoint is discarded
+    assert checkpoint_extract('fitz', path, output_dir, range_pages=2)['resumed'] == 0
+
+
+def test_parallel_ranges_with_token_budget(make_pdf, tmp_path):
+    path = make_pdf(pages_for(30))
+    stats = checkpoint_extract('fitz', path, tmp_path / 'out', range_pages=4, workers=2, max_tokens=40)
+    stream_extract('fitz', path, tmp_path / 'full', max_tokens=40)
+
+    assert stats['pages'] == 30 and stats['tokens'] > 0
+    assert read_output(tmp_path / 'out') == read_output(tmp_path / 'full')
+    assert (tmp_path / 'out' / 'raw' / 'chunks.json').read_text() == \
+        (tmp_path / 'full' / 'raw' / 'chunks.json').read_text()
+
+
+def test_backends_without_page_ranges_are_rejected(make_pdf, tmp_path):
+    with pytest.raises(ValueError):
+        checkpoint_extract('tika', make_pdf(pages_for(1)), tmp_path / 'out')
+
+
+def test_batch_resume_continues_interrupted_documents(make_pdf, tmp_path):
+    finished = make_pdf(pages_for(30), name='finished.pdf')
+    checkpoint_extract('fitz', finished, tmp_path / 'out' / 'finished')
+    text_path = tmp_path / 'out' / 'finished' / 'raw' / 'extracted-text.txt'
+    written = text_path.stat().st_mtime_ns
+    path = make_pdf(pages_for(120), name='bundle.pdf')
+    with pytest.raises(Killed):
+        checkpoint_extract('fitz', path, tmp_path / 'out' / 'bundle', on_commit=kill_after(50))
+
+    summary = run_batch([finished, path], tmp_path / 'out', 'fitz', workers=1, resume=True)
+    done, resumed = summary['results']
+    assert done['ok'] and (done['extracted'], done['pages'], done['chunks']) == (0, 30, 1)
+    assert text_path.stat().st_mtime_ns == written
+    assert resumed['ok'] and (resumed['resumed'], resumed['extracted']) == (50, 70)
+
+    # A finished document is extracted again when its raw text was truncated or edited
+    text_path.write_text(text_path.read_text(encoding='utf-8')[:100], encoding='utf-8')
+    stats = checkpoint_extract('fitz', finished, tmp_path / 'out' / 'finished', resume=True)
+    assert (stats['resumed'], stats['extracted']) == (0, 30)
+    assert checkpoint_extract('fitz', finished, tmp_path / 'out' / 'finished', resume=True)['extracted'] == 0
+
+    # or when its chunk settings change
+    stats = checkpoint_extract('fitz', finished, tmp_path / 'out' / 'finished', max_size=200, resume=True)
+    assert (stats['resumed'], stats['extracted']) == (0, 30)
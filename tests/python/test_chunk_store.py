@@ -0,0 +1,112 @@
+import mmap
+import os
+
+import pytest
+
+from extraction import chunk_store
+from extraction.chunk_store import ChunkStore, ChunkStoreWriter, write_store
+from extraction.chunking import chunk_pages, iter_chunk_spans, iter_paragraph_spans
+from extraction.streaming import stream_extract
+
+
+def test_paragraph_spans_follow_pieces():
+    pieces = ['alpha\n\nbeta start', ' beta end\n', '\ngamma', '', 'delta\n\nepsilon']
+    spans = list(iter_paragraph_spans(pieces))
+    assert spans == [
+        ('alpha', 0, 0),
+        ('beta start beta end', 0, 1),
+        ('gammadelta', 2, 4),
+        ('epsilon', 4, 4),
+    ]
+
+
+def test_chunk_spans_cover_their_paragraphs():
+    paragraphs = [('a' * 40, 0, 0), ('b' * 40, 1, 2), ('c' * 40, 3, 3)]
+    assert [(first, last) for _, first, last in iter_chunk_spans(paragraphs, max_size=90)] == [(0, 2), (3, 3)]
+
+
+def test_store_round_trip(tmp_path):
+    chunks = ['first chunk', 'zweiter Abschnitt – ü', 'third']
+    write_store([(chunk, i, i) for i, chunk in enumerate(chunks)], tmp_path / 'chunks', {'source': 'x.pdf'})
+
+    with ChunkStore(tmp_path / 'chunks') as store:
+        assert list(store) == chunks
+        assert store.manifest['source'] == 'x.pdf'
+        data = store.data(1)
+        assert isinstance(data.obj, mmap.mmap)
+        assert bytes(data) == chunks[1].encode('utf-8')
+        assert store.entry(1)['chars'] == len(chunks[1])
+        assert store.for_page(2) == [2]
+        assert store.verify() == []
+
+    blob = (tmp_path / 'chunks' / 'chunks.txt').read_text(encoding='utf-8')
+    assert blob == '\n\n'.join(chunks)
+
+
+def test_verify_reports_corrupt_chunks(tmp_path):
+    write_store(['one', 'two'], tmp_path / 'chunks')
+    blob = tmp_path / 'chunks' / 'chunks.txt'
+    blob.write_bytes(blob.read_bytes().replace(b'two', b'tw0'))
+    with ChunkStore(tmp_path / 'chunks') as store:
+        assert store.verify() == [2]
+
+
+def test_rewritten_store_is_never_paired_with_the_old_manifest(tmp_path, monkeypatch):
+    store_dir = tmp_path / 'chunks'
+    write_store(['old'], store_dir)
+    old_manifest = (store_dir / 'manifest.json').read_text()
+    writer = ChunkStoreWriter(store_dir)
+    writer.write('a longer new chunk')
+    with ChunkStore(store_dir) as store:
+        assert list(store) == ['old']
+
+    manifest_during_swap = []
+
+    class SpyOs:
+        # Stands in for os in the chunk store module only
+        def __getattr__(self, name):
+            return getattr(os, name)
+
+        def replace(self, src, dst):
+            if dst == writer.blob_path:
+                manifest_during_swap.append((store_dir / 'manifest.json').exists())
+            os.replace(src, dst)
+
+    monkeypatch.setattr(chunk_store, 'os', SpyOs())
+    writer.close()
+    assert manifest_during_swap == [False]
+    with ChunkStore(store_dir) as store:
+        assert list(store) == ['a longer new chunk']
+
+    # A reader that read the old manifest before the swap
+    (store_dir / 'manifest.json').write_text(old_manifest)
+    with pytest.raises(ValueError):
+        ChunkStore(store_dir)
+
+
+def test_streamed_store_matches_chunk_files(make_pdf, tmp_path):
+    pytest.importorskip('fitz')
+    pages = [[f'Page {n} paragraph {i} ' + 'x' * 60 for i in range(6)] for n in range(12)]
+    path = make_pdf(pages)
+
+    files = stream_extract('fitz', path, tmp_path / 'files', max_size=1200)
+    store_stats = stream_extract('fitz', path, tmp_path / 'store', max_size=1200, chunk_store=True)
+    assert store_stats['chunks'] == files['chunks'] > 3
+    assert not (tmp_path / 'store' / 'raw').exists()
+
+    with ChunkStore(tmp_path / 'store' / 'chunks') as store:
+        expected = list(chunk_pages(open(files['text_path'], encoding='utf-8').read().split('\n\n'), 1200))
+        assert list(store) == expected
+        spans = [entry['pages'] for entry in store.entries]
+        assert spans[0][0] == 0 and spans[-1][1] == 11
+        for entry, chunk in zip(store.entries, store):
+            first, last = entry['pages']
+            assert f'Page {first} ' in chunk and f'Page {last} ' in chunk
+
+        store.export_files(tmp_path / 'exported')
+
+    exported = sorted(p.name for p in (tmp_path / 'exported').iterdir())
+    original = sorted(p.name for p in (tmp_path / 'files' / 'llm-input').iterdir())
+    assert exported == original
+    for name in original:
+        assert (tmp_path / 'exported' / name).read_bytes() == (tmp_path / 'files' / 'llm-input' / name).read_bytes()
@@ -0,0 +1,58 @@
+import random
+import re
+
+import pytest
+
+from extraction.chunking import chunk_pages, chunk_text, iter_chunks, iter_paragraphs
+
+
+def legacy_chunk_text(text, max_size=100000):
+    # The chunk_text that used to be copied into every extract script
+    chunks = []
+    current_chunk = ""
+    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+    for paragraph in paragraphs:
+        if len(current_chunk) + len(paragraph) + 2 > max_size:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = paragraph
+        else:
+            current_chunk = f"{current_chunk}\n\n{paragraph}" if current_chunk else paragraph
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def random_text(rng, length):
+    alphabet = ['a', 'b', 'c', ' ', ' ', '\n', '\n', '\t', '\r', '\x0c']
+    return ''.join(rng.choice(alphabet) for _ in range(length))
+
+
+def random_split(rng, text):
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text), rng.randint(0, 8))))
+    bounds = [0] + cuts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_matches_legacy_output(seed):
+    rng = random.Random(seed)
+    text = random_text(rng, rng.randint(0, 300))
+    max_size = rng.randint(1, 40)
+    assert chunk_text(text, max_size) == legacy_chunk_text(text, max_size)
+
+    pieces = random_split(rng, text)
+    expected = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+    assert list(iter_paragraphs(pieces)) == expected
+
+
+def test_chunk_pages_matches_joined_text(ofw_pdf):
+    fitz = pytest.importorskip('fitz')
+    with fitz.open(str(ofw_pdf)) as pdf:
+        pages = [page.get_text() for page in pdf]
+    for max_size in (500, 100000):
+        assert list(chunk_pages(pages, max_size)) == legacy_chunk_text('\n\n'.join(pages), max_size)
+
+
+def test_oversized_paragraph_is_its_own_chunk():
+    assert list(iter_chunks(['x' * 10, 'y', 'z' * 3], max_size=5)) == ['x' * 10, 'y', 'zzz']
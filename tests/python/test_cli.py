@@ -0,0 +1,74 @@
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from extraction import backends
+from extraction.chunking import chunk_pages
+from extraction.worker import handle
+
+SCRIPT = Path(__file__).resolve().parents[2] / 'scripts' / 'extract.py'
+HEAVY_MODULES = {'fitz', 'pymupdf', 'pdfminer', 'pikepdf', 'PyPDF2', 'tika'}
+# Generous, since CI machines are slow; a backend import alone costs more
+STARTUP_BUDGET = 1.0
+
+
+def run(*args):
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, timeout=120)
+
+
+def imported_modules(importtime):
+    # Lines look like "import time:       412 |        412 |   fitz"
+    return {line.split('|')[-1].strip().split('.')[0]
+            for line in importtime.splitlines() if line.startswith('import time:') and '|' in line}
+
+
+@pytest.mark.parametrize('flag', ['--list-backends', '--help'])
+def test_startup_imports_no_backend(flag):
+    result = run('-X', 'importtime', str(SCRIPT), flag)
+    assert result.returncode == 0, result.stderr
+    assert not imported_modules(result.stderr) & HEAVY_MODULES
+
+
+def test_list_backends_is_fast():
+    start = time.perf_counter()
+    result = run(str(SCRIPT), '--list-backends', '--json')
+    elapsed = time.perf_counter() - start
+
+    assert result.returncode == 0, result.stderr
+    listed = json.loads(result.stdout)
+    assert [backend['name'] for backend in listed] == list(backends.BACKENDS)
+    assert elapsed < STARTUP_BUDGET
+
+
+def test_list_backends_does_not_load_modules():
+    before = set(sys.modules)
+    listed = {backend['name']: backend for backend in backends.list_backends()}
+    assert not {name.split('.')[0] for name in set(sys.modules) - before} & HEAVY_MODULES
+    assert listed['pypdf2']['available'] == backends.get_backend('pypdf2').available()
+    assert handle({'id': 1, 'op': 'backends'})['backends'] == list(listed.values())
+
+
+def test_extracts_like_the_backend_script(make_pdf, tmp_path):
+    pytest.importorskip('fitz')
+    path = make_pdf([['Message 1', 'First body'], ['Message 2', 'Second body']])
+    result = run(str(SCRIPT), str(path), '--output-dir', str(tmp_path / 'out'), '--no-cache', '--max-size', '20')
+    assert result.returncode == 0, result.stdout
+
+    pages = backends.extract('fitz', path)['pages']
+    assert (tmp_path / 'out' / 'raw' / 'extracted-text.txt').read_text(encoding='utf-8') == '\n\n'.join(pages)
+    chunks = [p.read_text(encoding='utf-8') for p in sorted((tmp_path / 'out' / 'llm-input').glob('chunk-*.txt'))]
+    assert chunks == list(chunk_pages(pages, 20)) and len(chunks) > 1
+
+
+def test_missing_backend_fails_cleanly(make_pdf, tmp_path):
+    missing = [name for name, backend in backends.BACKENDS.items() if not backend.available()]
+    if not missing:
+        pytest.skip("every backend is installed")
+    result = run(str(SCRIPT), str(make_pdf([['text']])), '--backend', missing[0],
+                 '--output-dir', str(tmp_path / 'out'))
+    assert result.returncode == 1
+    assert 'not installed' in result.stdout
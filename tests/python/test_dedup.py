@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+from extraction import backends
+from extraction.dedup import DedupIndex, MinHasher, dedup_pages, iter_units, similarity
+from extraction.messages import segment
+from extraction.worker import handle
+
+WORDS = ('pickup school mediation condo tenant expenses schedule weekend basketball game dinner '
+         'spreadsheet lawyer listing offer notice holiday practice doctor appointment').split()
+
+
+def prose(seed, words=120):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(words)) + '.'
+
+
+def message(number, total, body, quoted=None):
+    lines = [f'Message {number} of {total}', body, 'Sent:', '12/01/2024 at 01:02 AM', 'From:', 'Robert Moyer',
+             'To:', 'Christine Moyer (First Viewed: 12/01/2024 at 07:30 AM)', 'Subject:', 'Re: Condo Sale']
+    if quoted:
+        lines += ['On 11/30/2024 at 03:09 PM, Christine Moyer wrote:', 'To:', 'Robert Moyer', 'Subject:',
+                  'Condo Sale', quoted]
+    return '\n'.join(lines)
+
+
+def test_similar_texts_have_similar_signatures():
+    hasher = MinHasher()
+    text = prose(1, 200)
+    edited = text.replace('pickup', 'drop-off', 1)
+    assert similarity(hasher.signature(text), hasher.signature(text)) == 1.0
+    assert similarity(hasher.signature(text), hasher.signature(edited)) >= 0.8
+    assert similarity(hasher.signature(text), hasher.signature(prose(2, 200))) < 0.3
+
+
+def test_units_split_quoted_replies():
+    text = '\n'.join([message(1, 2, 'First body.'), message(2, 2, 'Second body.', quoted='First body.'),
+                      'Page 1 of 1'])
+    units = [(label, [text[start:end] for start, end in spans]) for label, spans in iter_units(text, segment(text))]
+    assert units == [
+        ('Message 1', ['First body.']),
+        ('Message 2', ['Second body.']),
+        # The quote's "wrote:" line and headers are not part of the unit
+        ('the reply quoted in Message 2', ['First body.']),
+    ]
+
+
+def test_units_fall_back_to_paragraphs():
+    text = '  One.\n\n \n\nTwo\nlines.\n\nThree.\n'
+    units = [(label, [text[start:end] for start, end in spans]) for label, spans in iter_units(text)]
+    assert units == [('paragraph 1', ['One.']), ('paragraph 2', ['Two\nlines.']), ('paragraph 3', ['Three.'])]
+
+
+def test_quoted_replies_become_references():
+    first, second = prose(1), prose(2)
+    pages = [message(1, 3, first), message(2, 3, second, quoted=first) + '\nPage 1 of 2',
+             message(3, 3, 'Short reply.', quoted=second) + '\nPage 2 of 2']
+
+    deduped, report = dedup_pages(pages)
+
+    assert deduped[0] == pages[0]
+    assert first not in deduped[1] and second in deduped[1]
+    assert 'On 11/30/2024 at 03:09 PM, Christine Moyer wrote:\nTo:\nRobert Moyer\nSubject:\nCondo Sale\n' \
+           f'[Duplicate of Message 1 above, {len(first):,} chars omitted]' in deduped[1]
+    assert f'[Duplicate of Message 2 above, {len(second):,} chars omitted]\nPage 2 of 2' in deduped[2]
+    assert (report['units'], report['duplicates'], report['in_document'], report['from_index']) == (5, 2, 2, 0)
+    assert report['chars_saved'] == sum(map(len, pages)) - sum(map(len, deduped))
+    assert report['tokens_saved'] > 0
+    assert [item['duplicate_of'] for item in report['replaced']] == ['Message 1', 'Message 2']
+
+
+def test_index_finds_duplicates_in_earlier_documents(tmp_path):
+    index = DedupIndex(tmp_path / 'dedup.sqlite3')
+    november = [prose(seed) for seed in range(5)]
+    december = [prose(3), prose(10), prose(4).replace('school', 'home', 1)]
+
+    _, report = dedup_pages(november, doc='nov', name='Nov.pdf', index=index)
+    assert report['duplicates'] == 0
+    assert index.stats()['units'] == 5
+
+    deduped, report = dedup_pages(december, doc='dec', name='Dec.pdf', index=index)
+    assert deduped[0] == f'[Duplicate of paragraph 4 in Nov.pdf, {len(prose(3)):,} chars omitted]'
+    assert deduped[1] == december[1]
+    assert deduped[2].startswith('[Duplicate of paragraph 5 in Nov.pdf')
+    assert (report['from_index'], report['in_document']) == (2, 0)
+
+    # Re-running a document replaces its own units instead of matching them
+    _, report = dedup_pages(december, doc='dec', name='Dec.pdf', index=index)
+    assert report['from_index'] == 2
+    assert index.stats() == {'documents': 2, 'units': 6, 'hasher': index.hasher.name}
+    index.close()
+
+
+def test_index_resets_for_other_hashers(tmp_path):
+    path = tmp_path / 'dedup.sqlite3'
+    index = DedupIndex(path)
+    dedup_pages([prose(1)], doc='a', index=index)
+    index.close()
+
+    index = DedupIndex(path, hasher=MinHasher(permutations=32))
+    assert index.stats()['units'] == 0
+    index.close()
+
+
+def test_ofw_report_quotes_are_removed(ofw_pdf):
+    pytest.importorskip('fitz')
+    pages = backends.extract('fitz', ofw_pdf)['pages']
+    deduped, report = dedup_pages(pages)
+
+    assert report['duplicates'] > 400
+    assert report['chars_saved'] > len('\n\n'.join(pages)) // 3
+    # Every message header survives
+    assert len(segment('\n\n'.join(deduped))) == 287
+
+
+def test_worker_dedups_chunks(ofw_pdf):
+    pytest.importorskip('fitz')
+    plain = handle({'op': 'extract', 'backend': 'fitz', 'file': str(ofw_pdf)})
+    response = handle({'op': 'extract', 'backend': 'fitz', 'file': str(ofw_pdf), 'dedup': True})
+
+    assert response['ok'] and response['cached']
+    assert response['text'] == plain['text']
+    assert sum(map(len, response['chunks'])) < sum(map(len, plain['chunks'])) - response['dedup']['chars_saved'] // 2
+    assert response['dedup']['in_document'] == response['dedup']['duplicates']
@@ -0,0 +1,127 @@
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+from extraction import backends
+from extraction.external import ExternalCommandError, FileWatch, run_external, run_many
+
+# Stand-in for Adobe: writes the output file in stages, then behaves as told
+WRITER = textwrap.dedent('''
+    import os, sys, time
+    input_path, output_path, mode = sys.argv[1:4]
+    if mode == 'fail':
+        print('cannot open document')
+        sys.exit(2)
+    if mode == 'hang':
+        time.sleep(60)
+    target = output_path + '.part' if mode == 'rename' else output_path
+    with open(target, 'w', encoding='utf-8') as f:
+        f.write('first half ')
+        f.flush()
+        time.sleep(0.3)
+        f.write('second half of ' + os.path.basename(input_path))
+    if mode == 'rename':
+        os.replace(target, output_path)
+    if mode == 'linger':
+        # Like a viewer that stays open after saving
+        time.sleep(60)
+''')
+
+PDFTOTEXT = textwrap.dedent('''\
+    #!{python}
+    import contextlib, io, sys
+    with contextlib.redirect_stdout(io.StringIO()):
+        import fitz
+    if sys.argv[1] == '-v':
+        print('pdftotext version 0.0-stub', file=sys.stderr)
+        sys.exit(0)
+    with fitz.open(sys.argv[-2]) as pdf:
+        for page in pdf:
+            sys.stdout.write(page.get_text() + '\\f')
+''')
+
+
+@pytest.fixture
+def writer(tmp_path):
+    script = tmp_path / 'writer.py'
+    script.write_text(WRITER, encoding='utf-8')
+
+    def command(mode):
+        return {'argv': [sys.executable, str(script), '{input}', '{output}', mode], 'output': 'file'}
+
+    return command
+
+
+@pytest.fixture
+def pdftotext(tmp_path, monkeypatch):
+    pytest.importorskip('fitz')
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    stub = bin_dir / 'pdftotext'
+    stub.write_text(PDFTOTEXT.format(python=sys.executable), encoding='utf-8')
+    stub.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return stub
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / 'input.pdf'
+    path.write_bytes(b'%PDF-1.4 stand-in')
+    return path
+
+
+@pytest.mark.parametrize('inotify', [True, False])
+@pytest.mark.parametrize('mode', ['exit', 'rename', 'linger'])
+def test_file_output_is_read_once_complete(writer, pdf, tmp_path, monkeypatch, mode, inotify):
+    if not inotify:
+        # The polling path used where inotify is unavailable, as on Windows
+        monkeypatch.setattr(FileWatch, 'supported', staticmethod(lambda: False))
+    start = time.monotonic()
+    text = run_external(writer(mode), pdf, tmp_path / 'out.txt', timeout=20)
+    assert text == 'first half second half of input.pdf'
+    assert time.monotonic() - start < 10
+
+
+def test_failing_command_is_reported_without_waiting(writer, pdf):
+    start = time.monotonic()
+    with pytest.raises(ExternalCommandError, match='code 2: cannot open document'):
+        run_external(writer('fail'), pdf, timeout=20)
+    assert time.monotonic() - start < 10
+
+
+def test_timeout_kills_the_job(writer, pdf):
+    start = time.monotonic()
+    with pytest.raises(ExternalCommandError, match='within 0.5s'):
+        run_external(writer('hang'), pdf, timeout=0.5)
+    assert time.monotonic() - start < 10
+
+
+def test_jobs_run_concurrently_with_independent_timeouts(writer, tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f'doc-{i}.pdf'
+        path.write_bytes(b'%PDF-1.4')
+        paths.append(path)
+
+    results = run_many(writer('exit'), paths, concurrency=4, timeout=20)
+    assert [text for _, text, _ in results] == [f'first half second half of doc-{i}.pdf' for i in range(4)]
+
+    results = run_many(writer('hang'), paths[:2], concurrency=2, timeout=0.5)
+    assert all(isinstance(error, ExternalCommandError) for _, _, error in results)
+
+
+def test_pdftotext_backend(pdftotext, make_pdf):
+    path = make_pdf([['page one'], ['page two'], ['page three']])
+    result = backends.extract('pdftotext', path)
+    assert [page.strip() for page in result['pages']] == ['page one', 'page two', 'page three']
+    assert backends.extract_page_numbers('pdftotext', path, [2])[2].strip() == 'page three'
+    assert backends.get_backend('pdftotext').version() == 'pdftotext version 0.0-stub'
+
+
+def test_missing_input(writer, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        run_external(writer('exit'), tmp_path / 'missing.pdf')
@@ -0,0 +1,73 @@
+import pytest
+
+from extraction import backends
+from extraction.incremental import incremental_extract, page_fingerprints
+from extraction.streaming import stream_extract
+
+pytest.importorskip('pikepdf')
+
+
+def pages_for(count, changed=()):
+    pages = []
+    for i in range(count):
+        body = f"updated body {i}" if i in changed else f"body {i}"
+        pages.append([f"Message {i + 1}", 'From: Robert Moyer', body])
+    return pages
+
+
+def read_output(output_dir):
+    raw = (output_dir / 'raw' / 'extracted-text.txt').read_text(encoding='utf-8')
+    chunks = [p.read_text(encoding='utf-8') for p in sorted((output_dir / 'llm-input').glob('chunk-*.txt'))]
+    return raw, chunks
+
+
+def test_fingerprints_ignore_object_numbers(make_pdf):
+    first = make_pdf(pages_for(5), name='first.pdf')
+    # Same pages at different positions in a different file
+    second = make_pdf(pages_for(7)[2:] + pages_for(2), name='second.pdf')
+    a = page_fingerprints(first)
+    b = page_fingerprints(second)
+    assert len(set(a)) == 5
+    assert b[:3] == a[2:]
+    assert b[5:] == a[:2]
+
+
+@pytest.mark.parametrize('backend', ['fitz', 'pdfminer'])
+def test_incremental_run_matches_full_run(make_pdf, tmp_path, backend):
+    output_dir = tmp_path / 'incremental'
+    december = make_pdf(pages_for(30), name='december.pdf')
+    first = incremental_extract(backend, december, output_dir, max_size=300)
+    assert first['extracted'] == 30
+
+    january = make_pdf(pages_for(40, changed={28}), name='january.pdf')
+    second = incremental_extract(backend, january, output_dir, max_size=300)
+    assert second['reused'] == 29
+    assert second['extracted'] == 11
+    assert 0 < second['chunks_written'] < second['chunks']
+
+    stream_extract(backend, january, tmp_path / 'full', max_size=300)
+    assert read_output(output_dir) == read_output(tmp_path / 'full')
+
+
+def test_changed_settings_force_full_extraction(make_pdf, tmp_path):
+    path = make_pdf(pages_for(3))
+    incremental_extract('pdfminer', path, tmp_path / 'out')
+    stats = incremental_extract('pdfminer', path, tmp_path / 'out', laparams={'detect_vertical': False})
+    assert stats['extracted'] == 3
+
+
+def test_pages_with_carriage_returns_are_reused(make_pdf, tmp_path, monkeypatch):
+    def crlf_pages(input_path, page_numbers=None):
+        for page in backends.fitz_pages(input_path, page_numbers=page_numbers):
+            yield page.replace('\n', '\r\n')
+
+    monkeypatch.setitem(backends.BACKENDS, 'crlf', backends.Backend('crlf', 'fitz', crlf_pages, '\n\n'))
+    path = make_pdf(pages_for(6))
+    incremental_extract('crlf', path, tmp_path / 'out', max_size=100)
+    chunk = tmp_path / 'out' / 'llm-input' / 'chunk-001.txt'
+    written = chunk.stat().st_mtime_ns
+
+    stats = incremental_extract('crlf', path, tmp_path / 'out', max_size=100)
+    assert (stats['reused'], stats['extracted'], stats['chunks_written']) == (6, 0, 0)
+    assert chunk.stat().st_mtime_ns == written
+    assert b'\r\n' in chunk.read_bytes()
@@ -0,0 +1,68 @@
+import io
+import mmap
+import multiprocessing
+import os
+
+import pytest
+
+from extraction import backends, mapped
+
+
+def test_reader_behaves_like_a_binary_file(tmp_path):
+    path = tmp_path / 'data.bin'
+    data = bytes(range(256)) * 40
+    path.write_bytes(data)
+
+    with mapped.open_reader(path) as reader, open(path, 'rb') as f:
+        for offset, whence, size in [(0, io.SEEK_SET, 10), (5, io.SEEK_CUR, 300), (-20, io.SEEK_END, 50),
+                                     (100, io.SEEK_SET, -1), (20000, io.SEEK_SET, 5)]:
+            assert reader.seek(offset, whence) == f.seek(offset, whence)
+            assert reader.read(size) == f.read(size)
+            assert reader.tell() == f.tell()
+
+
+def test_view_is_the_mapping_itself(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'%PDF-1.4 body')
+    view = mapped.map_view(path)
+    assert isinstance(view.obj, mmap.mmap)
+    assert view.readonly
+    assert bytes(view) == b'%PDF-1.4 body'
+    view.release()
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.pdf'
+    path.write_bytes(b'')
+    assert mapped.open_reader(path).read() == b''
+
+
+def _child_view(path, queue):
+    view = mapped.map_view(path)
+    key = mapped._key(path)
+    queue.put((key in mapped._shared, view.obj is mapped._shared.get(key), bytes(view[:5])))
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_forked_workers_share_the_parent_mapping(tmp_path):
+    path = tmp_path / 'data.pdf'
+    path.write_bytes(b'%PDF-' + b'x' * 100000)
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+
+    with mapped.shared(path):
+        process = context.Process(target=_child_view, args=(str(path), queue))
+        process.start()
+        inherited, same_mapping, head = queue.get(timeout=30)
+        process.join()
+    assert inherited and same_mapping and head == b'%PDF-'
+    assert mapped._key(path) not in mapped._shared
+
+
+def test_backends_read_from_the_mapping(make_pdf):
+    pytest.importorskip('fitz')
+    path = make_pdf([['first page'], ['second page']])
+    pdf = backends.open_fitz(path)
+    assert isinstance(pdf.stream, memoryview)
+    pdf.close()
+    assert [page.strip() for page in backends.fitz_pages(path)] == ['first page', 'second page']
@@ -0,0 +1,93 @@
+import pytest
+
+from extraction import backends
+from extraction.messages import read_messages, segment, segment_pages, write_messages
+
+# Header values on the line after each label, with the first body line
+# ahead of the headers, the way PyMuPDF lays out OFW reports
+STACKED = [
+    "OurFamilyWizard\nMessage Report\nNumber of messages: 2\nThird Party:\n"
+    "Message 1 of 2\nThanks Christine.\nSent:\n12/01/2024 at 01:02 AM\nFrom:\nRobert Moyer\n"
+    "To:\nChristine Moyer (First Viewed: 12/01/2024 at 07:30 AM)\nSubject:\nRe: Condo Sale\n"
+    "On 11/30/2024 at 03:09 PM, Christine Moyer wrote:\nTo:\nRobert Moyer\nSubject:\nCondo Sale\n"
+    "Ok.\nPage 1 of 2\n",
+    "Quoted text continues.\nMessage 2 of 2\nSent:\n12/02/2024 at 09:41 PM\nFrom:\nChristine Moyer\n"
+    "To:\nRobert Moyer (First Viewed: Never)\nSubject:\nPickup\nSee you at 5.\nPage 2 of 2\n",
+]
+
+# Labels first, then their values, the way pdfminer lays out the same header
+GROUPED = (
+    "Message 1 of 1\n\nSent:\n\nFrom:\n\nTo:\n\n12/01/2024 at 01:02 AM\n\nRobert Moyer\n\n"
+    "Christine Moyer (First Viewed: 12/01/2024 at 07:30 AM)\n\nSubject:\n\nRe: Condo Sale\n\n"
+    "Thanks Christine.\n\n\x0cPage 1 of 1\n"
+)
+
+
+def body_text(text, message):
+    return [text[start:end] for start, end in message['body']]
+
+
+def test_stacked_headers():
+    text = '\n\n'.join(STACKED)
+    first, second = segment_pages(STACKED)
+
+    assert first['number'] == 1 and first['total'] == 2
+    assert first['sent'] == '12/01/2024 at 01:02 AM'
+    assert first['date'] == '2024-12-01T01:02:00'
+    assert first['from'] == 'Robert Moyer'
+    assert first['to'] == 'Christine Moyer'
+    assert first['first_viewed'] == '12/01/2024 at 07:30 AM'
+    assert first['subject'] == 'Re: Condo Sale'
+    assert first['pages'] == [1, 2]
+    assert text[first['offset']:first['end']].startswith('Message 1 of 2')
+    assert text[first['offset']:first['end']].endswith('Quoted text continues.')
+
+    # Quoted headers stay in the body, page footers do not
+    assert body_text(text, first) == [
+        'Thanks Christine.',
+        'On 11/30/2024 at 03:09 PM, Christine Moyer wrote:\nTo:\nRobert Moyer\nSubject:\nCondo Sale\nOk.',
+        'Quoted text continues.',
+    ]
+
+    assert second['date'] == '2024-12-02T21:41:00'
+    assert second['first_viewed'] == 'Never'
+    assert second['pages'] == [2, 2]
+    assert body_text(text, second) == ['See you at 5.']
+
+
+def test_inline_and_grouped_headers_agree():
+    inline = (
+        "Message 1 of 1\nSent: 12/01/2024 at 01:02 AM\nFrom: Robert Moyer\n"
+        "To: Christine Moyer (First Viewed: 12/01/2024 at 07:30 AM)\nSubject: Re: Condo Sale\n"
+        "Thanks Christine.\nPage 1 of 1\n"
+    )
+    fields = ('sent', 'date', 'from', 'to', 'first_viewed', 'subject')
+    [a], [b] = segment(inline), segment(GROUPED)
+    assert {k: a[k] for k in fields} == {k: b[k] for k in fields}
+    assert body_text(inline, a) == body_text(GROUPED, b) == ['Thanks Christine.']
+    assert 'pages' not in a
+
+
+def test_unparseable_date():
+    [message] = segment("Message 1 of 1\nSent: yesterday\nSubject: Hi\nBody")
+    assert message['sent'] == 'yesterday'
+    assert message['date'] is None
+    assert message['from'] is None
+
+
+def test_write_and_read(tmp_path):
+    messages = segment_pages(STACKED)
+    path = tmp_path / 'messages.jsonl'
+    assert write_messages(messages, path) == 2
+    assert read_messages(path) == messages
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 2
+
+
+def test_ofw_report(ofw_pdf):
+    pytest.importorskip('pikepdf')
+    pages = list(backends.pike_pages(ofw_pdf))
+    messages = segment_pages(pages)
+    assert [m['number'] for m in messages] == list(range(1, 288))
+    assert all(m['date'] and m['from'] and m['to'] and m['subject'] for m in messages)
+    assert messages[0]['pages'][0] == 1 and messages[-1]['pages'][1] == len(pages)
+    assert [m['date'] for m in messages] == sorted(m['date'] for m in messages)
@@ -0,0 +1,100 @@
+import urllib.request
+
+import pytest
+
+from extraction import metrics
+from extraction.cache import ExtractionCache, cached_extract
+from extraction.progress import Progress
+from extraction.worker import handle
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.REGISTRY.clear()
+    yield
+    metrics.REGISTRY.clear()
+
+
+def test_histogram_exposition():
+    registry = metrics.Registry()
+    histogram = registry.histogram('demo_seconds', 'Demo latency', ('backend',), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        histogram.observe(value, backend='fitz')
+    registry.counter('demo_total', 'Demo count', ('result',)).inc(result='hit')
+
+    assert registry.render().splitlines() == [
+        '# HELP demo_seconds Demo latency',
+        '# TYPE demo_seconds histogram',
+        'demo_seconds_bucket{backend="fitz",le="0.1"} 1',
+        'demo_seconds_bucket{backend="fitz",le="1"} 3',
+        'demo_seconds_bucket{backend="fitz",le="+Inf"} 4',
+        'demo_seconds_sum{backend="fitz"} 4.05',
+        'demo_seconds_count{backend="fitz"} 4',
+        '# HELP demo_total Demo count',
+        '# TYPE demo_total counter',
+        'demo_total{result="hit"} 1',
+    ]
+
+
+def test_labels_are_checked():
+    registry = metrics.Registry()
+    counter = registry.counter('demo_total', 'Demo', ('result',))
+    with pytest.raises(ValueError):
+        counter.inc(outcome='hit')
+    assert registry.counter('demo_total', 'Demo', ('result',)) is counter
+    with pytest.raises(ValueError):
+        registry.histogram('demo_total', 'Demo')
+
+
+def test_instrument_pages():
+    pages = list(metrics.instrument_pages('fitz', iter(['abc', 'é'])))
+    assert pages == ['abc', 'é']
+    assert metrics.PAGE_SECONDS.count(backend='fitz') == 2
+    assert metrics.PAGE_CHARS._values[('fitz',)]['sum'] == 4
+    assert metrics.PAGE_BYTES._values[('fitz',)]['sum'] == 5
+
+
+def test_textfile_and_endpoint(tmp_path):
+    metrics.CACHE_REQUESTS.inc(result='miss')
+    path = tmp_path / 'extract.prom'
+    metrics.write_textfile(path)
+    assert 'extract_cache_requests_total{result="miss"} 1' in path.read_text(encoding='utf-8')
+    assert [p.name for p in tmp_path.iterdir()] == ['extract.prom']
+
+    server = metrics.serve(0)
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'extract_cache_requests_total{result="miss"} 1' in response.read().decode('utf-8')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_progress_is_rate_limited():
+    now = [0.0]
+    events = []
+    progress = Progress('extract', total=100, interval=1.0, emit=events.append, clock=lambda: now[0])
+    for _ in range(100):
+        now[0] += 0.03125
+        progress.update()
+    progress.finish()
+
+    assert [event['event'] for event in events] == ['progress'] * 3 + ['done']
+    assert [event['done'] for event in events] == [32, 64, 96, 100]
+    assert events[-1]['rate'] == pytest.approx(32.0)
+
+
+def test_cache_and_worker_metrics(make_pdf):
+    path = make_pdf([['one'], ['two']])
+    cache = ExtractionCache()
+    cached_extract('fitz', path, cache)
+    cached_extract('fitz', path, cache)
+    assert metrics.CACHE_REQUESTS.value(result='miss') == 1
+    assert metrics.CACHE_REQUESTS.value(result='hit') == 1
+    assert metrics.PAGE_SECONDS.count(backend='fitz') == 2
+    assert metrics.STAGE_SECONDS.count(backend='fitz', stage='extract') == 1
+
+    response = handle({'op': 'metrics'})
+    assert 'extract_stage_seconds_count{backend="fitz",stage="chunk"} 1' in response['metrics']
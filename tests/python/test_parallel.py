@@ -0,0 +1,48 @@
+import pytest
+
+from extraction import backends
+from extraction.parallel import fitz_pages_parallel, plan_shards, shard_ranges
+
+
+def test_shard_ranges_cover_every_page_in_order():
+    for pages in (1, 7, 100, 358):
+        for shards in (1, 3, 16, 500):
+            ranges = shard_ranges(pages, shards)
+            assert ranges[0][0] == 0 and ranges[-1][1] == pages
+            assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+            assert len(ranges) <= shards
+
+
+def test_plan_shards_keeps_small_documents_whole():
+    assert plan_shards(5, 8) == [(0, 5)]
+
+
+def test_parallel_output_is_identical_to_serial(ofw_pdf):
+    pytest.importorskip('fitz')
+    serial = list(backends.fitz_pages(ofw_pdf))
+    parallel = list(fitz_pages_parallel(ofw_pdf, workers=4))
+    assert parallel == serial
+    assert '\n\n'.join(parallel).encode() == '\n\n'.join(serial).encode()
+
+
+def test_pdfminer_shards_match_serial_output(make_pdf):
+    pytest.importorskip('pdfminer')
+    from extraction.parallel import pdfminer_pages_parallel
+
+    path = make_pdf([[f"Message {i}", f"From: Parent {i % 2}"] for i in range(24)])
+    serial = list(backends.pdfminer_pages(path))
+    assert list(pdfminer_pages_parallel(path, workers=3)) == serial
+    fast = backends.PDFMINER_PROFILES['fast']
+    assert list(pdfminer_pages_parallel(path, fast, workers=3)) == list(backends.pdfminer_pages(path, fast))
+
+
+def test_profile_comparison_reports_difference_from_default(make_pdf):
+    pytest.importorskip('pdfminer')
+    from extraction.profiles import compare_pdfminer_profiles
+
+    path = make_pdf([['Message 1', 'Subject: Pickup'], ['Message 2', 'Subject: Dropoff']])
+    report = compare_pdfminer_profiles(path, ['fast', 'none'])
+    assert set(report) == {'default', 'fast', 'none'}
+    assert report['default']['similarity'] == 1.0
+    assert all(0.0 <= stats['similarity'] <= 1.0 for stats in report.values())
+    assert all(stats['pages'] == 2 for stats in report.values())
@@ -0,0 +1,111 @@
+import pytest
+
+pikepdf = pytest.importorskip('pikepdf')
+
+from extraction import backends
+from extraction.pike_text import FontDecoder, PikeTextExtractor, parse_cmap, pike_text_pages
+from extraction.profiles import page_similarity
+
+CMAP = b'''
+/CIDInit /ProcSet findresource begin
+begincmap
+1 begincodespacerange
+<0000><FFFF>
+endcodespacerange
+2 beginbfchar
+<0003> <0020>
+<0010> <00660069>
+endbfchar
+2 beginbfrange
+<0020><0022><0041>
+<0030><0031>[<0078> <0079>]
+endbfrange
+endcmap
+'''
+
+
+def test_parse_cmap():
+    mapping, lengths = parse_cmap(CMAP)
+    assert lengths == [2]
+    assert mapping[b'\x00\x03'] == ' '
+    assert mapping[b'\x00\x10'] == 'fi'
+    assert [mapping[bytes([0, c])] for c in (0x20, 0x21, 0x22)] == ['A', 'B', 'C']
+    assert mapping[b'\x00\x30'] == 'x' and mapping[b'\x00\x31'] == 'y'
+
+
+def test_font_decoders():
+    pdf = pikepdf.new()
+    composite = pdf.make_indirect(pikepdf.Dictionary(
+        Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type0, Encoding=pikepdf.Name('/Identity-H'),
+        ToUnicode=pdf.make_stream(CMAP)))
+    assert FontDecoder(composite).decode(b'\x00\x20\x00\x03\x00\x10\x00\x31') == 'A fiy'
+
+    simple = pikepdf.Dictionary(
+        Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1,
+        Encoding=pikepdf.Dictionary(BaseEncoding=pikepdf.Name.WinAnsiEncoding,
+                                    Differences=[65, pikepdf.Name.quoteright, pikepdf.Name.uni00E9]))
+    assert FontDecoder(simple).decode(b'AB\x93C') == '’é“C'
+
+    unmapped = pikepdf.Dictionary(Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type0)
+    assert FontDecoder(unmapped).decode(b'\x00\x20') == ''
+
+
+def test_text_operators(tmp_path):
+    pdf = pikepdf.new()
+    font = pdf.make_indirect(pikepdf.Dictionary(
+        Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1, BaseFont=pikepdf.Name.Helvetica,
+        Encoding=pikepdf.Name.WinAnsiEncoding))
+    content = b'''BT /F1 12 Tf 14 TL 72 720 Td (Hello) Tj [(wor) -20 (ld) -400 (again)] TJ
+    T* (second line) Tj (third) ' 0 -14 Td (fourth) Tj ET
+    BT 1 0 0 1 300 678 Tm (same row) Tj ET'''
+    pdf.add_blank_page()
+    page = pdf.pages[0]
+    page.obj.Resources = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font))
+    page.obj.Contents = pdf.make_stream(content)
+    path = tmp_path / 'operators.pdf'
+    pdf.save(path)
+
+    text = list(pike_text_pages(path))[0]
+    assert text == 'Helloworld again\nsecond line\nthird\nfourth same row\n'
+
+
+def test_inline_fonts_are_not_shared_across_pages(tmp_path):
+    pdf = pikepdf.new()
+    for glyph in (pikepdf.Name.quoteright, pikepdf.Name.uni00E9):
+        # Same resource name and shape on each page, different encoding
+        font = pikepdf.Dictionary(Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1,
+                                  Encoding=pikepdf.Dictionary(BaseEncoding=pikepdf.Name.WinAnsiEncoding,
+                                                              Differences=[65, glyph]))
+        pdf.add_blank_page()
+        page = pdf.pages[-1]
+        page.obj.Resources = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font))
+        page.obj.Contents = pdf.make_stream(b'BT /F1 12 Tf 72 720 Td (AB) Tj ET')
+    path = tmp_path / 'inline.pdf'
+    pdf.save(path)
+
+    with pikepdf.open(path) as pdf:
+        extractor = PikeTextExtractor(pdf)
+        assert [extractor.page_text(page) for page in pdf.pages] == ['’B\n', 'éB\n']
+        assert extractor._decoders == {}
+
+
+def test_ofw_report_matches_pymupdf_words(ofw_pdf):
+    pytest.importorskip('fitz')
+    pages = list(backends.pike_pages(ofw_pdf, page_numbers=[0, 100, 357]))
+    expected = list(backends.fitz_pages(ofw_pdf, page_numbers=[0, 100, 357]))
+    for actual, reference in zip(pages, expected):
+        assert page_similarity(reference, actual) > 0.99
+    assert 'Message 1 of 287' in pages[0]
+
+
+def test_fonts_are_decoded_once_per_document(ofw_pdf):
+    with pikepdf.open(ofw_pdf) as pdf:
+        extractor = PikeTextExtractor(pdf)
+        for page in list(pdf.pages)[:20]:
+            extractor.page_text(page)
+        # The report shares a handful of font objects across all pages
+        assert len(extractor._decoders) <= 6
+
+
+def test_backend_version_changes_with_decoder():
+    assert backends.get_backend('pikepdf').version().endswith('+text2')
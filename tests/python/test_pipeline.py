@@ -0,0 +1,114 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from extraction import backends
+from extraction.pipeline import MonitoredQueue, run_pipeline
+from extraction.search import SearchIndex
+from extraction.streaming import stream_extract
+
+pytest.importorskip('fitz')
+
+
+def read_output(output_dir):
+    text = (output_dir / 'raw' / 'extracted-text.txt').read_text(encoding='utf-8')
+    chunks = [path.read_text(encoding='utf-8') for path in sorted((output_dir / 'llm-input').glob('chunk-*.txt'))]
+    return text, chunks
+
+
+def test_output_matches_stream_extract(make_pdf, tmp_path):
+    first = make_pdf([[f'Message {i}', f'Body of page {i}'] for i in range(1, 41)], name='first.pdf')
+    second = make_pdf([['Another report'], ['Second page']], name='second.pdf')
+
+    summary = run_pipeline([first, second], tmp_path / 'out', 'fitz', workers=2, max_size=300, shard_pages=7)
+
+    assert [r['ok'] for r in summary['results']] == [True, True]
+    assert summary['pages'] == 42
+    for path in (first, second):
+        stream_extract('fitz', path, tmp_path / 'stream' / path.stem, max_size=300)
+        assert read_output(tmp_path / 'out' / path.stem) == read_output(tmp_path / 'stream' / path.stem)
+    # 6 shards of the first document and one of the second
+    assert summary['stages']['extract']['items'] == 7
+    assert summary['stages']['write']['items'] == 2
+    assert summary['bottleneck'] in summary['stages']
+    assert all(queue['max_depth'] <= queue['size'] for queue in summary['queues'].values())
+
+
+def test_failures_do_not_stop_the_pipeline(make_pdf, tmp_path):
+    good = make_pdf([['Message 1'], ['Message 2']], name='good.pdf')
+    bad = tmp_path / 'bad.pdf'
+    bad.write_text('not a pdf')
+    results = []
+
+    summary = run_pipeline([bad, good], tmp_path / 'out', 'fitz', workers=2, shard_pages=1,
+                           on_result=results.append)
+
+    assert [r['ok'] for r in summary['results']] == [False, True]
+    assert len(results) == 2 and summary['failed'] == 1
+    assert not (tmp_path / 'out' / 'bad').exists()
+    assert (tmp_path / 'out' / 'good' / 'raw' / 'extracted-text.txt').exists()
+
+
+def crash_pages(input_path, **options):
+    if 'crash' in os.path.basename(input_path):
+        os._exit(1)
+    if 'slow' in os.path.basename(input_path):
+        # Still running when a crash takes the pool down
+        time.sleep(0.5)
+    yield from backends.fitz_pages(input_path, **options)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason="the stub backend reaches workers by fork")
+def test_a_document_that_kills_its_worker_does_not_stop_the_pipeline(make_pdf, tmp_path, monkeypatch):
+    monkeypatch.setitem(backends.BACKENDS, 'crashy', backends.Backend('crashy', 'fitz', crash_pages, '\n\n'))
+    files = [make_pdf([['First']], name='slow-a.pdf'), make_pdf([['Boom']], name='crash.pdf'),
+             make_pdf([['Second'], ['Page two']], name='slow-b.pdf'), make_pdf([['Bang']], name='crash-again.pdf'),
+             make_pdf([['Third']], name='c.pdf')]
+
+    summary = run_pipeline(files, tmp_path / 'out', 'crashy', workers=2)
+
+    assert [r['ok'] for r in summary['results']] == [True, False, True, False, True]
+    assert all('BrokenProcessPool' in summary['results'][i]['error'] for i in (1, 3))
+    assert summary['pages'] == 4
+    assert (tmp_path / 'out' / 'c' / 'raw' / 'extracted-text.txt').read_text(encoding='utf-8').startswith('Third')
+
+
+def test_token_budget_writes_chunk_metadata(make_pdf, tmp_path):
+    path = make_pdf([['word ' * 20] for _ in range(10)])
+    run_pipeline([path], tmp_path / 'out', 'fitz', workers=1, max_tokens=50)
+
+    metadata = json.loads((tmp_path / 'out' / 'sample' / 'raw' / 'chunks.json').read_text())
+    assert metadata['max_tokens'] == 50
+    assert all(entry['tokens'] <= 50 for entry in metadata['chunks'])
+
+
+def test_queue_depth_is_time_averaged():
+    now = [0.0]
+
+    async def fill():
+        queue = MonitoredQueue(2, clock=lambda: now[0])
+        await queue.put('a')
+        now[0] = 1.0
+        await queue.put('b')
+        now[0] = 3.0
+        await queue.get()
+        now[0] = 4.0
+        return queue.stats()
+
+    # Depth 1 for 1s, 2 for 2s, 1 for 1s
+    assert asyncio.run(fill()) == {'size': 2, 'depth': 1, 'max_depth': 2, 'mean_depth': 1.5}
+
+
+def test_documents_are_added_to_the_search_index(make_pdf, tmp_path):
+    path = make_pdf([['The tenant needs notice'], ['Basketball pickup']])
+    run_pipeline([path], tmp_path / 'out', 'fitz', workers=1, index=True)
+
+    index = SearchIndex()
+    hits = index.search('basketball')
+    index.close()
+    assert [(hit['path'], hit['kind'], hit['page']) for hit in hits] == [(str(path), 'page', 2)]
+    assert hits[0]['text_path'] == str(tmp_path / 'out' / 'sample' / 'raw' / 'extracted-text.txt')
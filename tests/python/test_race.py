@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+pytest.importorskip('fitz')
+
+from extraction.race import RaceError, race_extract, score_pages
+
+
+def test_score_pages():
+    good = score_pages(['Message 1 of 2\nSent:\n12/01/2024', 'Message 2 of 2\nFrom:\nRobert'], require_ofw=True)
+    assert good['passed'] and good['ofw_headers'] == 4
+
+    assert not score_pages(['plain text', 'more text'], require_ofw=True)['passed']
+    assert score_pages(['plain text', 'more text'])['passed']
+    assert not score_pages(['text', '', '', ''])['passed']
+    assert not score_pages(['\x00\x01\x02 garbled \ufffd\ufffd'])['passed']
+    assert not score_pages([])['passed']
+
+
+def test_fastest_healthy_backend_wins(ofw_pdf):
+    pytest.importorskip('pdfminer')
+    start = time.perf_counter()
+    result = race_extract(ofw_pdf, ['pdfminer', 'fitz'], require_ofw=True)
+    elapsed = time.perf_counter() - start
+
+    assert result['backend'] == 'fitz'
+    assert result['score']['passed']
+    assert len(result['pages']) == 358
+    assert result['attempts']['fitz']['status'] == 'won'
+    assert result['attempts']['pdfminer']['status'] == 'cancelled'
+    # pdfminer alone takes far longer than this on the full report
+    assert elapsed < 15
+
+
+def test_best_result_returned_when_none_passes(make_pdf):
+    path = make_pdf([['no headers here'], ['nor here']])
+    result = race_extract(path, ['fitz'], require_ofw=True)
+    assert result['backend'] == 'fitz'
+    assert not result['score']['passed']
+    assert result['attempts']['fitz']['status'] == 'rejected'
+
+
+def test_all_backends_failing(tmp_path):
+    path = tmp_path / 'broken.pdf'
+    path.write_bytes(b'not a pdf')
+    with pytest.raises(RaceError, match='fitz'):
+        race_extract(path, ['fitz'])
+
+
+def test_timeout_kills_running_backends(ofw_pdf):
+    pytest.importorskip('pdfminer')
+    start = time.perf_counter()
+    with pytest.raises(RaceError, match='pdfminer: timeout'):
+        race_extract(ofw_pdf, ['pdfminer'], timeout=0.5)
+    assert time.perf_counter() - start < 10
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match='Unknown extractor'):
+        race_extract('missing.pdf', ['fitz', 'nope'])
+
+
+def test_worker_race_op(make_pdf):
+    from extraction.worker import handle
+
+    path = make_pdf([['Message 1 of 1', 'Subject:', 'Hello']])
+    response = handle({'id': 1, 'op': 'race', 'backends': ['fitz'], 'file': str(path), 'require_ofw': True})
+    assert response['ok'], response.get('error')
+    assert response['backend'] == 'fitz'
+    assert response['score']['ofw_headers'] == 2
+    assert response['chunks'] == [response['text'].strip()]
@@ -0,0 +1,69 @@
+import pytest
+
+fitz = pytest.importorskip('fitz')
+
+from extraction import backends
+from extraction.routing import routed_extract, run_plan, scan
+from extraction.worker import handle
+
+
+@pytest.fixture
+def mixed_pdf(tmp_path):
+    path = tmp_path / 'mixed.pdf'
+    pdf = fitz.open()
+    pdf.new_page().insert_text((72, 72), 'Plain text page')
+    pdf.new_page().insert_text((72, 300), 'Rotated text', rotate=90)
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 20, 20))
+    pixmap.clear_with(200)
+    pdf.new_page().insert_image(fitz.Rect(72, 72, 172, 172), pixmap=pixmap)
+    pdf.new_page()
+    page = pdf.new_page()
+    page.insert_text((72, 72), 'Landscape page')
+    page.set_rotation(90)
+    pdf.save(str(path))
+    pdf.close()
+    return path
+
+
+def test_pages_are_classified(mixed_pdf):
+    plan = scan(mixed_pdf)
+    assert [page['kind'] for page in plan['pages']] == ['text', 'layout', 'image', 'empty', 'layout']
+    assert plan['pages'][1]['reasons'] == ['rotated text']
+    assert plan['pages'][4]['reasons'] == ['page rotated 90']
+    assert plan['routes'] == {'fitz': [0, 2, 3], 'pdfminer': [1, 4]}
+    assert plan['needs_ocr'] == [2]
+    assert plan['kinds'] == {'text': 1, 'layout': 2, 'image': 1, 'empty': 1}
+
+
+def test_plan_extracts_each_page_with_its_backend(mixed_pdf):
+    pytest.importorskip('pdfminer')
+    result = run_plan(mixed_pdf, scan(mixed_pdf))
+    fitz_pages = list(backends.fitz_pages(mixed_pdf))
+    pdfminer_pages = list(backends.pdfminer_pages(mixed_pdf))
+
+    assert result['pages'][0] == fitz_pages[0]
+    assert result['pages'][1] == pdfminer_pages[1]
+    assert result['pages'][4] == pdfminer_pages[4]
+    assert result['text'] == '\n\n'.join(result['pages'])
+    assert result['timings']['pdfminer']['pages'] == 2
+
+
+def test_plain_report_is_routed_to_fitz(ofw_pdf):
+    plan = scan(ofw_pdf)
+    assert plan['routes'] == {'fitz': list(range(358))}
+    assert not any(page['unmapped_fonts'] for page in plan['pages'])
+
+
+def test_compare_reports_time_saved(make_pdf):
+    pytest.importorskip('pdfminer')
+    path = make_pdf([['first page'], ['second page']])
+    result = routed_extract(path, compare=True)
+    assert result['pages'] == list(backends.fitz_pages(path))
+    assert result['time_saved'] == pytest.approx(result['pdfminer_elapsed'] - result['elapsed'])
+
+
+def test_worker_scan_op(make_pdf):
+    path = make_pdf([['only page']])
+    response = handle({'id': 1, 'op': 'scan', 'file': str(path)})
+    assert response['ok']
+    assert response['plan']['routes'] == {'fitz': [0]}
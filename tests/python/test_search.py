@@ -0,0 +1,87 @@
+import pytest
+
+from extraction import backends
+from extraction.search import SearchIndex, iter_passages, match_query
+
+REPORT = [
+    "Message Report\nMessage 1 of 2\nThe tenant needs a 30 day notice.\nSent:\n12/01/2024 at 01:02 AM\nFrom:\n"
+    "Robert Moyer\nTo:\nChristine Moyer (First Viewed: 12/01/2024 at 07:30 AM)\nSubject:\nRe: Condo Sale\n"
+    "Page 1 of 2",
+    "Message 2 of 2\nPickup is at the café after basketball.\nSent:\n12/02/2024 at 09:41 PM\nFrom:\n"
+    "Christine Moyer\nTo:\nRobert Moyer (First Viewed: Never)\nSubject:\nPickup\nPage 2 of 2",
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(tmp_path / 'search.sqlite3')
+    yield index
+    index.close()
+
+
+def test_passages_are_messages_with_byte_offsets():
+    text = '\n\n'.join(REPORT).encode('utf-8')
+    first, second = iter_passages(REPORT)
+
+    assert (first['kind'], first['number'], first['subject'], first['sender']) == \
+        ('message', 1, 'Re: Condo Sale', 'Robert Moyer')
+    assert (first['page'], first['last_page'], second['page']) == (1, 1, 2)
+    assert first['sent'] == '2024-12-01T01:02:00'
+    # Offsets are bytes, so they stay right after the non-ASCII "café"
+    assert text[second['start']:second['end']].decode('utf-8').startswith('Message 2 of 2\nPickup is at the café')
+    assert text[second['start']:second['end']].decode('utf-8').endswith('Subject:\nPickup\nPage 2 of 2')
+
+
+def test_documents_without_messages_are_indexed_by_page():
+    passages = list(iter_passages(['first page', 'second page'], separator=''))
+    assert [(p['kind'], p['page'], p['start'], p['end']) for p in passages] == [('page', 1, 0, 10),
+                                                                              ('page', 2, 10, 21)]
+
+
+def test_search_ranks_hits_with_snippets(index, tmp_path):
+    assert index.add(tmp_path / 'dec.pdf', REPORT, 'sha-dec', 'fitz') == 2
+    assert index.add(tmp_path / 'notes.pdf', ['Notes about the tenant.', 'Nothing here.'], 'sha-notes', 'fitz') == 2
+
+    hits = index.search('tenant')
+    assert sorted(hit['path'] for hit in hits) == [str(tmp_path / 'dec.pdf'), str(tmp_path / 'notes.pdf')]
+    assert hits[0]['score'] <= hits[1]['score']
+    assert any('[tenant]' in hit['snippet'] for hit in hits)
+
+    # Every word must match; stemming finds "notices" for "notice"
+    assert [hit['number'] for hit in index.search('notices tenant')] == [1]
+    # Header columns are searchable and weighted above the body
+    assert [hit['number'] for hit in index.search('pickup')] == [2]
+    assert index.search('subject:condo', raw=True)[0]['subject'] == 'Re: Condo Sale'
+    assert index.search('tenant', kind='page')[0]['path'] == str(tmp_path / 'notes.pdf')
+    assert index.search('tenant', document=tmp_path / 'notes.pdf', limit=5)[0]['page'] == 1
+    assert index.search('12/01 "') == []
+
+
+def test_updates_are_incremental_per_document(index, tmp_path):
+    path = tmp_path / 'dec.pdf'
+    index.add(path, REPORT, 'v1', 'fitz')
+    index.add(tmp_path / 'other.pdf', ['other tenant'], 'x', 'fitz')
+
+    assert index.add(path, REPORT, 'v1', 'fitz') is None
+    assert index.add(path, ['The tenant moved out.'], 'v2', 'fitz') == 1
+    assert index.search('basketball') == []
+    assert len(index.search('tenant')) == 2
+    assert index.stats()['passages'] == 2
+
+    assert index.remove(path) and not index.remove(path)
+    assert [hit['path'] for hit in index.search('tenant')] == [str(tmp_path / 'other.pdf')]
+
+
+def test_query_terms_are_quoted():
+    assert match_query('condo sale 12/01') == '"condo" "sale" "12" "01"'
+    assert match_query('  ') == ''
+
+
+def test_ofw_report(index, ofw_pdf):
+    pytest.importorskip('fitz')
+    pages = backends.extract('fitz', ofw_pdf)['pages']
+    assert index.add(ofw_pdf, pages, 'sha', 'fitz') == 287
+
+    hit = index.search('basketball tonight', limit=1)[0]
+    text = '\n\n'.join(pages).encode('utf-8')
+    assert text[hit['start']:hit['end']].decode('utf-8').startswith(f"Message {hit['number']} of 287")
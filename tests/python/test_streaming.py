@@ -0,0 +1,69 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from extraction import backends
+from extraction.chunking import chunk_text
+from extraction.streaming import stream_extract
+
+SCRIPTS = Path(__file__).resolve().parents[2] / 'scripts'
+
+# Runs in a fresh interpreter so ru_maxrss reflects this extraction only
+MEASURE = """
+import json, resource, sys
+sys.path.insert(0, {scripts!r})
+from extraction.streaming import stream_extract
+stats = stream_extract('fitz', {pdf!r}, {out!r})
+stats['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps(stats))
+"""
+
+
+def build_pdf(path, page_count):
+    fitz = pytest.importorskip('fitz')
+    body = '\n'.join(f"Line {j}: message text with enough words to fill the page" for j in range(45))
+    template = fitz.open()
+    for i in range(50):
+        page = template.new_page()
+        page.insert_text((40, 40), f"Message {i + 1} of 50\nFrom: Robert\nTo: Christine\n{body}", fontsize=8)
+    pdf = fitz.open()
+    while len(pdf) < page_count:
+        pdf.insert_pdf(template, to_page=min(50, page_count - len(pdf)) - 1)
+    pdf.save(str(path))
+    return path
+
+
+def measure(tmp_path, page_count):
+    pdf = build_pdf(tmp_path / f'synthetic-{page_count}.pdf', page_count)
+    out = tmp_path / f'out-{page_count}'
+    code = MEASURE.format(scripts=str(SCRIPTS), pdf=str(pdf), out=str(out))
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_streaming_output_matches_buffered(tmp_path):
+    pdf = build_pdf(tmp_path / 'small.pdf', 120)
+    stats = stream_extract('fitz', pdf, tmp_path / 'out', max_size=20000)
+    expected = backends.extract('fitz', pdf)['text']
+
+    raw = (tmp_path / 'out' / 'raw' / 'extracted-text.txt').read_text(encoding='utf-8')
+    chunk_files = sorted((tmp_path / 'out' / 'llm-input').glob('chunk-*.txt'))
+    assert raw == expected
+    assert [f.read_text(encoding='utf-8') for f in chunk_files] == chunk_text(expected, 20000)
+    assert stats['pages'] == 120 and stats['chunks'] == len(chunk_files)
+
+
+def test_peak_rss_is_flat_for_5000_pages(tmp_path):
+    small = measure(tmp_path, 500)
+    large = measure(tmp_path, 5000)
+
+    text_mb = large['chars'] / (1024 * 1024)
+    growth_mb = (large['peak_rss_kb'] - small['peak_rss_kb']) / 1024
+    assert large['pages'] == 5000
+    assert text_mb > 10
+    # Buffering the document would grow RSS by several times the text size;
+    # streaming should stay within a small fraction of it
+    assert growth_mb < text_mb / 2, f"RSS grew {growth_mb:.1f} MB for {text_mb:.1f} MB of text"
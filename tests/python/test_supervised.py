@@ -0,0 +1,112 @@
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from extraction import backends, metrics, parallel, supervised
+from extraction.supervised import supervised_extract, supervised_pages
+from extraction.worker import handle
+
+# The fake backends below are patched into the parent and reach the workers by fork
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason="needs fork")
+
+HANG, CRASH, BROKEN = 2, 4, 7
+
+
+def flaky_pages(input_path, page_numbers=None):
+    for number in page_numbers:
+        if number == HANG:
+            time.sleep(60)
+        elif number == CRASH:
+            os._exit(3)
+        elif number == BROKEN:
+            raise ValueError(f"bad page {number}")
+        yield f"page {number}"
+
+
+def cheap_pages(input_path, page_numbers=None):
+    for number in page_numbers:
+        if number == BROKEN:
+            raise ValueError(f"still bad {number}")
+        yield f"cheap {number}"
+
+
+@pytest.fixture
+def flaky(monkeypatch):
+    monkeypatch.setitem(backends.BACKENDS, 'flaky', backends.Backend('flaky', 'json', flaky_pages, '\n\n'))
+    monkeypatch.setitem(backends.BACKENDS, 'cheap', backends.Backend('cheap', 'json', cheap_pages, '\n\n'))
+    monkeypatch.setitem(parallel.PAGE_COUNTS, 'flaky', lambda input_path: 10)
+    monkeypatch.setitem(supervised.FALLBACKS, 'flaky', 'cheap')
+    monkeypatch.setattr(backends.Backend, 'version', lambda self: '1')
+
+
+def test_bad_pages_are_isolated_retried_and_marked(flaky, make_pdf):
+    metrics.REGISTRY.clear()
+    start = time.perf_counter()
+    pages, report = supervised_pages('flaky', make_pdf([['x']]), timeout=1, group_pages=3, workers=2)
+
+    # The hung group and then the hung page each cost one timeout
+    assert time.perf_counter() - start < 10
+    assert pages == ['page 0', 'page 1', 'cheap 2', 'page 3', 'cheap 4', 'page 5', 'page 6', '', 'page 8', 'page 9']
+    assert (report['ok'], report['recovered'], report['failed'], report['retries']) == (7, 2, 1, 3)
+    assert report['failures'] == {'timeout': 2, 'crash': 2, 'error': 3}
+    assert report['failed_pages'] == [8] and report['recovered_pages'] == [3, 5]
+
+    status = report['page_status']
+    assert status[7]['status'] == 'failed' and [a['backend'] for a in status[7]['errors']] == \
+        ['flaky', 'flaky', 'cheap']
+    assert status[2]['backend'] == 'cheap' and status[2]['errors'][0]['group'] == [1, 3]
+    assert status[1]['status'] == 'ok' and status[9] == {'page': 10, 'status': 'ok', 'backend': 'flaky',
+                                                         'seconds': status[9]['seconds']}
+    assert metrics.PAGE_FAILURES.value(backend='flaky', reason='timeout') == 2
+
+
+def test_failed_pages_are_marked_in_the_manifest(flaky, make_pdf, tmp_path):
+    stats = supervised_extract('flaky', make_pdf([['x']]), tmp_path / 'out', timeout=1, group_pages=10,
+                               fallback=False)
+
+    manifest = json.loads((tmp_path / 'out' / 'raw' / 'extraction-manifest.json').read_text())
+    assert manifest['failed_pages'] == [3, 5, 8]
+    assert [page['status'] for page in manifest['page_status']].count('failed') == 3
+    assert stats['supervision']['failed'] == 3 and 'page_status' not in stats['supervision']
+    text = (tmp_path / 'out' / 'raw' / 'extracted-text.txt').read_text()
+    assert text.startswith('page 0\n\npage 1\n\n\n\npage 3')
+
+
+def test_matches_unsupervised_extraction(make_pdf):
+    pytest.importorskip('fitz')
+    path = make_pdf([[f'Message {i}', f'Body {i}'] for i in range(12)])
+    for name in ('fitz', 'pdfminer'):
+        pages, report = supervised_pages(name, path, group_pages=5, workers=2)
+        assert pages == list(backends.get_backend(name).pages(path))
+        assert report['ok'] == 12 and not report['slow']
+
+
+def test_memory_limit_kills_runaway_pages(monkeypatch, make_pdf):
+    pytest.importorskip('resource')
+
+    def greedy_pages(input_path, page_numbers=None):
+        for number in page_numbers:
+            if number == 1:
+                bytearray(1024 * 1024 * 1024)
+            yield f"page {number}"
+
+    monkeypatch.setitem(backends.BACKENDS, 'greedy', backends.Backend('greedy', 'json', greedy_pages, '\n\n'))
+    monkeypatch.setitem(parallel.PAGE_COUNTS, 'greedy', lambda input_path: 3)
+    pages, report = supervised_pages('greedy', make_pdf([['x']]), memory_mb=512, group_pages=1, workers=1)
+
+    assert pages == ['page 0', '', 'page 2']
+    assert report['failed_pages'] == [2]
+    assert 'MemoryError' in report['page_status'][1]['errors'][0]['error']
+
+
+def test_worker_supervised_extract(make_pdf):
+    pytest.importorskip('fitz')
+    path = make_pdf([['Message 1'], ['Message 2'], ['Message 3']])
+    response = handle({'id': 1, 'op': 'extract', 'backend': 'fitz', 'file': str(path), 'supervise': True,
+                       'page_timeout': 30, 'page_group': 2})
+    assert response['ok'], response.get('error')
+    assert response['page_count'] == 3 and not response['cached']
+    assert response['supervision']['ok'] == 3 and response['supervision']['group_pages'] == 2
@@ -0,0 +1,153 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+from extraction.batch import run_batch
+from extraction.pipeline import run_pipeline
+from extraction.streaming import stream_extract
+from extraction.tika_client import TikaClient, TikaError
+
+
+class StandInTika(BaseHTTPRequestHandler):
+    """Answers PUT /tika like a Tika server, with scripted failures and delays."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_PUT(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            fail = server.failures > 0
+            if fail:
+                server.failures -= 1
+        if server.delay:
+            time.sleep(server.delay)
+        if fail:
+            self.reply(503, b'busy')
+        else:
+            self.reply(200, f"Extracted {len(body)} bytes\n\nMessage 1 of 1".encode('utf-8'))
+
+    def do_GET(self):
+        self.reply(200, b'This is Tika Server')
+
+    def reply(self, status, payload):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=UTF-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def tika_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInTika)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.connections = set()
+    server.failures = 0
+    server.delay = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def documents(tmp_path):
+    paths = []
+    for i in range(8):
+        path = tmp_path / f'doc-{i}.pdf'
+        path.write_bytes(b'%PDF-1.4\n' + b'x' * i)
+        paths.append(path)
+    return paths
+
+
+def test_reuses_keep_alive_connections(tika_server, documents):
+    client = TikaClient(tika_server.url, pool_size=2)
+    for path in documents:
+        assert client.extract(path).startswith('Extracted')
+    client.close()
+    assert tika_server.requests == len(documents)
+    assert len(tika_server.connections) == 1
+
+
+def test_extract_many_runs_concurrently(tika_server, documents):
+    tika_server.delay = 0.2
+    client = TikaClient(tika_server.url, pool_size=4)
+    start = time.perf_counter()
+    results = client.extract_many(documents)
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    assert [path for path, _, _ in results] == documents
+    assert all(error is None and text.startswith('Extracted') for _, text, error in results)
+    assert elapsed < 0.2 * len(documents) / 2
+    assert len(tika_server.connections) <= 4
+
+
+def test_extract_many_hands_each_text_over_as_it_arrives(tika_server, documents):
+    tika_server.failures = 1
+    client = TikaClient(tika_server.url, retries=0)
+    results = client.extract_many(documents[:3], handle=lambda path, text, seconds: (path, text[:9], seconds > 0))
+    client.close()
+
+    assert sum(error is not None for _, _, error in results) == 1
+    assert all(result == (path, 'Extracted', True) for path, result, error in results if error is None)
+
+
+def test_batch_sends_documents_to_the_server_concurrently(tika_server, documents, tmp_path):
+    tika_server.delay = 0.2
+    start = time.perf_counter()
+    summary = run_batch(documents, tmp_path / 'out', 'tika', workers=4, server=tika_server.url)
+    elapsed = time.perf_counter() - start
+
+    assert summary['succeeded'] == len(documents) and summary['pages'] == len(documents)
+    assert elapsed < 0.2 * len(documents) / 2
+    raw = (tmp_path / 'out' / 'doc-3' / 'raw' / 'extracted-text.txt').read_text(encoding='utf-8')
+    assert raw == 'Extracted 12 bytes\n\nMessage 1 of 1'
+    assert (tmp_path / 'out' / 'doc-3' / 'llm-input' / 'chunk-001.txt').exists()
+
+
+def test_pipeline_extracts_from_the_server_in_threads(tika_server, documents, tmp_path):
+    tika_server.delay = 0.2
+    start = time.perf_counter()
+    summary = run_pipeline(documents, tmp_path / 'out', 'tika', workers=4, server=tika_server.url)
+
+    assert summary['succeeded'] == len(documents)
+    assert time.perf_counter() - start < 0.2 * len(documents) / 2
+
+
+def test_retries_server_errors_with_backoff(tika_server, documents):
+    tika_server.failures = 2
+    client = TikaClient(tika_server.url, retries=3, backoff=0.01)
+    assert client.extract(documents[0]).startswith('Extracted')
+    assert tika_server.requests == 3
+
+    tika_server.failures = 5
+    with pytest.raises(TikaError):
+        TikaClient(tika_server.url, retries=1, backoff=0.01).extract(documents[0])
+
+
+def test_read_timeout_is_enforced(tika_server, documents):
+    tika_server.delay = 1
+    client = TikaClient(tika_server.url, read_timeout=0.1, retries=0)
+    with pytest.raises(TikaError):
+        client.extract(documents[0])
+
+
+def test_streaming_mode_uses_the_server(tika_server, documents, tmp_path):
+    stats = stream_extract('tika', documents[3], tmp_path / 'out', server=tika_server.url)
+    raw = (tmp_path / 'out' / 'raw' / 'extracted-text.txt').read_text(encoding='utf-8')
+    assert raw == 'Extracted 12 bytes\n\nMessage 1 of 1'
+    assert stats['chunks'] == 1
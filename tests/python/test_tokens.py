@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from extraction.cache import ExtractionCache, cached_extract
+from extraction.chunking import chunk_pages, chunk_pages_by_tokens, iter_token_chunk_spans
+from extraction.streaming import stream_extract
+from extraction.tokens import HEURISTIC_NAME, TokenEstimator
+from extraction.worker import handle
+
+
+@pytest.fixture
+def estimator():
+    return TokenEstimator(encoding=None)
+
+
+def test_heuristic_counts(estimator):
+    assert estimator.name == HEURISTIC_NAME
+    assert estimator.count('') == 0
+    assert estimator.count('the cat sat') == 3
+    # Long words, digit groups, symbols and line breaks
+    assert estimator.count('Christine') == 2
+    assert estimator.count('12/01/2024') == 6
+    assert estimator.count('Hi,\n\nthere') == 4
+
+
+def test_batches_are_cached(estimator):
+    assert estimator.count_batch(['one two', 'three', 'one two']) == [2, 1, 2]
+    assert estimator.misses == 3
+    assert estimator.count_batch(['three', 'four']) == [1, 1]
+    assert (estimator.hits, estimator.misses) == (1, 4)
+
+
+def test_cache_is_bounded():
+    estimator = TokenEstimator(encoding=None, cache_size=2)
+    estimator.count_batch(['a', 'b', 'c'])
+    assert estimator.count('a') == 1
+    assert estimator.misses == 4
+
+
+def test_chunks_fit_the_budget(estimator):
+    paragraphs = [(f'paragraph {i} ' + 'word ' * (i % 17), i, i) for i in range(600)]
+    chunks = list(iter_token_chunk_spans(paragraphs, max_tokens=200, estimator=estimator))
+
+    assert '\n\n'.join(chunk for chunk, _, _, _ in chunks) == '\n\n'.join(p for p, _, _ in paragraphs)
+    for chunk, first, last, tokens in chunks:
+        assert tokens <= 200
+        assert tokens == sum(estimator.count_batch(chunk.split('\n\n'))) + chunk.count('\n\n')
+    assert [(first, last) for _, first, last, _ in chunks][0][0] == 0
+    assert chunks[-1][2] == 599
+    # Every chunk but the last is full enough that the next paragraph did not fit
+    assert all(tokens > 200 - 30 for _, _, _, tokens in chunks[:-1])
+
+
+def test_oversized_paragraph_is_its_own_chunk(estimator):
+    spans = [('short', 0, 0), ('word ' * 50, 1, 1), ('tail', 2, 2)]
+    chunks = list(iter_token_chunk_spans(spans, max_tokens=10, estimator=estimator))
+    assert [(first, last, tokens) for _, first, last, tokens in chunks] == [(0, 0, 1), (1, 1, 50), (2, 2, 1)]
+
+
+def test_fewer_chunks_than_character_budget(estimator):
+    pages = ['Sent: 12/01/2024 at 01:02 AM\n' + 'See you at the school pickup. ' * 200] * 40
+    by_chars = list(chunk_pages(pages, 20000))
+    by_tokens = list(chunk_pages_by_tokens(pages, 20000, estimator=estimator))
+    assert len(by_tokens) < len(by_chars)
+    assert '\n\n'.join(chunk for chunk, _ in by_tokens) == '\n\n'.join(by_chars)
+
+
+def test_stream_extract_writes_token_metadata(make_pdf, tmp_path):
+    pages = [[f'Page {n} line {i} about the pickup schedule' for i in range(30)] for n in range(10)]
+    path = make_pdf(pages)
+
+    stats = stream_extract('fitz', path, tmp_path / 'out', max_tokens=400)
+    metadata = json.loads((tmp_path / 'out' / 'raw' / 'chunks.json').read_text(encoding='utf-8'))
+    assert metadata['max_tokens'] == 400
+    assert metadata['chunk_count'] == stats['chunks'] > 1
+    assert metadata['total_tokens'] == stats['tokens'] == sum(c['tokens'] for c in metadata['chunks'])
+    assert all(c['tokens'] <= 400 for c in metadata['chunks'])
+    assert metadata['chunks'][0]['pages'][0] == 0 and metadata['chunks'][-1]['pages'][1] == 9
+    for entry in metadata['chunks']:
+        assert (tmp_path / 'out' / 'llm-input' / entry['file']).read_text(encoding='utf-8')
+
+    stream_extract('fitz', path, tmp_path / 'store', max_tokens=400, chunk_store=True)
+    manifest = json.loads((tmp_path / 'store' / 'chunks' / 'manifest.json').read_text(encoding='utf-8'))
+    assert [c['tokens'] for c in manifest['chunks']] == [c['tokens'] for c in metadata['chunks']]
+    assert manifest['tokens'] == metadata['total_tokens']
+
+
+def test_worker_and_cache(make_pdf):
+    path = make_pdf([['alpha beta gamma'] * 40] * 3)
+    cache = ExtractionCache()
+    assert cache.key('fitz', path) != cache.key('fitz', path, max_tokens=100)
+
+    first = cached_extract('fitz', path, cache, max_tokens=100)
+    again = cached_extract('fitz', path, cache, max_tokens=100)
+    assert again['cached'] and again['chunk_tokens'] == first['chunk_tokens']
+    assert 'chunk_tokens' not in cached_extract('fitz', path, cache)
+
+    response = handle({'op': 'extract', 'backend': 'fitz', 'file': str(path), 'max_tokens': 100})
+    assert response['ok']
+    assert len(response['chunk_tokens']) == len(response['chunks']) > 1
+    assert response['total_tokens'] == sum(response['chunk_tokens'])
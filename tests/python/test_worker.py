@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+from extraction import backends
+from extraction.protocol import read_message, write_message
+from extraction.worker import WorkerPool, handle
+
+
+def test_framing_round_trip():
+    stream = io.BytesIO()
+    write_message(stream, {'op': 'ping', 'text': 'Grüße'})
+    write_message(stream, {'op': 'shutdown'})
+    stream.seek(0)
+    assert read_message(stream) == {'op': 'ping', 'text': 'Grüße'}
+    assert read_message(stream) == {'op': 'shutdown'}
+    assert read_message(stream) is None
+
+
+def test_truncated_message_raises():
+    stream = io.BytesIO()
+    write_message(stream, {'op': 'ping'})
+    stream = io.BytesIO(stream.getvalue()[:-2])
+    with pytest.raises(EOFError):
+        read_message(stream)
+
+
+def test_handle_reports_errors():
+    response = handle({'id': 7, 'op': 'extract', 'backend': 'fitz', 'file': '/missing.pdf'})
+    assert response['id'] == 7
+    assert response['ok'] is False
+    assert response['error_type'] == 'FileNotFoundError'
+
+
+def test_pdfminer_pages_match_whole_document(make_pdf):
+    pytest.importorskip('pdfminer')
+    from io import StringIO
+    from pdfminer.high_level import extract_text_to_fp
+    from pdfminer.layout import LAParams
+
+    path = make_pdf([['Message 1 of 2', 'From: A'], ['Message 2 of 2', 'From: B']])
+    expected = StringIO()
+    with open(path, 'rb') as fin:
+        extract_text_to_fp(fin, expected, laparams=LAParams(**backends.PDFMINER_LAPARAMS))
+
+    result = backends.extract('pdfminer', path)
+    assert len(result['pages']) == 2
+    assert result['text'] == expected.getvalue()
+
+
+def test_pool_reuses_warm_workers(make_pdf):
+    path = make_pdf([['first page'], ['second page']])
+    with WorkerPool(size=2, preload=['fitz']) as pool:
+        first = pool.extract('fitz', path)
+        pids = {pool.request({'op': 'ping'})['pid'] for _ in range(4)}
+        second = pool.extract('fitz', path)
+        failed = pool.request({'op': 'extract', 'backend': 'nope', 'file': str(path)})
+
+    assert first['page_count'] == 2
+    assert first['text'] == 'first page\n\n\nsecond page\n'
+    assert first['chunks'] == ['first page\n\nsecond page']
+    assert second['text'] == first['text']
+    assert len(pids) <= 2
+    assert failed['ok'] is False